@@ -1,7 +1,20 @@
-from nicegui import ui
+import time
+
+# Instante de arranque: se toma antes de cualquier import pesado para medir
+# el arranque en frío hasta que se sirve la primera página.
+INICIO_PROCESO = time.perf_counter()
+
+import logging
+import os
+
+from nicegui import app, ui
 
 from robot.modelos import RobotCocina
-from robot import servicios
+from data.escritor import ESCRITOR
+from robot import servicios, servicios_async
+from robot.atencion import COLA_ATENCION
+from robot.diario import DIARIO
+from robot.historial import HISTORIAL, encolar_importar_diario
 from ui.vistas import registrar_vistas
 
 
@@ -9,7 +22,11 @@ from ui.vistas import registrar_vistas
 # Inicialización de la base de datos
 # ====================================
 
+logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+logger = logging.getLogger('robot_cocina')
+
 # Crea la BD y los datos de fábrica si no existen.
+# Si ya está al día (PRAGMA user_version), solo cuesta una lectura.
 servicios.inicializar_bd_si_es_necesario()
 
 # ===============================
@@ -18,12 +35,65 @@ servicios.inicializar_bd_si_es_necesario()
 
 robot = RobotCocina()
 
+# Los pasos manuales marcados como adelantables pueden confirmarse durante
+# el paso automático anterior
+robot.configurar_adelanto_manual(True)
+
+# Sus pasos manuales aparecen en la cola del operador (/operador)
+COLA_ATENCION.registrar_robot(robot, 'Robot 1')
+
+# Cada transición de sus recetas queda en su diario (data/diario/Robot_1.diario)
+DIARIO.registrar_robot(robot, 'Robot 1')
+
+# Y al terminar, cada cocción pasa al historial (historial_cocciones)
+HISTORIAL.registrar_robot(robot, 'Robot 1')
+
 # =================================
 # Registrar vistas de la interfaz
 # =================================
 
 registrar_vistas(robot)
 
+# Cargar el catálogo compartido en el hilo de BD antes de servir páginas
+app.on_startup(servicios_async.precargar_catalogo)
+
+
+def importar_diario() -> None:
+    """Pasa al historial las cocciones del diario que no llegaron a guardarse."""
+    ruta = DIARIO.ruta('Robot 1')
+    if not os.path.exists(ruta):
+        return
+    try:
+        encolar_importar_diario(ruta, 'Robot 1')
+    except (OSError, ValueError):
+        logger.exception("No se pudo importar el diario %s", ruta)
+
+
+app.on_startup(importar_diario)
+
+# Confirmar las escrituras pendientes antes de salir
+app.on_shutdown(ESCRITOR.detener)
+app.on_shutdown(DIARIO.detener)
+
+# ===============================
+# Medición del arranque en frío
+# ===============================
+
+ARRANQUE = {'medido': False}
+
+
+def medir_arranque() -> None:
+    """Registra el tiempo desde el arranque del proceso hasta la primera página servida."""
+    if not ARRANQUE['medido']:
+        ARRANQUE['medido'] = True
+        logger.info(
+            'Arranque en frío: %.2f s hasta la primera página servida',
+            time.perf_counter() - INICIO_PROCESO,
+        )
+
+
+app.on_connect(medir_arranque)
+
 # ===============================
 # Lanzar la aplicación NiceGUI
 # ===============================
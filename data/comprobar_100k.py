@@ -0,0 +1,126 @@
+"""
+Comprobación de escala de los servicios de recetas con un catálogo grande.
+
+Uso:
+    python -m data.comprobar_100k [num_recetas]
+
+Crea en una BD temporal (no toca data/robot.db) num_recetas recetas de
+usuario (100.000 por defecto), con un paso manual de un proceso de usuario y
+uno automático cada una, y recorre las operaciones que antes construían una
+lista IN (?, ?, ...) del tamaño del catálogo:
+
+- recalcular_resumenes de todas las recetas, por id;
+- cargar_recetas_usuario y cargar_resumenes_recetas_usuario;
+- borrar el proceso de usuario (sus pasos caen en cascada y se recalcula el
+  resumen de todas las recetas afectadas);
+- borrar todas las recetas de una vez.
+
+Sale con código 1 si alguna falla (p. ej. "too many SQL variables") o si
+los recuentos no cuadran.
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from . import init_db
+
+NUM_RECETAS = 100_000
+
+
+def _medir(descripcion: str, funcion):
+    inicio = time.perf_counter()
+    resultado = funcion()
+    print(f"{descripcion}: {time.perf_counter() - inicio:.2f} s")
+    return resultado
+
+
+def _comprobar(condicion: bool, mensaje: str) -> None:
+    if not condicion:
+        raise AssertionError(mensaje)
+
+
+def comprobar(num_recetas: int = NUM_RECETAS) -> None:
+    """Ejecuta la comprobación en la BD actual de init_db (debe ser temporal)."""
+    # Se importan aquí: leen init_db.DB_PATH al conectar
+    from robot import servicios
+    from data.escritor import ESCRITOR, ESPERA_RESULTADO_S
+
+    init_db.inicializar_bd()
+    automatico = next(p for p in servicios.cargar_procesos_base() if not p.es_manual())
+    manual = servicios.crear_proceso_usuario("Paso de prueba", "preparacion", "manual", "Comprobar")
+
+    def alta(conn):
+        conn.executemany(
+            "INSERT INTO recetas_usuario (nombre, descripcion, ingredientes) VALUES (?, '', '[]');",
+            ((f"Receta {n}",) for n in range(num_recetas)),
+        )
+        ids = [fila[0] for fila in conn.execute("SELECT id FROM recetas_usuario ORDER BY id;")]
+        conn.executemany(
+            """
+            INSERT INTO pasos_receta_usuario
+                (id_receta, id_proceso, id_proceso_usuario, orden, temperatura, tiempo_segundos, velocidad)
+            VALUES (?, ?, ?, ?, ?, ?, ?);
+            """,
+            (
+                paso
+                for id_receta in ids
+                for paso in (
+                    (id_receta, manual.id + 10000, manual.id, 1, None, None, None),
+                    (id_receta, automatico.id, None, 2, 90, 60, 3),
+                )
+            ),
+        )
+        return ids
+
+    ids = _medir(f"Alta de {num_recetas} recetas", lambda: ESCRITOR.enviar(alta).result(ESPERA_RESULTADO_S))
+    _comprobar(len(ids) == num_recetas, f"Se esperaban {num_recetas} recetas y hay {len(ids)}")
+
+    def recalcular(conn):
+        init_db.recalcular_resumenes(conn, "usuario", ids)
+
+    _medir("recalcular_resumenes por id", lambda: ESCRITOR.enviar(recalcular).result(ESPERA_RESULTADO_S))
+
+    recetas = _medir("cargar_recetas_usuario", servicios.cargar_recetas_usuario)
+    _comprobar(len(recetas) == num_recetas, f"cargar_recetas_usuario devolvió {len(recetas)} recetas")
+    _comprobar(all(len(r.pasos) == 2 for r in recetas), "Alguna receta no tiene sus dos pasos")
+
+    resumenes = _medir("cargar_resumenes_recetas_usuario", servicios.cargar_resumenes_recetas_usuario)
+    _comprobar(len(resumenes) == num_recetas, f"Hay {len(resumenes)} resúmenes")
+    _comprobar(all(r.pasos_manuales == 1 for r in resumenes), "Resumen de pasos manuales incorrecto")
+
+    _medir("Borrar el proceso de usuario (cascada)", lambda: servicios.eliminar_proceso_usuario(manual.id))
+    resumenes = servicios.cargar_resumenes_recetas_usuario()
+    _comprobar(
+        all(r.num_pasos == 1 and r.pasos_manuales == 0 for r in resumenes),
+        "Los resúmenes no se recalcularon al borrar el proceso",
+    )
+
+    _medir("Borrar todas las recetas", lambda: servicios.eliminar_recetas_usuario(ids))
+    _comprobar(servicios.contar_recetas_usuario() == 0, "Quedan recetas de usuario tras el borrado")
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.WARNING, format="%(levelname)s %(name)s: %(message)s")
+    num_recetas = int(sys.argv[1]) if len(sys.argv) > 1 else NUM_RECETAS
+
+    directorio = tempfile.mkdtemp(prefix="robot_100k_")
+    init_db.DB_PATH = os.path.join(directorio, "robot.db")
+    init_db.PLANTILLA_PATH = os.path.join(directorio, "robot_factory.db")
+    try:
+        comprobar(num_recetas)
+    except Exception as ex:
+        print(f"FALLO: {type(ex).__name__}: {ex}")
+        sys.exit(1)
+    finally:
+        from data.escritor import ESCRITOR
+        ESCRITOR.detener()
+        shutil.rmtree(directorio, ignore_errors=True)
+    print(f"OK: {num_recetas} recetas sin errores de límite de parámetros")
+
+
+if __name__ == "__main__":
+    main()
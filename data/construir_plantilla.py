@@ -0,0 +1,27 @@
+"""
+Paso de construcción de la BD de fábrica (data/robot_factory.db).
+
+Uso:
+    python -m data.construir_plantilla [ruta_destino]
+
+Inserta una sola vez el catálogo de fábrica en una BD compacta e indexada.
+Esa BD no se copia ni se modifica: cada conexión la adjunta como 'fabrica'
+en solo lectura (immutable=1, con mmap), así que el primer arranque y el
+reinicio de fábrica no repiten cientos de INSERT.
+"""
+
+import logging
+import sys
+
+from . import init_db
+
+
+def main() -> None:
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(name)s: %(message)s")
+    ruta = sys.argv[1] if len(sys.argv) > 1 else init_db.PLANTILLA_PATH
+    init_db.construir_plantilla(ruta)
+    print(f"Plantilla de fábrica generada en: {ruta}")
+
+
+if __name__ == "__main__":
+    main()
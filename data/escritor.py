@@ -0,0 +1,245 @@
+"""
+Escritor único de la base de datos del usuario (data/robot.db).
+
+Todas las escrituras pasan por un solo hilo que consume una cola de comandos.
+Un comando es una función comando(conn) -> resultado que ejecuta sus
+sentencias sin hacer commit. El hilo:
+
+- agrupa los comandos que llegan dentro de una ventana corta (VENTANA_LOTE_S,
+  como mucho MAX_LOTE) en una única transacción: un solo commit (y un solo
+  fsync) para todo el lote;
+- aísla cada comando en un SAVEPOINT, de modo que si uno falla se deshace solo
+  él y el resto del lote se confirma igualmente;
+- devuelve a quien encola un Future que se resuelve (o recibe la excepción)
+  cuando el lote está confirmado. Si la transacción entera se pierde (disco
+  lleno, error de E/S, un comando que la cierra), todos los Future del lote
+  reciben la excepción y el hilo sigue atendiendo la cola.
+
+Como nunca hay dos escritores a la vez dentro del proceso, desaparecen los
+"database is locked" entre sesiones y la latencia de escritura es predecible.
+"""
+
+import logging
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Callable, List, NamedTuple, Optional, Tuple
+
+from . import init_db
+
+logger = logging.getLogger(__name__)
+
+# Tiempo que se esperan más comandos tras el primero antes de confirmar el lote
+VENTANA_LOTE_S = 0.002
+MAX_LOTE = 64
+
+# Milisegundos que se espera si otro proceso tiene el bloqueo de escritura
+ESPERA_BLOQUEO_MS = 5000
+
+# Segundos que las funciones síncronas esperan como mucho a su escritura
+ESPERA_RESULTADO_S = 60.0
+
+
+class _Escritura(NamedTuple):
+    comando: Callable[[sqlite3.Connection], Any]
+    al_confirmar: Optional[Callable[[Any], None]]
+    futuro: Future
+
+
+class EscritorBD:
+    """
+    Hilo escritor con cola de comandos agrupados en transacciones.
+
+    El hilo (y su conexión) se crean con el primer comando encolado.
+    """
+
+    def __init__(
+        self,
+        conectar: Callable[[], sqlite3.Connection] = init_db.conectar,
+        ventana_lote_s: float = VENTANA_LOTE_S,
+        max_lote: int = MAX_LOTE,
+    ):
+        self._conectar = conectar
+        self._ventana_lote_s = ventana_lote_s
+        self._max_lote = max_lote
+        self._cola: "queue.Queue[Optional[_Escritura]]" = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._lotes = 0
+        self._escrituras = 0
+
+    # ==========
+    # Consulta
+    # ==========
+
+    @property
+    def lotes(self) -> int:
+        """Transacciones confirmadas desde el arranque."""
+        return self._lotes
+
+    @property
+    def escrituras(self) -> int:
+        """Comandos ejecutados (confirmados o fallidos) desde el arranque."""
+        return self._escrituras
+
+    # ==========
+    # Cola
+    # ==========
+
+    def enviar(
+        self,
+        comando: Callable[[sqlite3.Connection], Any],
+        al_confirmar: Optional[Callable[[Any], None]] = None,
+    ) -> Future:
+        """
+        Encola un comando y devuelve un Future con su resultado.
+
+        `al_confirmar(resultado)` se llama desde el hilo escritor justo después
+        del commit y antes de resolver el Future (p. ej. para avisar a los
+        observadores: quien espera el Future ya ve los avisos emitidos).
+        """
+        futuro: Future = Future()
+        with self._lock:
+            if self._hilo is None or not self._hilo.is_alive():
+                self._hilo = threading.Thread(target=self._bucle, name="escritor-bd", daemon=True)
+                self._hilo.start()
+            self._cola.put(_Escritura(comando, al_confirmar, futuro))
+        return futuro
+
+    def detener(self, timeout: Optional[float] = None) -> None:
+        """Termina el hilo tras confirmar los comandos ya encolados."""
+        with self._lock:
+            hilo = self._hilo
+            if hilo is None:
+                return
+            self._cola.put(None)
+            self._hilo = None
+        hilo.join(timeout)
+
+    # ================
+    # Hilo escritor
+    # ================
+
+    def _recoger_lote(self, primera: _Escritura) -> Tuple[List[_Escritura], bool]:
+        """Añade al lote lo que llegue dentro de la ventana. Devuelve (lote, parar)."""
+        lote = [primera]
+        limite = time.monotonic() + self._ventana_lote_s
+        while len(lote) < self._max_lote:
+            restante = limite - time.monotonic()
+            try:
+                escritura = self._cola.get(timeout=restante) if restante > 0 else self._cola.get_nowait()
+            except queue.Empty:
+                break
+            if escritura is None:
+                return lote, True
+            lote.append(escritura)
+        return lote, False
+
+    def _bucle(self) -> None:
+        try:
+            conn = self._conectar()
+            # Transacciones explícitas: sin BEGIN implícitos del módulo sqlite3
+            conn.isolation_level = None
+            conn.execute(f"PRAGMA busy_timeout = {int(ESPERA_BLOQUEO_MS)};")
+        except Exception as ex:
+            logger.exception("El escritor de BD no pudo abrir la conexión")
+            self._fallar_encolados(ex)
+            return
+        try:
+            parar = False
+            while not parar:
+                primera = self._cola.get()
+                if primera is None:
+                    break
+                lote, parar = self._recoger_lote(primera)
+                try:
+                    self._ejecutar_lote(conn, lote)
+                except Exception as ex:
+                    # Ningún fallo del lote puede parar el hilo ni dejar un Future sin resolver
+                    logger.exception("Error al ejecutar un lote de escrituras")
+                    self._resincronizar(conn)
+                    self._fallar(lote, ex)
+        finally:
+            conn.close()
+
+    def _fallar_encolados(self, ex: BaseException) -> None:
+        """Resuelve con `ex` los comandos que quedan en la cola."""
+        while True:
+            try:
+                escritura = self._cola.get_nowait()
+            except queue.Empty:
+                return
+            if escritura is not None:
+                self._fallar([escritura], ex)
+
+    @staticmethod
+    def _fallar(lote: List[_Escritura], ex: BaseException) -> None:
+        for escritura in lote:
+            futuro = escritura.futuro
+            if futuro.done():
+                continue
+            if futuro.running() or futuro.set_running_or_notify_cancel():
+                futuro.set_exception(ex)
+
+    @staticmethod
+    def _resincronizar(conn: sqlite3.Connection) -> None:
+        """Deja la conexión fuera de transacción tras un fallo a medio lote."""
+        if not conn.in_transaction:
+            return
+        try:
+            conn.execute("ROLLBACK;")
+        except sqlite3.Error:
+            logger.exception("No se pudo deshacer la transacción del escritor de BD")
+
+    def _ejecutar_lote(self, conn: sqlite3.Connection, lote: List[_Escritura]) -> None:
+        activas = [escritura for escritura in lote if escritura.futuro.set_running_or_notify_cancel()]
+        if not activas:
+            return
+        try:
+            conn.execute("BEGIN IMMEDIATE;")
+        except sqlite3.Error as ex:
+            self._fallar(activas, ex)
+            return
+
+        resultados: List[Tuple[_Escritura, Any, Optional[BaseException]]] = []
+        try:
+            for escritura in activas:
+                conn.execute("SAVEPOINT escritura;")
+                try:
+                    resultado = escritura.comando(conn)
+                except Exception as ex:
+                    if not conn.in_transaction:
+                        # SQLite ya deshizo la transacción (disco lleno, E/S,
+                        # interrupción...) o el comando la cerró: cae el lote entero
+                        raise
+                    conn.execute("ROLLBACK TO escritura;")
+                    conn.execute("RELEASE escritura;")
+                    resultados.append((escritura, None, ex))
+                else:
+                    conn.execute("RELEASE escritura;")
+                    resultados.append((escritura, resultado, None))
+            conn.execute("COMMIT;")
+        except Exception as ex:
+            self._resincronizar(conn)
+            self._escrituras += len(activas)
+            self._fallar(activas, ex)
+            return
+        self._lotes += 1
+        self._escrituras += len(resultados)
+
+        for escritura, resultado, error in resultados:
+            if error is not None:
+                escritura.futuro.set_exception(error)
+                continue
+            if escritura.al_confirmar is not None:
+                try:
+                    escritura.al_confirmar(resultado)
+                except Exception:
+                    logger.exception("Error en el aviso posterior a una escritura")
+            escritura.futuro.set_result(resultado)
+
+
+# Escritor compartido por todo el proceso
+ESCRITOR = EscritorBD()
@@ -1,22 +1,101 @@
 import os
 import sqlite3
 import json
+import threading
+import logging
+import time
+from typing import Dict, List, Optional
+from urllib.parse import quote
+
+logger = logging.getLogger(__name__)
 
 # Ruta de la base de datos: data/robot.db
 DB_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "robot.db")
 
+# BD de fábrica de solo lectura (procesos_base, recetas_base, pasos_receta_base):
+# data/robot_factory.db. Se genera con `python -m data.construir_plantilla`
+# (o automáticamente si falta) y se adjunta a cada conexión como 'fabrica'.
+PLANTILLA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "robot_factory.db")
+
+# Versión de las tablas + datos de fábrica, guardada en PRAGMA user_version de
+# la BD de fábrica. Incrementar cada vez que cambien las tablas o los datos de
+# fábrica (la plantilla con otra versión se considera obsoleta y se regenera).
+# La versión del esquema de usuario (robot.db) la llevan data/migraciones.py.
+VERSION_FABRICA = 4
+
+# Bytes de la BD de fábrica que se leen por mmap: al ser inmutable, todos los
+# procesos que la abren comparten las mismas páginas de la caché del sistema.
+MMAP_FABRICA = 64 * 1024 * 1024
+
+TABLAS_FABRICA = ("pasos_receta_base", "recetas_base", "procesos_base")
+
+# Sentencias preparadas que conserva cada conexión. Todas las consultas de
+# servicios tienen forma fija (unas 40 distintas, sin listas IN de tamaño
+# variable), así que caben todas y ninguna se vuelve a compilar.
+CACHE_SENTENCIAS = 64
+
+# Columnas de resumen precalculadas en recetas_base / recetas_usuario.
+# Permiten listar recetas (tiempo estimado, nº de pasos...) sin cargar sus pasos.
+COLUMNAS_RESUMEN = {
+    "num_pasos": "INTEGER NOT NULL DEFAULT 0",
+    "pasos_manuales": "INTEGER NOT NULL DEFAULT 0",
+    "tiempo_automatico_segundos": "INTEGER NOT NULL DEFAULT 0",
+    "temperatura_maxima": "INTEGER NOT NULL DEFAULT 0",
+}
+
+
+def _uri(ruta: str, parametros: str = "") -> str:
+    """URI 'file:' de una ruta local (escapando caracteres como '?' o '#')."""
+    uri = "file:" + quote(os.path.abspath(ruta))
+    return f"{uri}?{parametros}" if parametros else uri
+
 
 def conectar() -> sqlite3.Connection:
-    """Devuelve una conexión a la base de datos SQLite."""
-    return sqlite3.connect(DB_PATH)
+    """
+    Devuelve una conexión a la base de datos SQLite del usuario con la BD de
+    fábrica adjunta como 'fabrica' (solo lectura, immutable=1, con mmap).
+
+    Las tablas *_base solo existen en 'fabrica', así que las consultas sin
+    prefijo de esquema las encuentran allí; leerlas nunca toma bloqueos de
+    escritura sobre robot.db. Las claves foráneas están activadas.
+    """
+    conn = sqlite3.connect(_uri(DB_PATH), uri=True, cached_statements=CACHE_SENTENCIAS)
+    # Los pasos de usuario se borran en cascada con su receta o su proceso
+    conn.execute("PRAGMA foreign_keys = ON;")
+    conn.execute("ATTACH DATABASE ? AS fabrica;", (_uri(PLANTILLA_PATH, "mode=ro&immutable=1"),))
+    conn.execute(f"PRAGMA fabrica.mmap_size = {int(MMAP_FABRICA)};")
+    return conn
+
+
+# Conexión de lectura de cada hilo, con la ruta de BD con la que se abrió
+_lectura_hilo = threading.local()
+
+
+def conexion_lectura() -> sqlite3.Connection:
+    """
+    Devuelve la conexión de lectura del hilo actual, que se reutiliza entre
+    consultas: así conserva su caché de sentencias preparadas y la BD de
+    fábrica ya adjunta y mapeada. No se debe cerrar. Es de solo lectura
+    (query_only): las escrituras van por el escritor de BD (data/escritor.py).
+    """
+    rutas = (DB_PATH, PLANTILLA_PATH)
+    conn = getattr(_lectura_hilo, "conexion", None)
+    if conn is None or _lectura_hilo.rutas != rutas:
+        if conn is not None:
+            conn.close()
+        conn = conectar()
+        conn.execute("PRAGMA query_only = ON;")
+        _lectura_hilo.conexion = conn
+        _lectura_hilo.rutas = rutas
+    return conn
 
 
 # ======================
 # Creación de tablas
 # ======================
 
-def crear_tablas(conn: sqlite3.Connection) -> None:
-    """Crea las tablas necesarias si no existen."""
+def crear_tablas_fabrica(conn: sqlite3.Connection) -> None:
+    """Crea las tablas de fábrica (solo en la BD de fábrica) si no existen."""
     cur = conn.cursor()
 
     # Tabla de procesos de fábrica (SIN parámetros de ejecución)
@@ -30,24 +109,17 @@ def crear_tablas(conn: sqlite3.Connection) -> None:
         );
     """)
 
-    # Tabla de procesos creados por el usuario (SIN parámetros de ejecución)
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS procesos_usuario (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            nombre TEXT NOT NULL,
-            tipo TEXT NOT NULL,
-            tipo_ejecucion TEXT NOT NULL DEFAULT 'automatico',
-            instrucciones TEXT
-        );
-    """)
-
     # Tabla de recetas de fábrica
     cur.execute("""
         CREATE TABLE IF NOT EXISTS recetas_base (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             nombre TEXT NOT NULL,
             descripcion TEXT,
-            ingredientes TEXT
+            ingredientes TEXT,
+            num_pasos INTEGER NOT NULL DEFAULT 0,
+            pasos_manuales INTEGER NOT NULL DEFAULT 0,
+            tiempo_automatico_segundos INTEGER NOT NULL DEFAULT 0,
+            temperatura_maxima INTEGER NOT NULL DEFAULT 0
         );
     """)
 
@@ -62,24 +134,56 @@ def crear_tablas(conn: sqlite3.Connection) -> None:
             tiempo_segundos INTEGER DEFAULT NULL,
             velocidad INTEGER DEFAULT NULL,
             instrucciones TEXT DEFAULT NULL,
+            puede_adelantarse INTEGER NOT NULL DEFAULT 0,
             FOREIGN KEY (id_receta) REFERENCES recetas_base(id),
             FOREIGN KEY (id_proceso) REFERENCES procesos_base(id)
         );
     """)
 
+    # Índice para cargar los pasos de una receta sin recorrer toda la tabla
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS idx_pasos_receta_base_receta
+        ON pasos_receta_base (id_receta, orden);
+    """)
+
+    conn.commit()
+
+
+def crear_tablas_usuario(conn: sqlite3.Connection) -> None:
+    """
+    Crea las tablas de usuario y configuración (en robot.db) si no existen.
+    No hace commit: se ejecuta dentro de la transacción de su migración.
+    """
+    cur = conn.cursor()
+
+    # Tabla de procesos creados por el usuario (SIN parámetros de ejecución)
+    cur.execute("""
+        CREATE TABLE IF NOT EXISTS main.procesos_usuario (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            nombre TEXT NOT NULL,
+            tipo TEXT NOT NULL,
+            tipo_ejecucion TEXT NOT NULL DEFAULT 'automatico',
+            instrucciones TEXT
+        );
+    """)
+
     # Tabla de recetas creadas por el usuario
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS recetas_usuario (
+        CREATE TABLE IF NOT EXISTS main.recetas_usuario (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             nombre TEXT NOT NULL,
             descripcion TEXT,
-            ingredientes TEXT
+            ingredientes TEXT,
+            num_pasos INTEGER NOT NULL DEFAULT 0,
+            pasos_manuales INTEGER NOT NULL DEFAULT 0,
+            tiempo_automatico_segundos INTEGER NOT NULL DEFAULT 0,
+            temperatura_maxima INTEGER NOT NULL DEFAULT 0
         );
     """)
 
     # Pasos de las recetas del usuario (CON parámetros de ejecución)
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS pasos_receta_usuario (
+        CREATE TABLE IF NOT EXISTS main.pasos_receta_usuario (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             id_receta INTEGER NOT NULL,
             id_proceso INTEGER NOT NULL,
@@ -95,7 +199,7 @@ def crear_tablas(conn: sqlite3.Connection) -> None:
 
     # Tabla de configuración / estado del robot
     cur.execute("""
-        CREATE TABLE IF NOT EXISTS configuracion (
+        CREATE TABLE IF NOT EXISTS main.configuracion (
             id INTEGER PRIMARY KEY CHECK (id = 1),
             estado TEXT NOT NULL,
             programa_actual TEXT,
@@ -103,7 +207,102 @@ def crear_tablas(conn: sqlite3.Connection) -> None:
         );
     """)
 
-    conn.commit()
+    # Índice para cargar los pasos de una receta sin recorrer toda la tabla
+    cur.execute("""
+        CREATE INDEX IF NOT EXISTS main.idx_pasos_receta_usuario_receta
+        ON pasos_receta_usuario (id_receta, orden);
+    """)
+
+
+def _asegurar_columnas_resumen(conn: sqlite3.Connection) -> None:
+    """
+    Añade las columnas de resumen a bases de datos de usuario creadas antes
+    de que existieran y las rellena a partir de los pasos ya guardados.
+    (La BD de fábrica se genera siempre con ellas.) No hace commit.
+    """
+    cur = conn.cursor()
+    cur.execute("PRAGMA main.table_info(recetas_usuario);")
+    existentes = {fila[1] for fila in cur.fetchall()}
+    faltantes = [c for c in COLUMNAS_RESUMEN if c not in existentes]
+    for columna in faltantes:
+        cur.execute(f"ALTER TABLE main.recetas_usuario ADD COLUMN {columna} {COLUMNAS_RESUMEN[columna]};")
+    if faltantes:
+        recalcular_resumenes(conn, "usuario")
+
+
+# ==============================
+# Resúmenes de recetas
+# ==============================
+
+def recalcular_resumenes(
+    conn: sqlite3.Connection,
+    origen: str,
+    ids_recetas: Optional[List[int]] = None,
+) -> None:
+    """
+    Recalcula las columnas de resumen de las recetas indicadas (o de todas)
+    a partir de sus pasos. No hace commit: se ejecuta dentro de la misma
+    transacción que modificó los pasos.
+
+    - num_pasos: número total de pasos
+    - pasos_manuales: pasos cuyo proceso es manual
+    - tiempo_automatico_segundos: suma del tiempo de los pasos automáticos
+    - temperatura_maxima: mayor temperatura de los pasos automáticos
+    """
+    cur = conn.cursor()
+    tabla_recetas = f"recetas_{origen}"
+
+    if origen == "usuario":
+        # Los procesos de usuario se guardan en los pasos con un offset de 10000
+        consulta_pasos = """
+            SELECT p.id_receta,
+                   COALESCE(pr_user.tipo_ejecucion, pr_base.tipo_ejecucion),
+                   p.temperatura,
+                   p.tiempo_segundos
+            FROM pasos_receta_usuario AS p
+            LEFT JOIN procesos_usuario AS pr_user
+                ON p.id_proceso >= 10000 AND pr_user.id = (p.id_proceso - 10000)
+            LEFT JOIN procesos_base AS pr_base
+                ON p.id_proceso < 10000 AND pr_base.id = p.id_proceso
+        """
+    else:
+        consulta_pasos = """
+            SELECT p.id_receta, pr.tipo_ejecucion, p.temperatura, p.tiempo_segundos
+            FROM pasos_receta_base AS p
+            JOIN procesos_base AS pr ON pr.id = p.id_proceso
+        """
+
+    if ids_recetas is None:
+        cur.execute(f"SELECT id FROM {tabla_recetas};")
+        ids_recetas = [fila[0] for fila in cur.fetchall()]
+        cur.execute(consulta_pasos + ";")
+    else:
+        # Ids como array JSON: misma sentencia para cualquier número de recetas
+        ids_recetas = list(ids_recetas)
+        cur.execute(
+            consulta_pasos + " WHERE p.id_receta IN (SELECT value FROM json_each(?));",
+            (json.dumps(ids_recetas),),
+        )
+
+    resumenes: Dict[int, List[int]] = {id_: [0, 0, 0, 0] for id_ in ids_recetas}
+    for id_receta, tipo_ejecucion, temperatura, tiempo in cur.fetchall():
+        resumen = resumenes.setdefault(id_receta, [0, 0, 0, 0])
+        resumen[0] += 1
+        if tipo_ejecucion == "manual":
+            resumen[1] += 1
+        else:
+            resumen[2] += tiempo or 0
+            resumen[3] = max(resumen[3], temperatura or 0)
+
+    cur.executemany(
+        f"""
+        UPDATE {tabla_recetas}
+        SET num_pasos = ?, pasos_manuales = ?,
+            tiempo_automatico_segundos = ?, temperatura_maxima = ?
+        WHERE id = ?;
+        """,
+        [(*valores, id_) for id_, valores in resumenes.items()],
+    )
 
 
 # ========================================
@@ -255,7 +454,7 @@ def insertar_datos_base(conn: sqlite3.Connection) -> None:
                 {"nombre": "Sal", "cantidad": 1, "unidad": "cucharadita", "nota": "al gusto"},
             ],
             "pasos": [
-                # (orden, nombre_proceso, temp, tiempo_seg, vel, instrucciones)
+                # (orden, nombre_proceso, temp, tiempo_seg, vel, instrucciones[, puede_adelantarse])
                 (1, "Añadir verduras preparadas", None, None, None, "Añadir las patatas troceadas al vaso"),
                 (2, "Añadir ingredientes líquidos", None, None, None, "Añadir el agua hasta cubrir las patatas"),
                 (3, "Hervir", 100, 600, 1, None),
@@ -340,7 +539,8 @@ def insertar_datos_base(conn: sqlite3.Connection) -> None:
                 (1, "Añadir aromáticos", None, None, None, "Añadir albahaca y ajo"),
                 (2, "Añadir ingredientes secos", None, None, None, "Incorporar piñones y parmesano"),
                 (3, "Triturar grueso", 0, 25, 6, None),
-                (4, "Añadir ingredientes líquidos", None, None, None, "Añadir el aceite de oliva"),
+                # El aceite puede ir entrando por el bocal mientras tritura
+                (4, "Añadir ingredientes líquidos", None, None, None, "Añadir el aceite de oliva", True),
                 (5, "Emulsionar", 0, 40, 4, None),
                 (6, "Verificar textura", None, None, None, "El pesto debe ser cremoso pero con textura"),
             ],
@@ -434,7 +634,8 @@ def insertar_datos_base(conn: sqlite3.Connection) -> None:
 
         # Insertar pasos de la receta CON parámetros
         for paso_tupla in receta_def["pasos"]:
-            orden, nombre_proceso, temp, tiempo, vel, instr = paso_tupla
+            orden, nombre_proceso, temp, tiempo, vel, instr = paso_tupla[:6]
+            adelantable = len(paso_tupla) > 6 and paso_tupla[6]
             id_proceso = procesos_por_nombre.get(nombre_proceso)
             if id_proceso is None:
                 raise ValueError(f"Proceso de fábrica '{nombre_proceso}' no encontrado al crear recetas base.")
@@ -442,12 +643,14 @@ def insertar_datos_base(conn: sqlite3.Connection) -> None:
             cur.execute(
                 """
                 INSERT INTO pasos_receta_base 
-                    (id_receta, id_proceso, orden, temperatura, tiempo_segundos, velocidad, instrucciones)
-                VALUES (?, ?, ?, ?, ?, ?, ?);
+                    (id_receta, id_proceso, orden, temperatura, tiempo_segundos, velocidad,
+                     instrucciones, puede_adelantarse)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?);
                 """,
-                (id_receta, id_proceso, orden, temp, tiempo, vel, instr),
+                (id_receta, id_proceso, orden, temp, tiempo, vel, instr, int(adelantable)),
             )
 
+    recalcular_resumenes(conn, "base")
     conn.commit()
 
 
@@ -457,7 +660,7 @@ def insertar_datos_base(conn: sqlite3.Connection) -> None:
 
 def inicializar_configuracion(conn: sqlite3.Connection) -> None:
     """
-    Asegura que existe la fila de configuración con id=1.
+    Asegura que existe la fila de configuración con id=1. No hace commit.
     """
     cur = conn.cursor()
     cur.execute("SELECT COUNT(*) FROM configuracion WHERE id = 1;")
@@ -469,17 +672,16 @@ def inicializar_configuracion(conn: sqlite3.Connection) -> None:
             VALUES (1, 'apagado', NULL, 0.0);
             """
         )
-        conn.commit()
 
 
 # =====================
 # Reinicio de fábrica
 # =====================
 
-def reinicio_fabrica(conn: sqlite3.Connection) -> None:
+def _reinicio_fabrica_sin_commit(conn: sqlite3.Connection) -> None:
     """
-    Elimina los datos creados por el usuario y resetea la configuración,
-    pero mantiene intactas las recetas y procesos de fábrica.
+    Cuerpo de reinicio_fabrica() sin commit, para ejecutarlo como un comando
+    del escritor de BD (data/escritor.py), que hace el commit del lote.
     """
     cur = conn.cursor()
 
@@ -489,10 +691,21 @@ def reinicio_fabrica(conn: sqlite3.Connection) -> None:
     cur.execute("DELETE FROM recetas_usuario;")
     # Borrar procesos de usuario
     cur.execute("DELETE FROM procesos_usuario;")
+    # Borrar el historial de cocciones y sus totales diarios
+    cur.execute("DELETE FROM historial_cocciones;")
+    cur.execute("DELETE FROM historial_diario;")
 
     # Resetear configuración
     cur.execute("UPDATE configuracion SET estado='apagado', programa_actual=NULL, progreso=0.0 WHERE id=1;")
 
+
+def reinicio_fabrica(conn: sqlite3.Connection) -> None:
+    """
+    Elimina los datos creados por el usuario y resetea la configuración,
+    pero mantiene intactas las recetas y procesos de fábrica (que viven en
+    la BD de fábrica, de solo lectura, y no se tocan). Hace commit.
+    """
+    _reinicio_fabrica_sin_commit(conn)
     conn.commit()
 
 
@@ -500,21 +713,118 @@ def reinicio_fabrica(conn: sqlite3.Connection) -> None:
 # Inicialización global de la BD
 # ===============================
 
-def inicializar_bd() -> None:
+def leer_version_esquema(conn: sqlite3.Connection) -> int:
+    """Devuelve la versión de esquema guardada en la BD (0 si es nueva)."""
+    return conn.execute("PRAGMA user_version;").fetchone()[0]
+
+
+def _sellar_version(conn: sqlite3.Connection, version: int) -> None:
+    # PRAGMA no admite parámetros; la versión es un entero propio
+    conn.execute(f"PRAGMA user_version = {int(version)};")
+    conn.commit()
+
+
+# ==============================
+# BD de fábrica (solo lectura)
+# ==============================
+
+def construir_plantilla(ruta: Optional[str] = None) -> str:
     """
-    Crea el directorio (si es necesario), la base de datos, las tablas
-    y los datos de fábrica. Es segura de llamar múltiples veces.
+    Genera la BD de fábrica: un fichero compacto (VACUUM) con las tablas
+    *_base, sus índices y el catálogo de fábrica. Se escribe en un fichero
+    temporal y se renombra al final, así nunca queda a medias (y las
+    conexiones que ya la tenían abierta con immutable=1 conservan la anterior).
     """
+    ruta = ruta or PLANTILLA_PATH
+    inicio = time.perf_counter()
+    temporal = f"{ruta}.tmp"
+    if os.path.exists(temporal):
+        os.remove(temporal)
+
+    conn = sqlite3.connect(temporal)
+    try:
+        crear_tablas_fabrica(conn)
+        insertar_datos_base(conn)
+        _sellar_version(conn, VERSION_FABRICA)
+        conn.execute("VACUUM;")
+    finally:
+        conn.close()
+    os.replace(temporal, ruta)
+
+    logger.info(
+        "BD de fábrica v%d generada en %s (%.1f ms)",
+        VERSION_FABRICA, ruta, (time.perf_counter() - inicio) * 1000,
+    )
+    return ruta
+
+
+def _plantilla_vigente(ruta: str) -> bool:
+    """Indica si la BD de fábrica existe y tiene la versión de fábrica actual."""
+    if not os.path.exists(ruta):
+        return False
+    conn = sqlite3.connect(_uri(ruta, "mode=ro"), uri=True)
+    try:
+        return leer_version_esquema(conn) == VERSION_FABRICA
+    except sqlite3.Error:
+        return False
+    finally:
+        conn.close()
+
+
+def asegurar_plantilla(ruta: Optional[str] = None) -> str:
+    """Devuelve la ruta de una BD de fábrica vigente, generándola si falta o está obsoleta."""
+    ruta = ruta or PLANTILLA_PATH
+    if not _plantilla_vigente(ruta):
+        construir_plantilla(ruta)
+    return ruta
+
+
+def _separar_tablas_fabrica(conn: sqlite3.Connection) -> None:
+    """
+    Bases de datos anteriores guardaban las tablas *_base en robot.db. Ahora
+    viven en la BD de fábrica adjunta, así que se eliminan de 'main' (los ids
+    son los mismos porque ambas se generan con insertar_datos_base). No hace commit.
+    """
+    for tabla in TABLAS_FABRICA:
+        conn.execute(f"DROP TABLE IF EXISTS main.{tabla};")
+
+
+def inicializar_bd(en_linea: bool = True) -> None:
+    """
+    Crea el directorio (si es necesario), la BD de fábrica y la base de datos
+    del usuario, y aplica las migraciones pendientes (data/migraciones.py).
+    Es segura de llamar múltiples veces.
+
+    Camino rápido: si PRAGMA user_version ya coincide con la última migración,
+    la BD está al día y basta con leer esa versión.
+    """
+    from . import migraciones
+
+    inicio = time.perf_counter()
     os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
+    asegurar_plantilla()
     conn = conectar()
     try:
-        crear_tablas(conn)
-        insertar_datos_base(conn)
-        inicializar_configuracion(conn)
+        version = leer_version_esquema(conn)
+        if version == migraciones.VERSION_ACTUAL:
+            logger.info(
+                "BD al día (esquema v%d), verificada en %.1f ms",
+                version, (time.perf_counter() - inicio) * 1000,
+            )
+            return
+
+        # BD nueva o anterior: migrar el esquema de usuario. El catálogo de
+        # fábrica no se inserta: está en la BD adjunta.
+        version_final = migraciones.migrar(conn, en_linea=en_linea)
+
+        logger.info(
+            "BD migrada de v%d a v%d en %.1f ms",
+            version, version_final, (time.perf_counter() - inicio) * 1000,
+        )
     finally:
         conn.close()
 
 
 if __name__ == "__main__":
     inicializar_bd()
-    print(f"Base de datos inicializada en: {DB_PATH}")
\ No newline at end of file
+    print(f"Base de datos inicializada en: {DB_PATH}")
@@ -0,0 +1,295 @@
+"""
+Migraciones del esquema de usuario (data/robot.db).
+
+La versión del esquema se guarda en PRAGMA user_version. Cada migración
+lleva el número de versión al que deja la BD y se aplica, en orden, solo si
+la BD está por debajo de ese número:
+
+- cada migración se ejecuta en su propia transacción (BEGIN IMMEDIATE) y
+  sella su versión dentro de ella: si falla, la BD queda en la versión
+  anterior y el siguiente arranque la reintenta;
+- se registra en el log cuánto ha tardado cada una;
+- en modo en línea la BD pasa a WAL antes de migrar, de modo que los lectores
+  (otras sesiones u otros procesos) siguen leyendo la versión confirmada
+  mientras se construye un índice nuevo y solo los escritores esperan.
+
+Para añadir un cambio de esquema basta con añadir una Migracion al final de
+MIGRACIONES con la siguiente versión. Las migraciones deben ser idempotentes
+(IF NOT EXISTS, comprobar columnas...) porque las BD anteriores a este
+mecanismo tienen user_version = 0 aunque ya tengan parte del esquema.
+"""
+
+import logging
+import sqlite3
+import time
+from typing import Callable, List, NamedTuple
+
+from . import init_db
+
+logger = logging.getLogger(__name__)
+
+# Milisegundos que espera un escritor si otro proceso está migrando a la vez
+ESPERA_BLOQUEO_MS = 5000
+
+
+class Migracion(NamedTuple):
+    """Cambio de esquema que deja la BD en `version`."""
+    version: int
+    descripcion: str
+    aplicar: Callable[[sqlite3.Connection], None]
+
+
+# ======================
+# Migraciones
+# ======================
+
+def _esquema_usuario(conn: sqlite3.Connection) -> None:
+    init_db.crear_tablas_usuario(conn)
+    init_db.inicializar_configuracion(conn)
+
+
+def _indice_pasos_por_proceso(conn: sqlite3.Connection) -> None:
+    # Al eliminar un proceso de usuario se buscan los pasos que lo usan
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS main.idx_pasos_receta_usuario_proceso
+        ON pasos_receta_usuario (id_proceso);
+    """)
+
+
+def _pasos_en_cascada(conn: sqlite3.Connection) -> None:
+    # SQLite no permite cambiar las claves foráneas de una tabla: se reconstruye.
+    # Los pasos guardan los procesos de usuario con un offset de 10000, así que
+    # la clave foránea va en una columna aparte, id_proceso_usuario (sin offset,
+    # NULL en los pasos con proceso de fábrica).
+    conn.execute("""
+        CREATE TABLE main.pasos_receta_usuario_nueva (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            id_receta INTEGER NOT NULL,
+            id_proceso INTEGER NOT NULL,
+            id_proceso_usuario INTEGER DEFAULT NULL,
+            orden INTEGER NOT NULL,
+            temperatura INTEGER DEFAULT NULL,
+            tiempo_segundos INTEGER DEFAULT NULL,
+            velocidad INTEGER DEFAULT NULL,
+            instrucciones TEXT DEFAULT NULL,
+            FOREIGN KEY (id_receta) REFERENCES recetas_usuario(id) ON DELETE CASCADE,
+            FOREIGN KEY (id_proceso_usuario) REFERENCES procesos_usuario(id) ON DELETE CASCADE
+        );
+    """)
+    # Se descartan los pasos huérfanos (receta o proceso de usuario ya borrados)
+    conn.execute("""
+        INSERT INTO main.pasos_receta_usuario_nueva
+            (id, id_receta, id_proceso, id_proceso_usuario, orden,
+             temperatura, tiempo_segundos, velocidad, instrucciones)
+        SELECT p.id, p.id_receta, p.id_proceso,
+               CASE WHEN p.id_proceso >= 10000 THEN p.id_proceso - 10000 END,
+               p.orden, p.temperatura, p.tiempo_segundos, p.velocidad, p.instrucciones
+        FROM main.pasos_receta_usuario AS p
+        WHERE p.id_receta IN (SELECT id FROM main.recetas_usuario)
+          AND (p.id_proceso < 10000
+               OR p.id_proceso - 10000 IN (SELECT id FROM main.procesos_usuario));
+    """)
+    conn.execute("DROP TABLE main.pasos_receta_usuario;")
+    conn.execute("ALTER TABLE main.pasos_receta_usuario_nueva RENAME TO pasos_receta_usuario;")
+    conn.execute("""
+        CREATE INDEX main.idx_pasos_receta_usuario_receta
+        ON pasos_receta_usuario (id_receta, orden);
+    """)
+    # Índice de la clave hija: el borrado en cascada de un proceso no recorre la tabla
+    conn.execute("""
+        CREATE INDEX main.idx_pasos_receta_usuario_proceso
+        ON pasos_receta_usuario (id_proceso_usuario);
+    """)
+    # Las recetas que tenían pasos huérfanos cambian de resumen
+    init_db.recalcular_resumenes(conn, "usuario")
+
+
+def _pasos_adelantables(conn: sqlite3.Connection) -> None:
+    # Pasos manuales que pueden confirmarse mientras sigue el automático anterior
+    columnas = {fila[1] for fila in conn.execute("PRAGMA main.table_info(pasos_receta_usuario);")}
+    if "puede_adelantarse" not in columnas:
+        conn.execute("""
+            ALTER TABLE main.pasos_receta_usuario
+            ADD COLUMN puede_adelantarse INTEGER NOT NULL DEFAULT 0;
+        """)
+
+
+def _historial_cocciones(conn: sqlite3.Connection) -> None:
+    # Una fila por cocción terminada (completada, cancelada o con error).
+    # Instantes en segundos Unix; `dia` es la fecha local del inicio.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS main.historial_cocciones (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            robot TEXT NOT NULL,
+            id_receta INTEGER,
+            origen_receta TEXT,
+            nombre_receta TEXT NOT NULL,
+            resultado TEXT NOT NULL,
+            dia TEXT NOT NULL,
+            inicio REAL NOT NULL,
+            fin REAL NOT NULL,
+            pausas INTEGER NOT NULL DEFAULT 0,
+            pausa_s REAL NOT NULL DEFAULT 0,
+            espera_manual_s REAL NOT NULL DEFAULT 0,
+            num_pasos INTEGER NOT NULL,
+            pasos_completados INTEGER NOT NULL,
+            duraciones_pasos TEXT NOT NULL
+        );
+    """)
+    # Una cocción se identifica por robot e inicio: se puede volver a importar
+    # del diario de ejecución sin duplicarla
+    conn.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS main.idx_historial_cocciones_robot_inicio
+        ON historial_cocciones (robot, inicio);
+    """)
+    # Consultas por intervalo de tiempo, de todas las recetas o de una
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS main.idx_historial_cocciones_inicio
+        ON historial_cocciones (inicio);
+    """)
+    conn.execute("""
+        CREATE INDEX IF NOT EXISTS main.idx_historial_cocciones_receta
+        ON historial_cocciones (origen_receta, id_receta, inicio);
+    """)
+
+    # Totales por día y receta, mantenidos por un trigger en la misma
+    # transacción que cada alta: los paneles de meses leen unas filas por día.
+    # id_receta es 0 en las recetas sin guardar.
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS main.historial_diario (
+            dia TEXT NOT NULL,
+            origen_receta TEXT NOT NULL,
+            id_receta INTEGER NOT NULL,
+            nombre_receta TEXT NOT NULL,
+            cocciones INTEGER NOT NULL DEFAULT 0,
+            completadas INTEGER NOT NULL DEFAULT 0,
+            canceladas INTEGER NOT NULL DEFAULT 0,
+            errores INTEGER NOT NULL DEFAULT 0,
+            duracion_s REAL NOT NULL DEFAULT 0,
+            pausas INTEGER NOT NULL DEFAULT 0,
+            pausa_s REAL NOT NULL DEFAULT 0,
+            espera_manual_s REAL NOT NULL DEFAULT 0,
+            PRIMARY KEY (dia, origen_receta, id_receta)
+        ) WITHOUT ROWID;
+    """)
+    conn.execute("""
+        CREATE TRIGGER IF NOT EXISTS main.trg_historial_diario
+        AFTER INSERT ON historial_cocciones
+        BEGIN
+            INSERT INTO historial_diario
+                (dia, origen_receta, id_receta, nombre_receta, cocciones, completadas,
+                 canceladas, errores, duracion_s, pausas, pausa_s, espera_manual_s)
+            VALUES (
+                NEW.dia, COALESCE(NEW.origen_receta, ''), COALESCE(NEW.id_receta, 0),
+                NEW.nombre_receta, 1,
+                NEW.resultado = 'COMPLETADA', NEW.resultado = 'CANCELADA', NEW.resultado = 'ERROR',
+                NEW.fin - NEW.inicio, NEW.pausas, NEW.pausa_s, NEW.espera_manual_s
+            )
+            ON CONFLICT (dia, origen_receta, id_receta) DO UPDATE SET
+                nombre_receta = excluded.nombre_receta,
+                cocciones = cocciones + 1,
+                completadas = completadas + excluded.completadas,
+                canceladas = canceladas + excluded.canceladas,
+                errores = errores + excluded.errores,
+                duracion_s = duracion_s + excluded.duracion_s,
+                pausas = pausas + excluded.pausas,
+                pausa_s = pausa_s + excluded.pausa_s,
+                espera_manual_s = espera_manual_s + excluded.espera_manual_s;
+        END;
+    """)
+
+
+MIGRACIONES: List[Migracion] = [
+    Migracion(1, "tablas de usuario y configuración", _esquema_usuario),
+    Migracion(2, "columnas de resumen en recetas_usuario", init_db._asegurar_columnas_resumen),
+    Migracion(3, "tablas *_base trasladadas a la BD de fábrica", init_db._separar_tablas_fabrica),
+    Migracion(4, "índice de pasos de usuario por proceso", _indice_pasos_por_proceso),
+    Migracion(5, "pasos de usuario con borrado en cascada", _pasos_en_cascada),
+    Migracion(6, "pasos manuales que pueden adelantarse", _pasos_adelantables),
+    Migracion(7, "historial de cocciones y totales diarios", _historial_cocciones),
+]
+
+# Versión a la que quedan las BD tras aplicar todas las migraciones
+VERSION_ACTUAL = MIGRACIONES[-1].version
+
+
+# ======================
+# Ejecución
+# ======================
+
+def pendientes(version: int) -> List[Migracion]:
+    """Migraciones que faltan por aplicar a una BD en `version`, en orden."""
+    return [m for m in MIGRACIONES if m.version > version]
+
+
+def _activar_modo_en_linea(conn: sqlite3.Connection) -> None:
+    # WAL: los lectores no se bloquean mientras una migración escribe.
+    # (No se puede cambiar dentro de una transacción.)
+    modo = conn.execute("PRAGMA main.journal_mode = WAL;").fetchone()[0]
+    if modo.lower() != "wal":
+        logger.warning("No se pudo activar WAL (journal_mode=%s); se migra igualmente", modo)
+    conn.execute(f"PRAGMA busy_timeout = {int(ESPERA_BLOQUEO_MS)};")
+
+
+def _aplicar_una(conn: sqlite3.Connection, migracion: Migracion, en_linea: bool) -> None:
+    inicio = time.perf_counter()
+    conn.execute("BEGIN IMMEDIATE;")
+    try:
+        # Otro proceso puede haberla aplicado mientras esperábamos el bloqueo
+        if init_db.leer_version_esquema(conn) >= migracion.version:
+            conn.execute("ROLLBACK;")
+            return
+        migracion.aplicar(conn)
+        # PRAGMA no admite parámetros; la versión es un entero propio
+        conn.execute(f"PRAGMA main.user_version = {int(migracion.version)};")
+        conn.execute("COMMIT;")
+    except Exception:
+        conn.execute("ROLLBACK;")
+        logger.exception("Falló la migración v%d (%s)", migracion.version, migracion.descripcion)
+        raise
+
+    if en_linea:
+        # Pasar lo escrito al fichero principal sin esperar a ningún lector
+        conn.execute("PRAGMA main.wal_checkpoint(PASSIVE);")
+
+    logger.info(
+        "Migración v%d aplicada (%s) en %.1f ms",
+        migracion.version, migracion.descripcion, (time.perf_counter() - inicio) * 1000,
+    )
+
+
+def migrar(conn: sqlite3.Connection, en_linea: bool = True) -> int:
+    """
+    Aplica en orden las migraciones pendientes y devuelve la versión final.
+
+    en_linea=True activa WAL antes de empezar para no bloquear a los lectores
+    durante migraciones largas (p. ej. construir un índice). Con False se
+    conserva el modo de diario actual de la BD.
+    """
+    version = init_db.leer_version_esquema(conn)
+    faltan = pendientes(version)
+    if not faltan:
+        return version
+
+    if en_linea:
+        _activar_modo_en_linea(conn)
+
+    # Las transacciones se controlan a mano: sin BEGIN implícitos del módulo sqlite3.
+    # Las claves foráneas se desactivan mientras se reconstruyen tablas (solo
+    # puede hacerse fuera de una transacción) y se comprueban al terminar.
+    nivel_aislamiento = conn.isolation_level
+    claves_foraneas = conn.execute("PRAGMA foreign_keys;").fetchone()[0]
+    conn.isolation_level = None
+    conn.execute("PRAGMA foreign_keys = OFF;")
+    try:
+        for migracion in faltan:
+            _aplicar_una(conn, migracion, en_linea)
+    finally:
+        conn.execute(f"PRAGMA foreign_keys = {'ON' if claves_foraneas else 'OFF'};")
+        conn.isolation_level = nivel_aislamiento
+
+    violaciones = conn.execute("PRAGMA main.foreign_key_check;").fetchall()
+    if violaciones:
+        logger.warning("Tras migrar quedan %d filas con claves foráneas rotas", len(violaciones))
+
+    return init_db.leer_version_esquema(conn)
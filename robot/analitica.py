@@ -0,0 +1,199 @@
+"""
+Análisis por columnas de los pasos de las recetas (NumPy).
+
+Para estudiar los parámetros de los pasos de todo el catálogo (temperatura,
+tiempo, velocidad por proceso) no se construye un PasoReceta por paso: los
+pasos se leen del cursor directamente a arrays de NumPy, uno por columna
+(ColumnasPasos), y los cálculos por receta se hacen vectorizados.
+
+Los pasos llegan ordenados por (id_receta, orden), así que los de cada receta
+son un tramo contiguo de los arrays y las agregaciones por receta son un
+único ufunc.reduceat sobre los inicios de cada tramo.
+
+NumPy es una dependencia opcional: solo hace falta para usar este módulo
+(pip install numpy).
+"""
+
+import sqlite3
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dependencia opcional
+    np = None
+
+from .modelos import RobotCocina
+
+
+# Filas que se convierten a arrays en cada bloque leído del cursor
+FILAS_POR_BLOQUE = 65536
+
+# Modelo de consumo eléctrico (aproximado) para las estimaciones de energía
+TEMPERATURA_AMBIENTE = 20       # °C
+POTENCIA_CALENTADOR_W = 1000    # a TEMP_MAX
+POTENCIA_MOTOR_W = 500          # a VEL_MAX
+
+# Valores de la columna `manual`
+AUTOMATICO = 0
+MANUAL = 1
+
+
+def _requerir_numpy() -> None:
+    if np is None:
+        raise ImportError("robot.analitica necesita NumPy: pip install numpy")
+
+
+class ColumnasPasos(NamedTuple):
+    """
+    Pasos de recetas en columnas, ordenados por (id_receta, orden).
+
+    - id_proceso: tal como se guarda en el paso (los procesos de usuario con
+      offset de 10000, así que es único entre fábrica y usuario)
+    - manual: 1 si el proceso es manual, 0 si es automático
+    - temperatura, tiempo_segundos, velocidad: 0 si el paso no los tiene
+    - adelantable: 1 si el paso está marcado con puede_adelantarse
+    """
+    id_receta: "np.ndarray"
+    orden: "np.ndarray"
+    id_proceso: "np.ndarray"
+    manual: "np.ndarray"
+    temperatura: "np.ndarray"
+    tiempo_segundos: "np.ndarray"
+    velocidad: "np.ndarray"
+    adelantable: "np.ndarray"
+
+    @property
+    def num_pasos(self) -> int:
+        return len(self.id_receta)
+
+
+class PorReceta(NamedTuple):
+    """Un valor por receta con pasos: ids[i] es la receta de valores[i]."""
+    ids: "np.ndarray"
+    valores: "np.ndarray"
+
+
+def _tipos_columnas():
+    return [
+        ("id_receta", np.int64),
+        ("orden", np.int32),
+        ("id_proceso", np.int64),
+        ("manual", np.int8),
+        ("temperatura", np.int32),
+        ("tiempo_segundos", np.int32),
+        ("velocidad", np.int32),
+        ("adelantable", np.int8),
+    ]
+
+
+def columnas_desde_cursor(cur: sqlite3.Cursor) -> ColumnasPasos:
+    """
+    Convierte un cursor ya ejecutado, con las columnas de ColumnasPasos (sin
+    NULL) y ordenado por (id_receta, orden), en arrays. Se lee por bloques de
+    FILAS_POR_BLOQUE filas, así que nunca hay más de un bloque de tuplas en memoria.
+    """
+    _requerir_numpy()
+    tipo = np.dtype(_tipos_columnas())
+    bloques = []
+    while True:
+        filas = cur.fetchmany(FILAS_POR_BLOQUE)
+        if not filas:
+            break
+        bloques.append(np.array(filas, dtype=tipo))
+    datos = np.concatenate(bloques) if bloques else np.empty(0, dtype=tipo)
+    # Cada campo a su propio array contiguo
+    return ColumnasPasos(*(np.ascontiguousarray(datos[nombre]) for nombre in tipo.names))
+
+
+def columnas_de_recetas(recetas) -> ColumnasPasos:
+    """
+    Pasos de una lista de objetos Receta (p. ej. un menú ya cargado) en
+    columnas, en el orden de la lista. id_proceso lleva el offset de 10000
+    en los procesos de usuario, como en la BD.
+    """
+    _requerir_numpy()
+    filas = [
+        (
+            receta.id,
+            paso.orden,
+            paso.proceso.id + 10000 if paso.proceso.origen == "usuario" else paso.proceso.id,
+            MANUAL if paso.proceso.es_manual() else AUTOMATICO,
+            paso.temperatura or 0,
+            paso.tiempo_segundos or 0,
+            paso.velocidad or 0,
+            1 if paso.puede_adelantarse else 0,
+        )
+        for receta in recetas
+        for paso in receta.pasos
+    ]
+    tipo = np.dtype(_tipos_columnas())
+    datos = np.array(filas, dtype=tipo) if filas else np.empty(0, dtype=tipo)
+    return ColumnasPasos(*(np.ascontiguousarray(datos[nombre]) for nombre in tipo.names))
+
+
+# ==============================
+# Agregaciones por receta
+# ==============================
+
+def _inicios_recetas(id_receta: "np.ndarray") -> "np.ndarray":
+    """Posición del primer paso de cada receta (los pasos están agrupados por receta)."""
+    if len(id_receta) == 0:
+        return np.empty(0, dtype=np.intp)
+    return np.concatenate(([0], np.flatnonzero(np.diff(id_receta)) + 1))
+
+
+def por_receta(columnas: ColumnasPasos, valores: "np.ndarray", ufunc=None) -> PorReceta:
+    """
+    Reduce `valores` (un valor por paso) a un valor por receta con `ufunc`
+    (np.add por defecto; p. ej. np.maximum para máximos).
+    """
+    _requerir_numpy()
+    ufunc = np.add if ufunc is None else ufunc
+    inicios = _inicios_recetas(columnas.id_receta)
+    if len(inicios) == 0:
+        return PorReceta(np.empty(0, dtype=np.int64), np.empty(0, dtype=valores.dtype))
+    return PorReceta(columnas.id_receta[inicios], ufunc.reduceat(valores, inicios))
+
+
+def tiempo_automatico_por_receta(columnas: ColumnasPasos) -> PorReceta:
+    """Segundos de los pasos automáticos de cada receta (los manuales no tienen tiempo fijo)."""
+    automatico = columnas.manual == AUTOMATICO
+    return por_receta(columnas, np.where(automatico, columnas.tiempo_segundos, 0).astype(np.int64))
+
+
+def temperatura_maxima_por_receta(columnas: ColumnasPasos) -> PorReceta:
+    """Mayor temperatura de los pasos automáticos de cada receta."""
+    automatico = columnas.manual == AUTOMATICO
+    return por_receta(columnas, np.where(automatico, columnas.temperatura, 0), np.maximum)
+
+
+def potencia_calentador_por_paso(columnas: ColumnasPasos) -> "np.ndarray":
+    """
+    Potencia media estimada del calentador (W) en cada paso, proporcional a la
+    temperatura sobre la ambiente. Los pasos manuales no consumen.
+    """
+    _requerir_numpy()
+    rango = RobotCocina.TEMP_MAX - TEMPERATURA_AMBIENTE
+    carga = np.clip((columnas.temperatura - TEMPERATURA_AMBIENTE) / rango, 0.0, 1.0)
+    return np.where(columnas.manual == AUTOMATICO, POTENCIA_CALENTADOR_W * carga, 0.0)
+
+
+def potencia_motor_por_paso(columnas: ColumnasPasos) -> "np.ndarray":
+    """
+    Potencia media estimada del motor (W) en cada paso, proporcional a la
+    velocidad. Los pasos manuales no consumen.
+    """
+    _requerir_numpy()
+    carga = np.clip(columnas.velocidad / RobotCocina.VEL_MAX, 0.0, 1.0)
+    return np.where(columnas.manual == AUTOMATICO, POTENCIA_MOTOR_W * carga, 0.0)
+
+
+def potencia_por_paso(columnas: ColumnasPasos) -> "np.ndarray":
+    """Potencia media estimada (W) de cada paso: calentador + motor."""
+    return potencia_calentador_por_paso(columnas) + potencia_motor_por_paso(columnas)
+
+
+def energia_por_receta(columnas: ColumnasPasos) -> PorReceta:
+    """Energía estimada (Wh) de cada receta."""
+    energia_wh = potencia_por_paso(columnas) * columnas.tiempo_segundos / 3600.0
+    return por_receta(columnas, energia_wh)
@@ -0,0 +1,287 @@
+"""
+Cola de atención del operador: pasos manuales pendientes de todos los robots.
+
+Cada paso manual detiene a su robot en ESPERANDO_CONFIRMACION hasta que
+alguien llama a confirmar_paso_manual. Con varios robots, el tiempo que
+pasan parados esperando a una persona es la mayor pérdida de producción, así
+que ColaAtencion observa los eventos de todos los robots registrados y
+mantiene:
+
+- la lista de confirmaciones pendientes, ordenada por prioridad: cuánto
+  lleva parado el robot más PESO_DESBLOQUEO por los segundos de pasos
+  automáticos que el robot hará solo en cuanto se confirme (atender antes al
+  que luego queda ocupado más tiempo deja al operador libre para los demás);
+- los pasos manuales ya anunciados (AVISO_MANUAL), con la hora a la que
+  llegarán, para que el operador los prepare y confirme en cuanto lleguen
+  (o los confirme ya, si el robot permite adelantarlos: ADELANTO);
+- métricas de espera por robot: confirmaciones, tiempo total parado
+  (incluida la espera en curso) y espera máxima.
+
+Los eventos llegan con el lock del robot tomado: aquí solo se actualiza el
+estado bajo el lock propio de la cola. La página del operador lee la cola
+desde su ui.timer.
+"""
+
+import threading
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .modelos import EventoRobot, PasoReceta, Receta, RobotCocina, TipoEvento
+
+# Segundos de prioridad que suma cada segundo automático desbloqueado
+PESO_DESBLOQUEO = 0.5
+
+
+class Pendiente(NamedTuple):
+    """Paso manual que espera confirmación en un robot."""
+    robot: RobotCocina
+    nombre_robot: str
+    receta: Receta
+    indice_paso: int
+    paso: Optional[PasoReceta]
+    desde: float
+    desbloquea_s: int
+
+    def esperando_s(self, ahora: Optional[float] = None) -> float:
+        """Segundos que lleva el robot parado."""
+        return (time.time() if ahora is None else ahora) - self.desde
+
+    def prioridad(self, ahora: Optional[float] = None) -> float:
+        return self.esperando_s(ahora) + PESO_DESBLOQUEO * self.desbloquea_s
+
+
+class Aviso(NamedTuple):
+    """Paso manual anunciado que llegará al robot en el instante `llegada`."""
+    robot: RobotCocina
+    nombre_robot: str
+    receta: Receta
+    indice_paso: int
+    llegada: float
+
+    @property
+    def paso(self) -> Optional[PasoReceta]:
+        pasos = self.receta.pasos
+        return pasos[self.indice_paso] if 0 <= self.indice_paso < len(pasos) else None
+
+    def faltan_s(self, ahora: Optional[float] = None) -> float:
+        """Segundos que faltan para que llegue (0 si ya debería haber llegado)."""
+        return max(0.0, self.llegada - (time.time() if ahora is None else ahora))
+
+
+# Eventos tras los que un paso anunciado ya no está por llegar
+_FIN_DE_AVISO = (
+    TipoEvento.ESPERA_CONFIRMACION, TipoEvento.ADELANTO, TipoEvento.PAUSA,
+    TipoEvento.COMPLETADA, TipoEvento.CANCELADA, TipoEvento.ERROR,
+)
+
+
+class MetricasEspera(NamedTuple):
+    """
+    Tiempo de un robot (o de todos) parado esperando a un operador. Las
+    esperas que acaban sin confirmación (receta cancelada) también cuentan.
+    """
+    esperas: int = 0
+    confirmaciones: int = 0
+    espera_total_s: float = 0.0
+    espera_maxima_s: float = 0.0
+
+    @property
+    def espera_media_s(self) -> float:
+        return self.espera_total_s / self.esperas if self.esperas else 0.0
+
+    def con_espera(self, segundos: float, confirmada: bool) -> "MetricasEspera":
+        return MetricasEspera(
+            self.esperas + 1,
+            self.confirmaciones + (1 if confirmada else 0),
+            self.espera_total_s + segundos,
+            max(self.espera_maxima_s, segundos),
+        )
+
+    def sumar(self, otra: "MetricasEspera") -> "MetricasEspera":
+        return MetricasEspera(
+            self.esperas + otra.esperas,
+            self.confirmaciones + otra.confirmaciones,
+            self.espera_total_s + otra.espera_total_s,
+            max(self.espera_maxima_s, otra.espera_maxima_s),
+        )
+
+
+def segundos_desbloqueados(receta: Receta, indice_paso: int) -> int:
+    """
+    Segundos de los pasos automáticos que siguen al paso manual `indice_paso`
+    hasta el siguiente paso manual (o el final), contados como en RobotCocina.
+    """
+    segundos = 0
+    for paso in receta.pasos[indice_paso + 1:]:
+        if paso.proceso.es_manual():
+            break
+        segundos += max(1, paso.tiempo_segundos or 1)
+    return segundos
+
+
+class ColaAtencion:
+    """Confirmaciones pendientes y métricas de espera de varios robots."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._nombres: Dict[int, str] = {}
+        self._observadores: Dict[int, Tuple[RobotCocina, Callable[[EventoRobot], None]]] = {}
+        self._pendientes: Dict[int, Pendiente] = {}
+        self._avisos: Dict[int, Aviso] = {}
+        self._metricas: Dict[str, MetricasEspera] = {}
+        self._version = 0
+
+    # ==========
+    # Robots
+    # ==========
+
+    def registrar_robot(self, robot: RobotCocina, nombre: str) -> None:
+        """Empieza a seguir los pasos manuales de `robot`, mostrado como `nombre`."""
+        clave = id(robot)
+
+        def observador(evento: EventoRobot) -> None:
+            self._al_evento(clave, evento)
+
+        with self._lock:
+            if clave in self._observadores:
+                return
+            self._nombres[clave] = nombre
+            self._metricas.setdefault(nombre, MetricasEspera())
+            self._observadores[clave] = (robot, observador)
+        robot.registrar_observador(observador)
+
+    def quitar_robot(self, robot: RobotCocina) -> None:
+        clave = id(robot)
+        with self._lock:
+            registro = self._observadores.pop(clave, None)
+            self._pendientes.pop(clave, None)
+            self._avisos.pop(clave, None)
+            self._version += 1
+        if registro is not None:
+            robot.quitar_observador(registro[1])
+
+    # ==========
+    # Consulta
+    # ==========
+
+    @property
+    def version(self) -> int:
+        """Cambia cada vez que entra o sale una confirmación pendiente o un aviso."""
+        return self._version
+
+    def pendientes(self) -> List[Pendiente]:
+        """Confirmaciones pendientes, la más prioritaria primero."""
+        ahora = time.time()
+        with self._lock:
+            pendientes = list(self._pendientes.values())
+        pendientes.sort(key=lambda p: p.prioridad(ahora), reverse=True)
+        return pendientes
+
+    def avisos(self) -> List[Aviso]:
+        """Pasos manuales anunciados, el que antes llega primero."""
+        with self._lock:
+            avisos = list(self._avisos.values())
+        avisos.sort(key=lambda a: a.llegada)
+        return avisos
+
+    def metricas(self) -> Dict[str, MetricasEspera]:
+        """Métricas por nombre de robot, contando también las esperas en curso."""
+        ahora = time.time()
+        with self._lock:
+            metricas = dict(self._metricas)
+            for clave, pendiente in self._pendientes.items():
+                nombre = self._nombres[clave]
+                metricas[nombre] = metricas[nombre].con_espera(pendiente.esperando_s(ahora), False)
+        return metricas
+
+    def metricas_totales(self) -> MetricasEspera:
+        total = MetricasEspera()
+        for metricas in self.metricas().values():
+            total = total.sumar(metricas)
+        return total
+
+    # ==========
+    # Acciones
+    # ==========
+
+    def confirmar(self, pendiente: Pendiente) -> bool:
+        """
+        Confirma el paso manual de un pendiente si sigue esperando (otro
+        operador puede haberlo confirmado ya). Devuelve si se confirmó.
+        """
+        with self._lock:
+            if self._pendientes.get(id(pendiente.robot)) != pendiente:
+                return False
+        robot = pendiente.robot
+        if robot.instantanea.receta_actual is not pendiente.receta:
+            return False
+        # El robot comprueba el paso bajo su propio lock: entre la comprobación
+        # de arriba y esta llamada otro operador puede haberlo confirmado
+        return robot.confirmar_paso_manual(pendiente.indice_paso)
+
+    def adelantar(self, aviso: Aviso) -> bool:
+        """
+        Confirma por adelantado el paso anunciado en `aviso`, si su robot
+        permite adelantarlo ahora (RobotCocina.adelantar_paso_manual).
+        Devuelve si se confirmó.
+        """
+        robot = aviso.robot
+        if robot.instantanea.receta_actual is not aviso.receta:
+            return False
+        return robot.adelantar_paso_manual(aviso.indice_paso)
+
+    # ==========
+    # Eventos
+    # ==========
+
+    def _al_evento(self, clave: int, evento: EventoRobot) -> None:
+        if evento.tipo == TipoEvento.REANUDACION:
+            # Reanudar desde la espera vuelve a emitir ESPERA_CONFIRMACION del mismo paso
+            return
+        with self._lock:
+            if evento.tipo == TipoEvento.AVISO_MANUAL:
+                self._avisos[clave] = Aviso(
+                    evento.robot,
+                    self._nombres[clave],
+                    evento.receta,
+                    evento.instantanea.proximo_manual_indice,
+                    evento.momento + (evento.instantanea.proximo_manual_en_s or 0),
+                )
+                self._version += 1
+                return
+            if evento.tipo in _FIN_DE_AVISO and self._avisos.pop(clave, None) is not None:
+                self._version += 1
+
+            actual = self._pendientes.get(clave)
+            if evento.tipo == TipoEvento.ESPERA_CONFIRMACION:
+                indice = evento.instantanea.indice_paso_actual
+                if actual is not None and actual.receta is evento.receta and actual.indice_paso == indice:
+                    return
+                self._pendientes[clave] = Pendiente(
+                    evento.robot,
+                    self._nombres[clave],
+                    evento.receta,
+                    indice,
+                    evento.instantanea.paso_actual,
+                    evento.momento,
+                    segundos_desbloqueados(evento.receta, indice),
+                )
+            elif actual is None:
+                return
+            elif (evento.tipo == TipoEvento.PAUSA and actual.receta is evento.receta
+                    and actual.indice_paso == evento.instantanea.indice_paso_actual):
+                # Una pausa no resuelve la espera: al reanudar sigue el mismo
+                # pendiente, con su `desde`
+                return
+            else:
+                # Confirmado, o la receta terminó/se canceló mientras esperaba
+                del self._pendientes[clave]
+                nombre = self._nombres[clave]
+                self._metricas[nombre] = self._metricas[nombre].con_espera(
+                    evento.momento - actual.desde, evento.tipo == TipoEvento.CONFIRMACION,
+                )
+            self._version += 1
+
+
+# Cola compartida por todas las páginas
+COLA_ATENCION = ColaAtencion()
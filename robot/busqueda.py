@@ -0,0 +1,159 @@
+"""
+Búsqueda de recetas por nombre para el selector del dashboard.
+
+Mantiene en memoria un índice de prefijos de palabra y trigramas sobre los
+nombres de las recetas (base y usuario). Cada búsqueda devuelve solo las N mejores
+coincidencias, de modo que la UI nunca tiene que enviar el catálogo entero
+al navegador. El índice se construye a partir del catálogo compartido y se
+reconstruye de forma perezosa cuando servicios notifica un cambio en las recetas.
+"""
+
+import threading
+import unicodedata
+from collections import defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+from . import servicios
+from .catalogo import CATALOGO
+from .modelos import ResumenReceta
+
+
+# Número de opciones que se devuelven por defecto en cada búsqueda
+LIMITE_RESULTADOS = 20
+
+# Longitud máxima de los prefijos de palabra indexados: las consultas hasta
+# esta longitud buscan en ellos (una sola letra no forma ningún trigrama
+# útil, p. ej. "p" no comparte ninguno con "arroz con pollo")
+PREFIJO_MAX = 3
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas y sin tildes, para que 'pure' encuentre 'Puré'."""
+    descompuesto = unicodedata.normalize("NFKD", texto or "")
+    sin_tildes = "".join(c for c in descompuesto if not unicodedata.combining(c))
+    return " ".join(sin_tildes.lower().split())
+
+
+def trigramas(texto: str) -> Set[str]:
+    """Trigramas de un texto normalizado, con relleno para palabras cortas."""
+    relleno = f"  {texto} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+class IndiceRecetas:
+    """
+    Índice en memoria de los nombres de receta.
+
+    - Prefijos de palabra (hasta PREFIJO_MAX letras): candidatos de las
+      consultas cortas, mientras se empieza a escribir.
+    - Trigramas: para el resto de consultas, con coincidencias parciales o
+      con errores leves.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._recetas: List[ResumenReceta] = []
+        self._nombres: List[str] = []
+        self._por_trigrama: Dict[str, List[int]] = {}
+        self._por_prefijo: Dict[str, List[int]] = {}
+        self._version = 0
+        # Cambios notificados y cambio con el que se construyó el índice:
+        # si difieren, hay que reconstruir (aunque el aviso llegue durante la construcción)
+        self._cambios = 1
+        self._construido_en = 0
+
+    @property
+    def version(self) -> int:
+        """Se incrementa cada vez que el índice se reconstruye."""
+        return self._version
+
+    def invalidar(self, origen: Optional[str] = None, id_receta: Optional[int] = None) -> None:
+        """Marca el índice para reconstruirse en la próxima búsqueda."""
+        self._cambios += 1
+
+    def _asegurar_construido(self) -> None:
+        if self._construido_en == self._cambios:
+            return
+        with self._lock:
+            cambios = self._cambios
+            if self._construido_en == cambios:
+                return
+            # Se construye desde el catálogo compartido, sin consultar la BD
+            recetas = list(CATALOGO.resumenes("base") + CATALOGO.resumenes("usuario"))
+            nombres = [normalizar(r.nombre) for r in recetas]
+            por_trigrama: Dict[str, List[int]] = defaultdict(list)
+            por_prefijo: Dict[str, List[int]] = defaultdict(list)
+            for posicion, nombre in enumerate(nombres):
+                for tri in trigramas(nombre):
+                    por_trigrama[tri].append(posicion)
+                prefijos = {
+                    palabra[:longitud]
+                    for palabra in nombre.split()
+                    for longitud in range(1, min(len(palabra), PREFIJO_MAX) + 1)
+                }
+                for prefijo in prefijos:
+                    por_prefijo[prefijo].append(posicion)
+
+            self._recetas = recetas
+            self._nombres = nombres
+            self._por_trigrama = dict(por_trigrama)
+            self._por_prefijo = dict(por_prefijo)
+            self._version += 1
+            self._construido_en = cambios
+
+    def buscar(self, texto: str, limite: int = LIMITE_RESULTADOS) -> List[ResumenReceta]:
+        """
+        Devuelve como mucho `limite` recetas ordenadas por relevancia:
+        primero las que empiezan por el texto, luego las que tienen una palabra
+        que empieza por él y, por último, por número de trigramas comunes.
+        Sin texto, devuelve las primeras recetas del catálogo.
+        """
+        self._asegurar_construido()
+        recetas, nombres = self._recetas, self._nombres
+        por_trigrama, por_prefijo = self._por_trigrama, self._por_prefijo
+
+        consulta = normalizar(texto)
+        if not consulta:
+            return recetas[:limite]
+
+        comunes: Dict[int, int] = defaultdict(int)
+        tris_consulta = trigramas(consulta)
+        for tri in tris_consulta:
+            for posicion in por_trigrama.get(tri, ()):
+                comunes[posicion] += 1
+        if len(consulta) <= PREFIJO_MAX and " " not in consulta:
+            # Todas las recetas con una palabra que empieza por la consulta
+            for posicion in por_prefijo.get(consulta, ()):
+                comunes[posicion] += 0
+
+        # Con consultas cortas solo valen coincidencias literales; con las largas
+        # se admiten parecidos por trigramas si comparten al menos un tercio (mínimo 2)
+        minimo = len(tris_consulta) + 1 if len(consulta) < 4 else max(2, len(tris_consulta) // 3)
+
+        puntuados: List[Tuple[int, int, int]] = []
+        for posicion, n_comunes in comunes.items():
+            nombre = nombres[posicion]
+            if nombre.startswith(consulta):
+                nivel = 0
+            elif any(palabra.startswith(consulta) for palabra in nombre.split()):
+                nivel = 1
+            elif consulta in nombre:
+                nivel = 2
+            elif n_comunes >= minimo:
+                nivel = 3
+            else:
+                continue
+            puntuados.append((nivel, -n_comunes, posicion))
+
+        puntuados.sort()
+        return [recetas[posicion] for _, _, posicion in puntuados[:limite]]
+
+
+# Índice compartido por todas las sesiones
+INDICE_RECETAS = IndiceRecetas()
+servicios.registrar_observador_recetas(INDICE_RECETAS.invalidar)
+
+
+def buscar_recetas(texto: str, limite: int = LIMITE_RESULTADOS) -> List[ResumenReceta]:
+    """Devuelve las `limite` recetas cuyo nombre mejor coincide con `texto`."""
+    return INDICE_RECETAS.buscar(texto, limite)
@@ -0,0 +1,246 @@
+"""
+Catálogo compartido de procesos y recetas.
+
+Todas las páginas (y todas las sesiones abiertas) leen los procesos y los
+resúmenes de recetas de una única instancia, CATALOGO, en lugar de ir cada una
+a la base de datos. El catálogo:
+
+- carga cada colección una sola vez, de forma perezosa;
+- se mantiene al día con los avisos de servicios, aplicando solo las altas,
+  bajas o modificaciones notificadas (una consulta por elemento cambiado,
+  hecha fuera del lock: los lectores nunca esperan a la BD salvo para la
+  primera carga de la colección que piden);
+- lleva un número de versión y reparte a cada sesión suscrita los cambios
+  (CambioCatalogo) sellados con la versión en la que se produjeron.
+
+Las sesiones recogen sus cambios pendientes desde sus propios temporizadores,
+así que los avisos nunca tocan la UI desde el hilo que hizo la modificación.
+"""
+
+import threading
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from . import servicios
+from .modelos import ProcesoCocina, ResumenReceta
+
+
+PROCESOS = "procesos"
+RECETAS = "recetas"
+ORIGENES = ("base", "usuario")
+
+
+class CambioCatalogo(NamedTuple):
+    """
+    Cambio en el catálogo.
+
+    coleccion=None / origen=None: ha cambiado todo (p. ej. reinicio de fábrica).
+    ids vacío: han cambiado todos los elementos de esa colección y origen.
+    """
+    version: int
+    coleccion: Optional[str]
+    origen: Optional[str]
+    ids: Tuple[int, ...] = ()
+
+    def afecta_a(self, coleccion: str, origen: Optional[str] = None) -> bool:
+        """Indica si el cambio afecta a una colección (y origen) concretos."""
+        if self.coleccion is not None and self.coleccion != coleccion:
+            return False
+        return origen is None or self.origen is None or self.origen == origen
+
+
+class SuscripcionCatalogo:
+    """
+    Cola de cambios pendientes de una sesión.
+
+    Si la sesión no recoge sus cambios y la cola se llena, se sustituye por un
+    único cambio "todo ha cambiado", de modo que la memoria está acotada.
+    """
+
+    def __init__(self, catalogo: "Catalogo", max_pendientes: int = 100):
+        self._catalogo = catalogo
+        self._max_pendientes = max_pendientes
+        self._pendientes: Deque[CambioCatalogo] = deque()
+        self._lock = threading.Lock()
+
+    def _encolar(self, cambio: CambioCatalogo) -> None:
+        with self._lock:
+            if len(self._pendientes) >= self._max_pendientes:
+                self._pendientes.clear()
+                cambio = CambioCatalogo(cambio.version, None, None)
+            self._pendientes.append(cambio)
+
+    def pendientes(self) -> List[CambioCatalogo]:
+        """Devuelve y vacía los cambios pendientes, en orden de versión."""
+        with self._lock:
+            cambios = list(self._pendientes)
+            self._pendientes.clear()
+        return cambios
+
+    def cancelar(self) -> None:
+        """Deja de recibir cambios (p. ej. al desconectarse el cliente)."""
+        self._catalogo._desuscribir(self)
+
+
+class Catalogo:
+    """Procesos y resúmenes de recetas compartidos por todo el proceso."""
+
+    def __init__(self):
+        # Protege solo el cambio de datos, versión y suscripciones: nunca se
+        # toma durante una consulta a la BD
+        self._lock = threading.RLock()
+        # Serializa la aplicación de cambios (sus consultas van sin _lock)
+        self._lock_cambios = threading.Lock()
+        self._version = 0
+        # (coleccion, origen) -> tupla ordenada por id, o None si hay que cargarla
+        self._datos: Dict[Tuple[str, str], Optional[tuple]] = {
+            (coleccion, origen): None
+            for coleccion in (PROCESOS, RECETAS)
+            for origen in ORIGENES
+        }
+        # Una carga completa a la vez por colección; las demás siguen disponibles
+        self._locks_carga: Dict[Tuple[str, str], threading.Lock] = {
+            clave: threading.Lock() for clave in self._datos
+        }
+        self._suscripciones: List[SuscripcionCatalogo] = []
+
+    # ==========
+    # Lectura
+    # ==========
+
+    @property
+    def version(self) -> int:
+        return self._version
+
+    def _cargar_todo(self, coleccion: str, origen: str) -> tuple:
+        if coleccion == PROCESOS:
+            cargar = servicios.cargar_procesos_base if origen == "base" else servicios.cargar_procesos_usuario
+        else:
+            cargar = (
+                servicios.cargar_resumenes_recetas_base if origen == "base"
+                else servicios.cargar_resumenes_recetas_usuario
+            )
+        return tuple(cargar())
+
+    def _coleccion(self, coleccion: str, origen: str) -> tuple:
+        clave = (coleccion, origen)
+        datos = self._datos[clave]
+        if datos is None:
+            with self._locks_carga[clave]:
+                datos = self._datos[clave]
+                if datos is None:
+                    version = self._version
+                    datos = self._cargar_todo(coleccion, origen)
+                    with self._lock:
+                        # Si entretanto se aplicó un cambio, la carga puede ser
+                        # anterior a él: se devuelve, pero no se guarda
+                        if self._version == version:
+                            self._datos[clave] = datos
+        return datos
+
+    def procesos(self, origen: str) -> Tuple[ProcesoCocina, ...]:
+        """Procesos de un origen ('base' o 'usuario'), ordenados por id."""
+        return self._coleccion(PROCESOS, origen)
+
+    def resumenes(self, origen: str) -> Tuple[ResumenReceta, ...]:
+        """Resúmenes de recetas de un origen ('base' o 'usuario'), ordenados por id."""
+        return self._coleccion(RECETAS, origen)
+
+    def resumen(self, origen: str, id_receta: int) -> Optional[ResumenReceta]:
+        """Resumen de una receta por id, o None si no existe."""
+        for r in self.resumenes(origen):
+            if r.id == id_receta:
+                return r
+        return None
+
+    def resumen_por_nombre(self, origen: str, nombre: str) -> Optional[ResumenReceta]:
+        """Primer resumen de receta con ese nombre exacto, o None."""
+        for r in self.resumenes(origen):
+            if r.nombre == nombre:
+                return r
+        return None
+
+    # ==============
+    # Suscripciones
+    # ==============
+
+    def suscribir(self) -> SuscripcionCatalogo:
+        """Crea una suscripción a los cambios del catálogo."""
+        suscripcion = SuscripcionCatalogo(self)
+        with self._lock:
+            self._suscripciones.append(suscripcion)
+        return suscripcion
+
+    def _desuscribir(self, suscripcion: SuscripcionCatalogo) -> None:
+        with self._lock:
+            if suscripcion in self._suscripciones:
+                self._suscripciones.remove(suscripcion)
+
+    @property
+    def num_suscripciones(self) -> int:
+        return len(self._suscripciones)
+
+    # =====================
+    # Aplicación de cambios
+    # =====================
+
+    def _obtener_uno(self, coleccion: str, origen: str, id_: int):
+        if coleccion == RECETAS:
+            return servicios.obtener_resumen_receta(origen, id_)
+        if origen == "base":
+            return servicios.obtener_proceso_base_por_id(id_)
+        return servicios.obtener_proceso_usuario_por_id(id_)
+
+    def _aplicar(self, coleccion: str, origen: Optional[str], id_: Optional[int]) -> None:
+        with self._lock_cambios:
+            # La consulta del elemento cambiado se hace sin _lock: los lectores
+            # siguen viendo los datos anteriores mientras tanto
+            consultado = False
+            nuevo = None
+            if origen is not None and id_ is not None and self._datos[(coleccion, origen)] is not None:
+                nuevo = self._obtener_uno(coleccion, origen, id_)
+                consultado = True
+
+            with self._lock:
+                if origen is None:
+                    # Todo ha cambiado: recargar perezosamente todas las colecciones
+                    for clave in self._datos:
+                        self._datos[clave] = None
+                elif id_ is None:
+                    self._datos[(coleccion, origen)] = None
+                else:
+                    datos = self._datos[(coleccion, origen)]
+                    if datos is not None and not consultado:
+                        # Se cargó entera mientras tanto: puede no incluir el cambio
+                        self._datos[(coleccion, origen)] = None
+                    elif datos is not None:
+                        # Diff: sustituir, insertar o quitar solo el elemento afectado
+                        resto = [x for x in datos if x.id != id_]
+                        if nuevo is not None:
+                            resto.append(nuevo)
+                            resto.sort(key=lambda x: x.id)
+                        self._datos[(coleccion, origen)] = tuple(resto)
+
+                self._version += 1
+                cambio = CambioCatalogo(
+                    version=self._version,
+                    coleccion=None if origen is None else coleccion,
+                    origen=origen,
+                    ids=() if id_ is None else (id_,),
+                )
+                suscripciones = list(self._suscripciones)
+
+        for suscripcion in suscripciones:
+            suscripcion._encolar(cambio)
+
+    def _on_cambio_procesos(self, origen: Optional[str], id_proceso: Optional[int]) -> None:
+        self._aplicar(PROCESOS, origen, id_proceso)
+
+    def _on_cambio_recetas(self, origen: Optional[str], id_receta: Optional[int]) -> None:
+        self._aplicar(RECETAS, origen, id_receta)
+
+
+# Instancia única compartida por todas las páginas y sesiones
+CATALOGO = Catalogo()
+servicios.registrar_observador_procesos(CATALOGO._on_cambio_procesos)
+servicios.registrar_observador_recetas(CATALOGO._on_cambio_recetas)
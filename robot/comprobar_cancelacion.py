@@ -0,0 +1,115 @@
+"""
+Comprobación de la cancelación del hilo de recetas de RobotCocina.
+
+Uso:
+    python -m robot.comprobar_cancelacion
+
+El hilo de recetas suelta el lock entre bloque y bloque (por ejemplo mientras
+consulta si el paso es manual). Si otra llamada cancela su token justo en
+ese hueco, el hilo no debe volver a tocar el estado del robot ni emitir
+eventos de la receta cancelada. Para abrir el hueco de forma reproducible se
+usa un proceso manual cuyo es_manual() tarda RETARDO_S segundos:
+
+- iniciar_manual(forzar=True) mientras el hilo está dentro de es_manual():
+  el robot debe seguir en la cocción manual, no en ESPERANDO_CONFIRMACION;
+- detener_coccion() en el mismo punto: el robot debe quedarse en ESPERA con
+  la posición a cero.
+
+Sale con código 1 si alguna falla.
+"""
+
+import sys
+import time
+
+from robot.modelos import (
+    EstadoRobot,
+    PasoReceta,
+    ProcesoManual,
+    RecetaUsuario,
+    RobotCocina,
+    TipoEvento,
+)
+
+RETARDO_S = 0.3
+
+
+class _ProcesoManualLento(ProcesoManual):
+    """Proceso manual cuyo es_manual() tarda RETARDO_S en responder."""
+
+    def es_manual(self) -> bool:
+        time.sleep(RETARDO_S)
+        return super().es_manual()
+
+
+def _comprobar(condicion: bool, mensaje: str) -> None:
+    if not condicion:
+        raise AssertionError(mensaje)
+
+
+def _robot_con_receta_lenta():
+    """Robot encendido, con una receta de un paso manual lento y sus eventos."""
+    proceso = _ProcesoManualLento(1, "Añadir ingredientes", "preparacion", "manual", "Añadir")
+    receta = RecetaUsuario(1, "Receta de prueba", "", [], [PasoReceta(1, proceso)])
+    robot = RobotCocina()
+    eventos = []
+    robot.registrar_observador(lambda evento: eventos.append(evento))
+    robot.encender()
+    robot.seleccionar_receta(receta)
+    robot.iniciar_coccion()
+    # El hilo ya está dentro de es_manual() con el lock suelto
+    time.sleep(RETARDO_S / 3)
+    return robot, eventos
+
+
+def _sin_eventos_tras(eventos, indice: int, tipos) -> bool:
+    return not any(e.tipo in tipos for e in eventos[indice:])
+
+
+def comprobar_iniciar_manual() -> None:
+    robot, eventos = _robot_con_receta_lenta()
+    robot.iniciar_manual(60, 2, 30, forzar=True)
+    desde = len(eventos)
+    time.sleep(RETARDO_S + 0.2)
+
+    _comprobar(robot.manual_activo, "La cocción manual dejó de estar activa")
+    _comprobar(
+        robot.estado == EstadoRobot.COCINANDO,
+        f"El hilo de la receta cancelada sobrescribió el estado: {robot.estado}",
+    )
+    _comprobar(
+        _sin_eventos_tras(eventos, desde, (TipoEvento.ESPERA_CONFIRMACION, TipoEvento.PASO)),
+        "El hilo de la receta cancelada emitió eventos tras ser sustituido",
+    )
+    robot.apagar()
+
+
+def comprobar_detener_coccion() -> None:
+    robot, eventos = _robot_con_receta_lenta()
+    robot.detener_coccion()
+    desde = len(eventos)
+    time.sleep(RETARDO_S + 0.2)
+
+    _comprobar(
+        robot.estado == EstadoRobot.ESPERA,
+        f"El hilo de la receta cancelada sobrescribió el estado: {robot.estado}",
+    )
+    _comprobar(robot.indice_paso_actual == 0, "El hilo cancelado movió la posición de la receta")
+    _comprobar(
+        _sin_eventos_tras(eventos, desde, (TipoEvento.ESPERA_CONFIRMACION, TipoEvento.PASO)),
+        "El hilo de la receta cancelada emitió eventos tras detener la cocción",
+    )
+    robot.apagar()
+
+
+def main() -> None:
+    try:
+        comprobar_iniciar_manual()
+        comprobar_detener_coccion()
+    except Exception as ex:
+        print(f"FALLO: {type(ex).__name__}: {ex}")
+        sys.exit(1)
+    print("OK: el hilo cancelado no toca el estado del robot")
+
+
+if __name__ == "__main__":
+    main()
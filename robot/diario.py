@@ -0,0 +1,538 @@
+"""
+Diario de ejecución de los robots: registro binario de solo añadido con cada
+transición de sus recetas (write-ahead).
+
+Si el proceso muere a mitad de una receta, el estado en memoria del robot se
+pierde. DiarioEjecucion observa a los robots registrados y añade a un
+fichero por robot (<directorio>/<nombre>.diario) un registro por cada
+EventoRobot: inicio, reanudación, cambio de paso, espera, confirmación o
+adelanto de pasos manuales, pausa, fin, cancelación y error.
+
+- Formato: cabecera de fichero (MAGIA) y registros [longitud, crc32, datos],
+  con los datos en campos fijos (struct) seguidos del nombre de la receta en
+  UTF-8. Un registro a medias o corrupto (el proceso murió mientras se
+  escribía) se detecta por su longitud o su CRC: la lectura se detiene ahí y,
+  al volver a abrir el diario para escribir, se trunca.
+- Coste: el observador solo empaqueta el registro y lo añade a un búfer en
+  memoria. Un hilo escribe los búferes y hace fsync de cada fichero como
+  mucho cada INTERVALO_FSYNC_S (fsync agrupado, como los lotes del escritor
+  de BD): registrar una transición cuesta microsegundos y un fallo pierde,
+  como mucho, las transiciones de la última ventana.
+- compactar_fichero() reescribe un diario sin avisos ni registros corruptos,
+  conservando solo las últimas cocciones y la que esté en curso.
+- reconstruir() devuelve el último estado conocido: qué receta se cocinaba,
+  en qué paso y segundo, y si quedó a medias.
+
+Los registros (RegistroDiario) sirven también para el historial de cocciones.
+
+Uso como herramienta:
+    python -m robot.diario <fichero.diario> [--compactar [N]]
+"""
+
+import logging
+import os
+import re
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import BinaryIO, Callable, Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from data import init_db
+from .modelos import EstadoRobot, EventoRobot, RobotCocina, TipoEvento
+
+logger = logging.getLogger(__name__)
+
+# Cabecera de cada fichero de diario (formato y versión)
+MAGIA = b"RCDIARIO\x01"
+
+# Ventana del fsync agrupado
+INTERVALO_FSYNC_S = 0.05
+
+# Cocciones terminadas que conserva la compactación por defecto
+CONSERVAR_COCCIONES = 50
+
+EXTENSION = ".diario"
+
+# Códigos de los campos enumerados. Solo se añaden al final: los diarios ya
+# escritos tienen que seguir leyéndose igual.
+_TIPOS = (
+    TipoEvento.INICIO, TipoEvento.REANUDACION, TipoEvento.PASO, TipoEvento.AVISO_MANUAL,
+    TipoEvento.ADELANTO, TipoEvento.ESPERA_CONFIRMACION, TipoEvento.CONFIRMACION,
+    TipoEvento.PAUSA, TipoEvento.COMPLETADA, TipoEvento.CANCELADA, TipoEvento.ERROR,
+)
+_ESTADOS = (
+    EstadoRobot.APAGADO, EstadoRobot.ESPERA, EstadoRobot.COCINANDO, EstadoRobot.PAUSADO,
+    EstadoRobot.ESPERANDO_CONFIRMACION, EstadoRobot.ERROR,
+)
+_ORIGENES = (None, "base", "usuario")
+
+_CODIGO_TIPO = {tipo: codigo for codigo, tipo in enumerate(_TIPOS)}
+_CODIGO_ESTADO = {estado: codigo for codigo, estado in enumerate(_ESTADOS)}
+_CODIGO_ORIGEN = {origen: codigo for codigo, origen in enumerate(_ORIGENES)}
+
+# Transiciones que cierran una cocción
+TERMINALES = (TipoEvento.COMPLETADA, TipoEvento.CANCELADA, TipoEvento.ERROR)
+
+# [longitud de los datos, crc32 de los datos]
+_CABECERA = struct.Struct("<II")
+# momento, tipo, estado, origen, id_receta (-1 sin receta), índice de paso,
+# segundo en el paso, número de pasos, progreso; después, el nombre en UTF-8
+_DATOS = struct.Struct("<dBBBqiiif")
+
+# Un registro más largo es basura (una longitud corrupta)
+_MAX_DATOS = 64 * 1024
+
+
+class RegistroDiario(NamedTuple):
+    """Una transición de la ejecución de recetas de un robot."""
+    momento: float
+    tipo: str
+    estado: str
+    id_receta: Optional[int]
+    origen: Optional[str]
+    nombre_receta: Optional[str]
+    indice_paso: int
+    segundo_en_paso: int
+    num_pasos: int
+    progreso: float
+
+
+class EstadoDiario(NamedTuple):
+    """Último estado conocido de un robot según su diario."""
+    ultimo: RegistroDiario
+    inicio_coccion: Optional[RegistroDiario]
+    registros: int
+
+    @property
+    def interrumpida(self) -> bool:
+        """True si la última cocción no terminó (en curso, pausada o el proceso murió)."""
+        return self.inicio_coccion is not None and self.ultimo.tipo not in TERMINALES
+
+
+# ==================
+# Codificación
+# ==================
+
+def registro_de_evento(evento: EventoRobot) -> Optional[RegistroDiario]:
+    """Registro de un EventoRobot (None si su tipo no se registra)."""
+    if evento.tipo not in _CODIGO_TIPO:
+        return None
+    instantanea = evento.instantanea
+    receta = evento.receta
+    return RegistroDiario(
+        evento.momento,
+        evento.tipo,
+        instantanea.estado,
+        receta.id if receta is not None else None,
+        receta.origen if receta is not None else None,
+        receta.nombre if receta is not None else None,
+        instantanea.indice_paso_actual,
+        instantanea.segundo_en_paso,
+        len(receta.pasos) if receta is not None else 0,
+        instantanea.progreso,
+    )
+
+
+def codificar(registro: RegistroDiario) -> bytes:
+    """Bytes de un registro, con su cabecera, listos para añadir al diario."""
+    datos = _DATOS.pack(
+        registro.momento,
+        _CODIGO_TIPO[registro.tipo],
+        _CODIGO_ESTADO.get(registro.estado, _CODIGO_ESTADO[EstadoRobot.ERROR]),
+        _CODIGO_ORIGEN.get(registro.origen, 0),
+        -1 if registro.id_receta is None else registro.id_receta,
+        registro.indice_paso,
+        registro.segundo_en_paso,
+        registro.num_pasos,
+        registro.progreso,
+    ) + (registro.nombre_receta or "").encode("utf-8")
+    return _CABECERA.pack(len(datos), zlib.crc32(datos)) + datos
+
+
+def _decodificar(datos: bytes) -> RegistroDiario:
+    (momento, tipo, estado, origen, id_receta,
+     indice, segundo, num_pasos, progreso) = _DATOS.unpack_from(datos)
+    nombre = datos[_DATOS.size:].decode("utf-8", errors="replace")
+    return RegistroDiario(
+        momento,
+        _TIPOS[tipo],
+        _ESTADOS[estado],
+        None if id_receta < 0 else id_receta,
+        _ORIGENES[origen],
+        nombre or None,
+        indice,
+        segundo,
+        num_pasos,
+        progreso,
+    )
+
+
+# ==========
+# Lectura
+# ==========
+
+def _recorrer(f: BinaryIO) -> Iterator[Tuple[RegistroDiario, int]]:
+    """
+    Genera (registro, posición tras él) desde el principio del fichero
+    hasta el final o hasta el primer registro incompleto o corrupto.
+    """
+    if f.read(len(MAGIA)) != MAGIA:
+        raise ValueError("No es un diario de ejecución (cabecera desconocida)")
+    posicion = len(MAGIA)
+    while True:
+        cabecera = f.read(_CABECERA.size)
+        if len(cabecera) < _CABECERA.size:
+            return
+        longitud, crc = _CABECERA.unpack(cabecera)
+        if not _DATOS.size <= longitud <= _MAX_DATOS:
+            return
+        datos = f.read(longitud)
+        if len(datos) < longitud or zlib.crc32(datos) != crc:
+            return
+        try:
+            registro = _decodificar(datos)
+        except (IndexError, struct.error):
+            return
+        posicion += _CABECERA.size + longitud
+        yield registro, posicion
+
+
+def leer_registros(ruta: str) -> Iterator[RegistroDiario]:
+    """Registros válidos de un diario, en orden (se detiene en el primero dañado)."""
+    with open(ruta, "rb") as f:
+        for registro, _ in _recorrer(f):
+            yield registro
+
+
+def _fin_valido(ruta: str) -> int:
+    """Posición tras el último registro válido del diario."""
+    with open(ruta, "rb") as f:
+        fin = len(MAGIA)
+        for _, fin in _recorrer(f):
+            pass
+    return fin
+
+
+def reconstruir(ruta: str) -> Optional[EstadoDiario]:
+    """Último estado registrado en un diario (None si no tiene registros)."""
+    ultimo: Optional[RegistroDiario] = None
+    inicio: Optional[RegistroDiario] = None
+    registros = 0
+    for registro in leer_registros(ruta):
+        registros += 1
+        ultimo = registro
+        if registro.tipo == TipoEvento.INICIO:
+            inicio = registro
+    if ultimo is None:
+        return None
+    return EstadoDiario(ultimo, inicio, registros)
+
+
+def cocciones(registros: List[RegistroDiario]) -> List[List[RegistroDiario]]:
+    """
+    Agrupa los registros por cocción: cada una empieza en un INICIO y acaba
+    en su transición terminal o, si el proceso murió, en el siguiente INICIO.
+    Los registros anteriores al primer INICIO forman una cocción incompleta.
+    """
+    grupos: List[List[RegistroDiario]] = []
+    for registro in registros:
+        if registro.tipo == TipoEvento.INICIO or not grupos or grupos[-1][-1].tipo in TERMINALES:
+            grupos.append([])
+        grupos[-1].append(registro)
+    return grupos
+
+
+# ===============
+# Compactación
+# ===============
+
+def _sincronizar_directorio(directorio: str) -> None:
+    # El rename solo es duradero cuando se sincroniza el directorio (POSIX)
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(directorio, os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def compactar_fichero(ruta: str, conservar_cocciones: int = CONSERVAR_COCCIONES) -> Tuple[int, int]:
+    """
+    Reescribe un diario con las últimas `conservar_cocciones` cocciones
+    terminadas y la que esté en curso, sin avisos de pasos manuales ni
+    registros dañados. Se escribe en un fichero temporal que sustituye al
+    diario al final, así que nunca queda a medias. Devuelve (registros
+    antes, registros después).
+    """
+    registros = list(leer_registros(ruta))
+    grupos = cocciones(registros)
+    en_curso = grupos.pop() if grupos and grupos[-1][-1].tipo not in TERMINALES else []
+    conservados = grupos[-conservar_cocciones:] if conservar_cocciones > 0 else []
+    conservados.append(en_curso)
+
+    temporal = f"{ruta}.tmp"
+    escritos = 0
+    with open(temporal, "wb") as f:
+        f.write(MAGIA)
+        for grupo in conservados:
+            for registro in grupo:
+                if registro.tipo == TipoEvento.AVISO_MANUAL:
+                    continue
+                f.write(codificar(registro))
+                escritos += 1
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(temporal, ruta)
+    _sincronizar_directorio(os.path.dirname(os.path.abspath(ruta)))
+    return len(registros), escritos
+
+
+# =====================
+# Diario de los robots
+# =====================
+
+def _nombre_fichero(nombre: str) -> str:
+    return re.sub(r"[^\w.-]+", "_", nombre).strip("._") + EXTENSION
+
+
+class DiarioEjecucion:
+    """
+    Diario de varios robots, un fichero por robot, con un hilo de escritura
+    y fsync agrupado.
+
+    El directorio por defecto es data/diario, junto a la BD del usuario. El
+    hilo se crea con la primera transición que hay que escribir.
+    """
+
+    def __init__(self, directorio: Optional[str] = None, intervalo_fsync_s: float = INTERVALO_FSYNC_S) -> None:
+        self._directorio = directorio
+        self._intervalo_fsync_s = intervalo_fsync_s
+        self._lock = threading.Lock()
+        self._cambio = threading.Condition(self._lock)
+        # Solo una escritura o compactación de ficheros a la vez
+        self._lock_ficheros = threading.Lock()
+        self._observadores: Dict[int, Tuple[RobotCocina, str, Callable[[EventoRobot], None]]] = {}
+        self._bufers: Dict[str, bytearray] = {}
+        self._ficheros: Dict[str, BinaryIO] = {}
+        self._registrados = 0
+        self._sincronizados = 0
+        self._fsyncs = 0
+        self._hilo: Optional[threading.Thread] = None
+        self._parar = False
+
+    # ==========
+    # Consulta
+    # ==========
+
+    @property
+    def directorio(self) -> str:
+        return self._directorio or os.path.join(os.path.dirname(init_db.DB_PATH), "diario")
+
+    def ruta(self, nombre: str) -> str:
+        """Fichero del diario del robot registrado como `nombre`."""
+        return os.path.join(self.directorio, _nombre_fichero(nombre))
+
+    @property
+    def registros(self) -> int:
+        """Registros añadidos desde el arranque."""
+        return self._registrados
+
+    @property
+    def fsyncs(self) -> int:
+        """Sincronizaciones a disco hechas desde el arranque (una por fichero y ventana)."""
+        return self._fsyncs
+
+    # ==========
+    # Robots
+    # ==========
+
+    def registrar_robot(self, robot: RobotCocina, nombre: str) -> str:
+        """Empieza a registrar las transiciones de `robot`. Devuelve la ruta de su diario."""
+        ruta = self.ruta(nombre)
+
+        def observador(evento: EventoRobot) -> None:
+            self._al_evento(ruta, evento)
+
+        with self._lock:
+            if id(robot) in self._observadores:
+                return self._observadores[id(robot)][1]
+            self._observadores[id(robot)] = (robot, ruta, observador)
+        robot.registrar_observador(observador)
+        return ruta
+
+    def quitar_robot(self, robot: RobotCocina) -> None:
+        with self._lock:
+            registro = self._observadores.pop(id(robot), None)
+        if registro is not None:
+            robot.quitar_observador(registro[2])
+
+    # ============
+    # Escritura
+    # ============
+
+    def _al_evento(self, ruta: str, evento: EventoRobot) -> None:
+        # Se llama con el lock del robot tomado: solo empaqueta y encola
+        registro = registro_de_evento(evento)
+        if registro is None:
+            return
+        datos = codificar(registro)
+        with self._lock:
+            bufer = self._bufers.get(ruta)
+            if bufer is None:
+                bufer = self._bufers[ruta] = bytearray()
+            bufer += datos
+            self._registrados += 1
+            if self._hilo is None:
+                self._parar = False
+                self._hilo = threading.Thread(target=self._bucle, name="diario-ejecucion", daemon=True)
+                self._hilo.start()
+            self._cambio.notify_all()
+
+    def sincronizar(self, timeout: Optional[float] = None) -> bool:
+        """
+        Espera a que todo lo registrado hasta ahora esté en disco. Devuelve
+        False si se agota el timeout (o no hay hilo que escriba).
+        """
+        with self._lock:
+            objetivo = self._registrados
+            return self._cambio.wait_for(lambda: self._sincronizados >= objetivo, timeout)
+
+    def compactar(self, nombre: str, conservar_cocciones: int = CONSERVAR_COCCIONES) -> Tuple[int, int]:
+        """Compacta el diario de un robot registrado sin dejar de registrar sus transiciones."""
+        ruta = self.ruta(nombre)
+        self.sincronizar()
+        with self._lock_ficheros:
+            f = self._ficheros.pop(ruta, None)
+            if f is not None:
+                f.close()
+            if not os.path.exists(ruta):
+                return 0, 0
+            return compactar_fichero(ruta, conservar_cocciones)
+
+    def detener(self, timeout: Optional[float] = None) -> None:
+        """Escribe y sincroniza lo pendiente, y termina el hilo."""
+        with self._lock:
+            hilo = self._hilo
+            if hilo is None:
+                return
+            self._parar = True
+            self._cambio.notify_all()
+        hilo.join(timeout)
+
+    # ================
+    # Hilo del diario
+    # ================
+
+    def _abrir(self, ruta: str) -> BinaryIO:
+        os.makedirs(os.path.dirname(ruta), exist_ok=True)
+        if os.path.exists(ruta) and os.path.getsize(ruta) > 0:
+            try:
+                fin = _fin_valido(ruta)
+            except ValueError:
+                apartado = f"{ruta}.{int(time.time())}.ilegible"
+                logger.warning("Diario %s ilegible: se aparta como %s", ruta, apartado)
+                os.replace(ruta, apartado)
+            else:
+                if fin < os.path.getsize(ruta):
+                    # El proceso murió a mitad de un registro: se descarta la cola dañada
+                    logger.warning("Diario %s: se truncan %d bytes dañados", ruta, os.path.getsize(ruta) - fin)
+                    with open(ruta, "r+b") as f:
+                        f.truncate(fin)
+        f = open(ruta, "ab")
+        if f.tell() == 0:
+            f.write(MAGIA)
+        return f
+
+    def _escribir(self, bufers: Dict[str, bytearray]) -> None:
+        with self._lock_ficheros:
+            for ruta, datos in bufers.items():
+                try:
+                    f = self._ficheros.get(ruta)
+                    if f is None:
+                        f = self._ficheros[ruta] = self._abrir(ruta)
+                    f.write(datos)
+                    f.flush()
+                    os.fsync(f.fileno())
+                    self._fsyncs += 1
+                except OSError:
+                    logger.exception("No se pudo escribir el diario %s", ruta)
+                    f = self._ficheros.pop(ruta, None)
+                    if f is not None:
+                        f.close()
+
+    def _bucle(self) -> None:
+        try:
+            while True:
+                with self._lock:
+                    self._cambio.wait_for(lambda: self._bufers or self._parar)
+                    if not self._bufers:
+                        # Detenido y sin nada pendiente
+                        self._hilo = None
+                        return
+                    bufers, self._bufers = self._bufers, {}
+                    objetivo = self._registrados
+                inicio = time.monotonic()
+                self._escribir(bufers)
+                with self._lock:
+                    self._sincronizados = objetivo
+                    self._cambio.notify_all()
+                if not self._parar:
+                    # Lo que llegue durante la ventana va en el siguiente fsync
+                    time.sleep(max(0.0, self._intervalo_fsync_s - (time.monotonic() - inicio)))
+        finally:
+            with self._lock_ficheros:
+                for f in self._ficheros.values():
+                    f.close()
+                self._ficheros.clear()
+
+
+# Diario compartido por todo el proceso
+DIARIO = DiarioEjecucion()
+
+
+# ===============
+# Herramienta
+# ===============
+
+def _describir(estado: EstadoDiario) -> str:
+    ultimo = estado.ultimo
+    lineas = [
+        f"Registros: {estado.registros}",
+        f"Última transición: {ultimo.tipo} ({time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ultimo.momento))})",
+        f"Estado del robot: {ultimo.estado}",
+    ]
+    inicio = estado.inicio_coccion
+    if inicio is not None:
+        lineas.append(
+            f"Última receta: {inicio.nombre_receta or '-'} "
+            f"(id {inicio.id_receta}, {inicio.origen or '-'})"
+        )
+    if estado.interrumpida:
+        lineas.append(
+            f"Cocción a medias: paso {ultimo.indice_paso + 1}/{ultimo.num_pasos}, "
+            f"segundo {ultimo.segundo_en_paso}, progreso {ultimo.progreso:.1f}%"
+        )
+    else:
+        lineas.append("Sin cocción a medias")
+    return "\n".join(lineas)
+
+
+def main() -> None:
+    argumentos = sys.argv[1:]
+    if not argumentos:
+        print("Uso: python -m robot.diario <fichero.diario> [--compactar [N]]")
+        sys.exit(2)
+    ruta = argumentos[0]
+    if len(argumentos) > 1 and argumentos[1] == "--compactar":
+        conservar = int(argumentos[2]) if len(argumentos) > 2 else CONSERVAR_COCCIONES
+        antes, despues = compactar_fichero(ruta, conservar)
+        print(f"Diario compactado: {antes} -> {despues} registros")
+    estado = reconstruir(ruta)
+    print(_describir(estado) if estado is not None else "El diario no tiene registros")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+"""
+Estimación vectorizada de duración, energía y carga de recetas (NumPy).
+
+A partir de la temperatura, la velocidad y el tiempo de cada paso se calcula,
+para muchas recetas a la vez y sin simular segundo a segundo:
+
+- la duración de cada receta, contando una espera fija por cada paso manual
+  (el tiempo que tarda el operador en confirmarlo) salvo los que se
+  confirman por adelantado durante el paso automático anterior;
+- su perfil de potencia del calentador y del motor a lo largo del tiempo,
+  como una matriz (recetas × intervalos de `resolucion_s` segundos);
+- el perfil agregado de una flota de robots que cocinan a la vez según un
+  plan (qué receta empieza en qué instante), para dimensionar la potencia
+  contratada de la cocina.
+
+El modelo de potencia por paso es el de robot.analitica. Dentro de un paso la
+potencia es constante, así que la energía acumulada es lineal a tramos: el
+perfil de todas las recetas sale de una única interpolación (np.interp) de esa
+energía en los bordes de los intervalos, y es exacto (la energía de cada
+intervalo es la que consumen los pasos que lo cubren, aunque sea en parte).
+"""
+
+from typing import NamedTuple, Optional, Sequence
+
+from . import analitica
+from .analitica import ColumnasPasos, np
+
+# Segundos que se suponen por paso manual (el operador lo hace y confirma)
+ESPERA_MANUAL_S = 60
+
+# Anchura por defecto de los intervalos de los perfiles
+RESOLUCION_S = 60
+
+
+class LoteRecetas(NamedTuple):
+    """
+    Recetas a estimar juntas: sus pasos en columnas y, por receta, la posición
+    de su primer paso y cuántos tiene. Una receta puede repetirse (un menú
+    con dos raciones del mismo plato) o no tener pasos.
+    """
+    columnas: ColumnasPasos
+    ids: "np.ndarray"
+    inicios: "np.ndarray"
+    num_pasos: "np.ndarray"
+
+    @property
+    def num_recetas(self) -> int:
+        return len(self.ids)
+
+
+class PerfilesRecetas(NamedTuple):
+    """
+    Perfiles de potencia por receta: la fila i de calentador_w / motor_w es la
+    potencia media (W) de la receta ids[i] en cada intervalo de resolucion_s
+    segundos desde su inicio. Tras su duración la potencia es 0.
+    """
+    ids: "np.ndarray"
+    duracion_s: "np.ndarray"
+    resolucion_s: int
+    calentador_w: "np.ndarray"
+    motor_w: "np.ndarray"
+
+    @property
+    def potencia_w(self) -> "np.ndarray":
+        return self.calentador_w + self.motor_w
+
+    @property
+    def energia_wh(self) -> "np.ndarray":
+        """Energía total (Wh) de cada receta."""
+        return self.potencia_w.sum(axis=1) * self.resolucion_s / 3600.0
+
+
+class PerfilFlota(NamedTuple):
+    """
+    Potencia agregada (W) de una flota en cada intervalo de resolucion_s
+    segundos desde el instante 0 del plan, y robots cocinando en cada uno.
+    """
+    resolucion_s: int
+    calentador_w: "np.ndarray"
+    motor_w: "np.ndarray"
+    robots_activos: "np.ndarray"
+
+    @property
+    def potencia_w(self) -> "np.ndarray":
+        return self.calentador_w + self.motor_w
+
+    @property
+    def pico_w(self) -> float:
+        potencia = self.potencia_w
+        return float(potencia.max()) if len(potencia) else 0.0
+
+    @property
+    def energia_wh(self) -> float:
+        return float(self.potencia_w.sum()) * self.resolucion_s / 3600.0
+
+
+# ===================
+# Lotes de recetas
+# ===================
+
+def lote_desde_columnas(columnas: ColumnasPasos) -> LoteRecetas:
+    """
+    Lote con las recetas de unas columnas ordenadas por (id_receta, orden),
+    p. ej. servicios.pasos_como_columnas(origen). Solo incluye recetas con pasos.
+    """
+    analitica._requerir_numpy()
+    inicios = analitica._inicios_recetas(columnas.id_receta)
+    num_pasos = np.diff(np.append(inicios, columnas.num_pasos))
+    return LoteRecetas(columnas, columnas.id_receta[inicios], inicios, num_pasos)
+
+
+def lote_desde_recetas(recetas: Sequence) -> LoteRecetas:
+    """Lote con una lista de objetos Receta, en su orden (admite repetidas)."""
+    columnas = analitica.columnas_de_recetas(recetas)
+    num_pasos = np.array([len(receta.pasos) for receta in recetas], dtype=np.intp)
+    inicios = np.cumsum(num_pasos) - num_pasos
+    ids = np.array([receta.id for receta in recetas], dtype=np.int64)
+    return LoteRecetas(columnas, ids, inicios, num_pasos)
+
+
+def _sumar_por_receta(lote: LoteRecetas, valores: "np.ndarray") -> "np.ndarray":
+    # reduceat no da 0 en los tramos vacíos: se suma sobre la acumulada
+    acumulada = np.concatenate(([0], np.cumsum(valores)))
+    return acumulada[lote.inicios + lote.num_pasos] - acumulada[lote.inicios]
+
+
+# ============
+# Duración
+# ============
+
+def pasos_adelantados(columnas: ColumnasPasos, inicios: Optional["np.ndarray"] = None) -> "np.ndarray":
+    """
+    Máscara de los pasos manuales que el operador puede confirmar por
+    adelantado durante el paso automático anterior, como en
+    RobotCocina._siguiente_adelantable: los marcados con puede_adelantarse
+    que siguen a un paso automático de su receta sin ningún paso manual no
+    adelantable en medio. `inicios` es la posición del primer paso de cada
+    receta (por defecto, donde cambia id_receta).
+    """
+    analitica._requerir_numpy()
+    if inicios is None:
+        inicios = analitica._inicios_recetas(columnas.id_receta)
+    posiciones = np.arange(columnas.num_pasos)
+    manual = columnas.manual == analitica.MANUAL
+    adelantable = manual & (columnas.adelantable != 0)
+    bloquea = manual & ~adelantable
+
+    # Para cada paso: inicio de su receta, último automático y último manual
+    # no adelantable hasta él (-1 si no hay)
+    marca_inicio = np.zeros(columnas.num_pasos, dtype=np.intp)
+    marca_inicio[inicios] = posiciones[inicios]
+    inicio_receta = np.maximum.accumulate(marca_inicio)
+    ultimo_automatico = np.maximum.accumulate(np.where(~manual, posiciones, -1))
+    ultimo_bloqueo = np.maximum.accumulate(np.where(bloquea, posiciones, -1))
+    return adelantable & (ultimo_automatico >= inicio_receta) & (ultimo_automatico > ultimo_bloqueo)
+
+
+def duracion_por_paso(
+    columnas: ColumnasPasos,
+    espera_manual_s: float = ESPERA_MANUAL_S,
+    adelanto_manual: bool = True,
+    inicios: Optional["np.ndarray"] = None,
+) -> "np.ndarray":
+    """
+    Segundos de cada paso: su tiempo si es automático, espera_manual_s si es
+    manual. Con adelanto_manual (como configura app.py), los pasos manuales
+    que pueden confirmarse por adelantado (pasos_adelantados) no esperan: 0.
+    """
+    analitica._requerir_numpy()
+    manual = columnas.manual == analitica.MANUAL
+    duracion = np.where(manual, float(espera_manual_s), columnas.tiempo_segundos.astype(np.float64))
+    if adelanto_manual:
+        # Se hacen mientras el robot sigue con el paso automático anterior
+        duracion[pasos_adelantados(columnas, inicios)] = 0.0
+    return duracion
+
+
+def duraciones(
+    lote: LoteRecetas,
+    espera_manual_s: float = ESPERA_MANUAL_S,
+    adelanto_manual: bool = True,
+) -> "np.ndarray":
+    """Duración estimada (s) de cada receta del lote, con las esperas manuales."""
+    return _sumar_por_receta(lote, duracion_por_paso(lote.columnas, espera_manual_s, adelanto_manual, lote.inicios))
+
+
+# ============
+# Perfiles
+# ============
+
+def _perfil(
+    lote: LoteRecetas,
+    duracion_paso: "np.ndarray",
+    potencia_paso: "np.ndarray",
+    num_intervalos: int,
+    resolucion_s: int,
+) -> "np.ndarray":
+    """
+    Potencia media por intervalo de cada receta. Las recetas se colocan una
+    tras otra en una línea de tiempo común, cada una en una ventana de
+    num_intervalos * resolucion_s segundos, y se interpola la energía
+    acumulada (creciente en toda la línea) en los bordes de los intervalos.
+    """
+    ventana = num_intervalos * resolucion_s
+    receta_de_paso = np.repeat(np.arange(lote.num_recetas), lote.num_pasos)
+
+    fin_paso = np.cumsum(duracion_paso)
+    inicio_receta = np.concatenate(([0.0], fin_paso))[lote.inicios]
+    energia = np.cumsum(potencia_paso * duracion_paso)
+    energia_antes = np.concatenate(([0.0], energia))[lote.inicios]
+
+    # Puntos (instante, energía acumulada): inicio de cada receta y fin de cada paso
+    origen = np.arange(lote.num_recetas) * float(ventana)
+    x = np.concatenate((origen, origen[receta_de_paso] + fin_paso - inicio_receta[receta_de_paso]))
+    y = np.concatenate((energia_antes, energia))
+    orden = np.argsort(x, kind="stable")
+
+    bordes = origen[:, None] + np.arange(num_intervalos + 1) * float(resolucion_s)
+    energia_bordes = np.interp(bordes.ravel(), x[orden], y[orden]).reshape(bordes.shape)
+    return np.diff(energia_bordes, axis=1) / resolucion_s
+
+
+def perfiles(
+    lote: LoteRecetas,
+    resolucion_s: int = RESOLUCION_S,
+    espera_manual_s: float = ESPERA_MANUAL_S,
+    adelanto_manual: bool = True,
+) -> PerfilesRecetas:
+    """
+    Perfiles de potencia del calentador y del motor de todas las recetas del
+    lote, con tantos intervalos como necesite la receta más larga.
+
+    Ocupan 2 × recetas × intervalos float64: para catálogos grandes conviene
+    subir resolucion_s.
+    """
+    if resolucion_s <= 0:
+        raise ValueError("La resolución debe ser mayor que 0")
+    columnas = lote.columnas
+    duracion_paso = duracion_por_paso(columnas, espera_manual_s, adelanto_manual, lote.inicios)
+    duracion = _sumar_por_receta(lote, duracion_paso)
+    num_intervalos = int(np.ceil(duracion.max() / resolucion_s)) if lote.num_recetas else 0
+
+    if num_intervalos == 0:
+        vacio = np.zeros((lote.num_recetas, 0))
+        return PerfilesRecetas(lote.ids, duracion, resolucion_s, vacio, vacio.copy())
+
+    return PerfilesRecetas(
+        lote.ids,
+        duracion,
+        resolucion_s,
+        _perfil(lote, duracion_paso, analitica.potencia_calentador_por_paso(columnas),
+                num_intervalos, resolucion_s),
+        _perfil(lote, duracion_paso, analitica.potencia_motor_por_paso(columnas),
+                num_intervalos, resolucion_s),
+    )
+
+
+# =========
+# Flota
+# =========
+
+def perfil_flota(
+    perfiles_recetas: PerfilesRecetas,
+    recetas: Sequence[int],
+    inicios_s: Sequence[float],
+) -> PerfilFlota:
+    """
+    Suma los perfiles de un plan de cocciones simultáneas: la cocción j es la
+    receta de la fila recetas[j] de perfiles_recetas y empieza inicios_s[j]
+    segundos después del instante 0 (redondeado hacia abajo al intervalo).
+    Cada cocción ocupa un robot mientras dura.
+    """
+    analitica._requerir_numpy()
+    filas = np.asarray(recetas, dtype=np.intp)
+    inicios = np.asarray(inicios_s, dtype=np.float64)
+    if filas.shape != inicios.shape:
+        raise ValueError("recetas e inicios_s deben tener la misma longitud")
+    if np.any(inicios < 0):
+        raise ValueError("Los inicios no pueden ser negativos")
+
+    resolucion_s = perfiles_recetas.resolucion_s
+    num_intervalos = perfiles_recetas.calentador_w.shape[1]
+    desplazamiento = (inicios // resolucion_s).astype(np.intp)
+    longitud = int(desplazamiento.max()) + num_intervalos if len(filas) else 0
+
+    # Intervalo de la flota al que va cada intervalo de cada cocción
+    destino = (desplazamiento[:, None] + np.arange(num_intervalos)).ravel()
+
+    def acumular(matriz: "np.ndarray") -> "np.ndarray":
+        return np.bincount(destino, weights=matriz[filas].ravel(), minlength=longitud)
+
+    # Un robot está activo en los intervalos que solapan su duración
+    ocupados = np.ceil(perfiles_recetas.duracion_s[filas] / resolucion_s)
+    activo = (np.arange(num_intervalos) < ocupados[:, None]).astype(np.float64)
+    robots = np.bincount(destino, weights=activo.ravel(), minlength=longitud)
+
+    return PerfilFlota(
+        resolucion_s,
+        acumular(perfiles_recetas.calentador_w),
+        acumular(perfiles_recetas.motor_w),
+        robots.astype(np.int64),
+    )
@@ -0,0 +1,351 @@
+"""
+Historial de cocciones: qué se cocinó, cuándo, cuánto tardó cada paso y
+cuánto esperó el robot al operador.
+
+HistorialCocciones observa a los robots registrados y acumula, por robot,
+las transiciones de la cocción en curso (los mismos RegistroDiario que
+guarda el diario de ejecución). Al completarse, cancelarse o fallar la
+receta, encola su fila en historial_cocciones en el escritor de BD: el hilo
+del robot no espera a la BD.
+
+Por cada cocción se guarda la receta, inicio y fin, pausas (número y
+tiempo), el tiempo real de cada paso (JSON, en segundos, pausas excluidas) y
+el tiempo parado esperando confirmación de pasos manuales. Un trigger mantiene
+en la misma transacción historial_diario, con los totales por día y receta,
+así que los resúmenes de meses no recorren el detalle.
+
+Las cocciones que aún están en el diario de ejecución (por ejemplo si el
+proceso murió antes de que se escribieran) pueden importarse con
+encolar_importar_diario: el índice único (robot, inicio) evita duplicados.
+"""
+
+import json
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from data.escritor import ESCRITOR
+from data.init_db import conexion_lectura
+from . import diario
+from .diario import RegistroDiario
+from .modelos import EventoRobot, RobotCocina, TipoEvento
+
+
+class Coccion(NamedTuple):
+    """Una cocción terminada. Instantes en segundos Unix."""
+    robot: str
+    id_receta: Optional[int]
+    origen_receta: Optional[str]
+    nombre_receta: str
+    resultado: str
+    inicio: float
+    fin: float
+    pausas: int
+    pausa_s: float
+    espera_manual_s: float
+    num_pasos: int
+    pasos_completados: int
+    duraciones_pasos: List[float]
+
+    @property
+    def duracion_s(self) -> float:
+        """Tiempo de reloj de la cocción, pausas incluidas."""
+        return self.fin - self.inicio
+
+    @property
+    def dia(self) -> str:
+        """Fecha local del inicio (AAAA-MM-DD)."""
+        return time.strftime("%Y-%m-%d", time.localtime(self.inicio))
+
+
+class TotalesHistorial(NamedTuple):
+    """Totales de un día o de una receta en un intervalo de días."""
+    clave: str
+    cocciones: int
+    completadas: int
+    canceladas: int
+    errores: int
+    duracion_s: float
+    pausas: int
+    pausa_s: float
+    espera_manual_s: float
+
+    @property
+    def duracion_media_s(self) -> float:
+        return self.duracion_s / self.cocciones if self.cocciones else 0.0
+
+    @property
+    def espera_manual_media_s(self) -> float:
+        return self.espera_manual_s / self.cocciones if self.cocciones else 0.0
+
+
+# ==============================
+# Acumulación de transiciones
+# ==============================
+
+class _CoccionEnCurso:
+    """Transiciones de una cocción hasta que termina."""
+
+    def __init__(self, inicio: RegistroDiario) -> None:
+        self.inicio = inicio
+        self.duraciones = [0.0] * inicio.num_pasos
+        self.indice = inicio.indice_paso
+        self.paso_desde: Optional[float] = inicio.momento
+        self.pausa_desde: Optional[float] = None
+        self.espera_desde: Optional[float] = None
+        self.pausas = 0
+        self.pausa_s = 0.0
+        self.espera_manual_s = 0.0
+
+    def _cerrar_paso(self, momento: float) -> None:
+        if self.paso_desde is not None and 0 <= self.indice < len(self.duraciones):
+            self.duraciones[self.indice] += momento - self.paso_desde
+        self.paso_desde = None
+
+    def _cerrar_espera(self, momento: float) -> None:
+        if self.espera_desde is not None:
+            self.espera_manual_s += momento - self.espera_desde
+            self.espera_desde = None
+
+    def registrar(self, registro: RegistroDiario) -> None:
+        tipo = registro.tipo
+        momento = registro.momento
+        if tipo == TipoEvento.PASO:
+            self._cerrar_paso(momento)
+            self.indice = registro.indice_paso
+            self.paso_desde = momento
+        elif tipo == TipoEvento.ESPERA_CONFIRMACION:
+            # Reanudar en plena espera la vuelve a anunciar: si no se cerró, sigue contando
+            if self.espera_desde is None:
+                self.espera_desde = momento
+        elif tipo == TipoEvento.CONFIRMACION:
+            self._cerrar_espera(momento)
+        elif tipo == TipoEvento.PAUSA:
+            # El tiempo en pausa no es espera al operador: al reanudar, la
+            # espera se vuelve a anunciar y se abre de nuevo
+            self._cerrar_paso(momento)
+            self._cerrar_espera(momento)
+            self.pausas += 1
+            self.pausa_desde = momento
+        elif tipo == TipoEvento.REANUDACION:
+            if self.pausa_desde is not None:
+                self.pausa_s += momento - self.pausa_desde
+                self.pausa_desde = None
+            if self.paso_desde is None:
+                self.paso_desde = momento
+
+    def terminar(self, robot: str, final: RegistroDiario) -> Coccion:
+        momento = final.momento
+        self._cerrar_paso(momento)
+        self._cerrar_espera(momento)
+        if self.pausa_desde is not None:
+            self.pausa_s += momento - self.pausa_desde
+        num_pasos = len(self.duraciones)
+        completados = num_pasos if final.tipo == TipoEvento.COMPLETADA else min(self.indice, num_pasos)
+        return Coccion(
+            robot,
+            self.inicio.id_receta,
+            self.inicio.origen,
+            self.inicio.nombre_receta or "",
+            final.tipo,
+            self.inicio.momento,
+            momento,
+            self.pausas,
+            self.pausa_s,
+            self.espera_manual_s,
+            num_pasos,
+            completados,
+            [round(segundos, 3) for segundos in self.duraciones],
+        )
+
+
+def cocciones_de_registros(robot: str, registros: Sequence[RegistroDiario]) -> List[Coccion]:
+    """Cocciones terminadas de una secuencia de registros (p. ej. un diario de ejecución)."""
+    resultado = []
+    for grupo in diario.cocciones(list(registros)):
+        if grupo[0].tipo != TipoEvento.INICIO or grupo[-1].tipo not in diario.TERMINALES:
+            continue
+        en_curso = _CoccionEnCurso(grupo[0])
+        for registro in grupo[1:-1]:
+            en_curso.registrar(registro)
+        resultado.append(en_curso.terminar(robot, grupo[-1]))
+    return resultado
+
+
+# ==============
+# Escritura
+# ==============
+
+def _fila(coccion: Coccion) -> Tuple:
+    return (
+        coccion.robot, coccion.id_receta, coccion.origen_receta, coccion.nombre_receta,
+        coccion.resultado, coccion.dia, coccion.inicio, coccion.fin, coccion.pausas,
+        coccion.pausa_s, coccion.espera_manual_s, coccion.num_pasos, coccion.pasos_completados,
+        json.dumps(coccion.duraciones_pasos),
+    )
+
+
+def encolar_guardar_cocciones(cocciones: Sequence[Coccion]) -> "Future[int]":
+    """
+    Encola en el escritor de BD el alta de varias cocciones (las que ya
+    estén guardadas se ignoran). El Future devuelve cuántas se añadieron.
+    """
+    filas = [_fila(coccion) for coccion in cocciones]
+
+    def comando(conn: sqlite3.Connection) -> int:
+        cur = conn.executemany(
+            """
+            INSERT OR IGNORE INTO historial_cocciones
+                (robot, id_receta, origen_receta, nombre_receta, resultado, dia, inicio, fin,
+                 pausas, pausa_s, espera_manual_s, num_pasos, pasos_completados, duraciones_pasos)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?);
+            """,
+            filas,
+        )
+        # rowcount suma las filas insertadas (sin las ignoradas ni las del trigger)
+        return cur.rowcount
+
+    return ESCRITOR.enviar(comando)
+
+
+def encolar_importar_diario(ruta: str, robot: str) -> "Future[int]":
+    """Encola el alta de las cocciones terminadas del diario de ejecución `ruta`."""
+    return encolar_guardar_cocciones(cocciones_de_registros(robot, list(diario.leer_registros(ruta))))
+
+
+# ==============
+# Consultas
+# ==============
+
+def _coccion_de_fila(fila: Tuple) -> Coccion:
+    return Coccion(*fila[:-1], json.loads(fila[-1]))
+
+
+def cocciones_entre(
+    desde: float,
+    hasta: float,
+    origen_receta: Optional[str] = None,
+    id_receta: Optional[int] = None,
+) -> List[Coccion]:
+    """
+    Cocciones que empezaron en [desde, hasta), de todas las recetas o de una
+    (id_receta con su origen_receta, 'base' o 'usuario').
+    """
+    if id_receta is not None and origen_receta is None:
+        raise ValueError("Para filtrar por id_receta hay que indicar origen_receta")
+    columnas = """
+        SELECT robot, id_receta, origen_receta, nombre_receta, resultado, inicio, fin,
+               pausas, pausa_s, espera_manual_s, num_pasos, pasos_completados, duraciones_pasos
+        FROM historial_cocciones
+    """
+    if id_receta is not None:
+        cur = conexion_lectura().execute(
+            columnas + """
+            WHERE origen_receta = ? AND id_receta = ? AND inicio >= ? AND inicio < ?
+            ORDER BY inicio;
+            """,
+            (origen_receta, id_receta, desde, hasta),
+        )
+    else:
+        cur = conexion_lectura().execute(
+            columnas + "WHERE inicio >= ? AND inicio < ? ORDER BY inicio;",
+            (desde, hasta),
+        )
+    return [_coccion_de_fila(fila) for fila in cur.fetchall()]
+
+
+_COLUMNAS_TOTALES = """
+    SUM(cocciones), SUM(completadas), SUM(canceladas), SUM(errores),
+    SUM(duracion_s), SUM(pausas), SUM(pausa_s), SUM(espera_manual_s)
+"""
+
+
+def totales_por_dia(desde_dia: str, hasta_dia: str) -> List[TotalesHistorial]:
+    """Totales de cada día de [desde_dia, hasta_dia] (AAAA-MM-DD) con cocciones."""
+    cur = conexion_lectura().execute(
+        f"""
+        SELECT dia, {_COLUMNAS_TOTALES}
+        FROM historial_diario
+        WHERE dia BETWEEN ? AND ?
+        GROUP BY dia
+        ORDER BY dia;
+        """,
+        (desde_dia, hasta_dia),
+    )
+    return [TotalesHistorial(*fila) for fila in cur.fetchall()]
+
+
+def totales_por_receta(desde_dia: str, hasta_dia: str) -> List[TotalesHistorial]:
+    """
+    Totales de cada receta en [desde_dia, hasta_dia], la más cocinada
+    primero. La clave es el nombre de la receta (el último registrado).
+    """
+    cur = conexion_lectura().execute(
+        f"""
+        SELECT MAX(nombre_receta), {_COLUMNAS_TOTALES}
+        FROM historial_diario
+        WHERE dia BETWEEN ? AND ?
+        GROUP BY origen_receta, id_receta
+        ORDER BY SUM(cocciones) DESC;
+        """,
+        (desde_dia, hasta_dia),
+    )
+    return [TotalesHistorial(*fila) for fila in cur.fetchall()]
+
+
+# =====================
+# Historial en vivo
+# =====================
+
+class HistorialCocciones:
+    """Guarda en el historial las cocciones de los robots registrados."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._observadores: Dict[int, Tuple[RobotCocina, object]] = {}
+        self._en_curso: Dict[int, _CoccionEnCurso] = {}
+
+    def registrar_robot(self, robot: RobotCocina, nombre: str) -> None:
+        """Empieza a guardar las cocciones de `robot`, identificado como `nombre`."""
+        clave = id(robot)
+
+        def observador(evento: EventoRobot) -> None:
+            self._al_evento(clave, nombre, evento)
+
+        with self._lock:
+            if clave in self._observadores:
+                return
+            self._observadores[clave] = (robot, observador)
+        robot.registrar_observador(observador)
+
+    def quitar_robot(self, robot: RobotCocina) -> None:
+        clave = id(robot)
+        with self._lock:
+            registro = self._observadores.pop(clave, None)
+            self._en_curso.pop(clave, None)
+        if registro is not None:
+            robot.quitar_observador(registro[1])
+
+    def _al_evento(self, clave: int, nombre: str, evento: EventoRobot) -> None:
+        # Se llama con el lock del robot tomado: solo acumula y, al final, encola
+        registro = diario.registro_de_evento(evento)
+        if registro is None:
+            return
+        with self._lock:
+            if registro.tipo == TipoEvento.INICIO:
+                self._en_curso[clave] = _CoccionEnCurso(registro)
+                return
+            en_curso = self._en_curso.get(clave)
+            if en_curso is None:
+                return
+            if registro.tipo not in diario.TERMINALES:
+                en_curso.registrar(registro)
+                return
+            del self._en_curso[clave]
+        encolar_guardar_cocciones([en_curso.terminar(nombre, registro)])
+
+
+# Historial compartido por todo el proceso
+HISTORIAL = HistorialCocciones()
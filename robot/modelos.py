@@ -1,6 +1,6 @@
 import threading
 import time
-from typing import List, Optional, Callable, Dict, Any
+from typing import List, Optional, Callable, Dict, Any, FrozenSet, NamedTuple, Tuple
 from utils.utils_tiempo import segundos_a_mmss
 from abc import ABC, abstractmethod
 
@@ -154,7 +154,8 @@ class PasoReceta:
     
     Ahora incluye los parámetros de ejecución específicos de este paso:
     - Para pasos automáticos: temperatura, tiempo_segundos, velocidad
-    - Para pasos manuales: instrucciones (texto libre)
+    - Para pasos manuales: instrucciones (texto libre) y si pueden
+      adelantarse (puede_adelantarse)
     """
 
     def __init__(
@@ -165,6 +166,7 @@ class PasoReceta:
         tiempo_segundos: Optional[int] = None,
         velocidad: Optional[int] = None,
         instrucciones: Optional[str] = None,
+        puede_adelantarse: bool = False,
     ) -> None:
         self._orden = orden
         self._proceso = proceso
@@ -172,6 +174,7 @@ class PasoReceta:
         self._tiempo_segundos = tiempo_segundos
         self._velocidad = velocidad
         self._instrucciones = instrucciones
+        self._puede_adelantarse = puede_adelantarse
 
     @property
     def orden(self) -> int:
@@ -201,11 +204,20 @@ class PasoReceta:
         """
         return self._instrucciones
 
+    @property
+    def puede_adelantarse(self) -> bool:
+        """
+        Solo en pasos manuales: el paso no depende del paso automático que lo
+        precede, así que puede hacerse (y confirmarse) mientras este sigue en
+        marcha si el robot tiene activado el adelanto de pasos manuales.
+        """
+        return self._puede_adelantarse
+
     def __repr__(self) -> str:
         return (
             f"PasoReceta(orden={self._orden}, proceso={self._proceso!r}, "
             f"temp={self._temperatura}, tiempo={self._tiempo_segundos}, "
-            f"vel={self._velocidad})"
+            f"vel={self._velocidad}, adelantable={self._puede_adelantarse})"
         )
 
 
@@ -310,6 +322,75 @@ class RecetaUsuario(Receta):
         return True
 
 
+class ResumenReceta(ConOrigen):
+    """
+    Datos de listado de una receta, sin sus pasos.
+
+    Se construye a partir de las columnas de resumen precalculadas en la BD,
+    de modo que los listados no necesitan cargar los pasos de cada receta.
+    La receta completa se obtiene con servicios.obtener_receta().
+    """
+
+    def __init__(
+        self,
+        id_: int,
+        nombre: str,
+        descripcion: str,
+        num_pasos: int,
+        pasos_manuales: int,
+        tiempo_automatico_segundos: int,
+        temperatura_maxima: int,
+        origen: str = "base",
+    ) -> None:
+        super().__init__(origen=origen)
+        self._id = id_
+        self._nombre = nombre
+        self._descripcion = descripcion
+        self._num_pasos = num_pasos
+        self._pasos_manuales = pasos_manuales
+        self._tiempo_automatico_segundos = tiempo_automatico_segundos
+        self._temperatura_maxima = temperatura_maxima
+
+    @property
+    def id(self) -> int:
+        return self._id
+
+    @property
+    def nombre(self) -> str:
+        return self._nombre
+
+    @property
+    def descripcion(self) -> str:
+        return self._descripcion
+
+    @property
+    def num_pasos(self) -> int:
+        return self._num_pasos
+
+    @property
+    def pasos_manuales(self) -> int:
+        return self._pasos_manuales
+
+    @property
+    def tiempo_automatico_segundos(self) -> int:
+        """Suma del tiempo de los pasos automáticos (los manuales no cuentan)."""
+        return self._tiempo_automatico_segundos
+
+    @property
+    def temperatura_maxima(self) -> int:
+        return self._temperatura_maxima
+
+    def es_editable(self) -> bool:
+        """Solo las recetas de usuario pueden editarse o eliminarse."""
+        return self.es_de_usuario()
+
+    def __repr__(self) -> str:
+        return (
+            f"ResumenReceta(id={self._id}, nombre={self._nombre!r}, "
+            f"pasos={self._num_pasos}, origen={self._origen!r})"
+        )
+
+
 # ===================
 # Estados del Robot
 # ===================
@@ -324,6 +405,113 @@ class EstadoRobot:
     ERROR = "ERROR"
 
 
+class InstantaneaRobot(NamedTuple):
+    """
+    Copia inmutable del estado visible del robot.
+
+    El hilo que modifica el robot publica una nueva instantánea tras cada
+    cambio; los lectores (la UI) solo leen la última publicada, sin lock.
+    """
+    estado: str = EstadoRobot.APAGADO
+    receta_actual: Optional['Receta'] = None
+    progreso: float = 0.0
+    paso_actual: Optional[PasoReceta] = None
+    indice_paso_actual: int = 0
+    segundo_en_paso: int = 0
+    receta_completada: bool = False
+    nombre_receta_completada: Optional[str] = None
+    manual_activo: bool = False
+    manual_temperatura: int = 0
+    manual_velocidad: int = 0
+    manual_tiempo_restante: int = 0
+    manual_tiempo_total: int = 0
+    # Paso manual anunciado: llega en proximo_manual_en_s segundos
+    proximo_manual_indice: Optional[int] = None
+    proximo_manual_en_s: Optional[int] = None
+    # Paso manual que puede confirmarse ya, mientras sigue el paso automático
+    adelantable_indice: Optional[int] = None
+
+    @property
+    def manual_progreso(self) -> float:
+        """Progreso de la cocción manual (0-100)."""
+        if self.manual_tiempo_total > 0:
+            return ((self.manual_tiempo_total - self.manual_tiempo_restante) /
+                    self.manual_tiempo_total) * 100.0
+        return 0.0
+
+
+class TipoEvento:
+    """Enum simulado de los eventos de ejecución de recetas del robot."""
+    INICIO = "INICIO"
+    REANUDACION = "REANUDACION"
+    PASO = "PASO"
+    AVISO_MANUAL = "AVISO_MANUAL"
+    ADELANTO = "ADELANTO"
+    ESPERA_CONFIRMACION = "ESPERA_CONFIRMACION"
+    CONFIRMACION = "CONFIRMACION"
+    PAUSA = "PAUSA"
+    COMPLETADA = "COMPLETADA"
+    CANCELADA = "CANCELADA"
+    ERROR = "ERROR"
+
+
+class EventoRobot(NamedTuple):
+    """
+    Transición de la ejecución de `receta`, con la instantánea del robot
+    justo después de ella y el momento (time.time()) en que ocurrió. Tras una
+    cancelación la instantánea puede no tener ya receta: la cancelada es
+    `receta`.
+    """
+    robot: 'RobotCocina'
+    tipo: str
+    receta: Optional['Receta']
+    instantanea: InstantaneaRobot
+    momento: float
+
+
+# ==========================
+# Cancelación cooperativa
+# ==========================
+
+class TokenCancelacion:
+    """
+    Token de cancelación cooperativa para un hilo de ejecución.
+
+    El hilo espera en el token en lugar de usar ``time.sleep``, de modo que
+    se despierta en cuanto se cancela su ejecución o se le avisa de un cambio
+    (pausa, confirmación). Cada ejecución tiene su propio token: al cancelarlo
+    el hilo termina sin tocar el estado del robot, que ya pertenece a quien
+    lo canceló.
+    """
+
+    def __init__(self) -> None:
+        self._cancelado = threading.Event()
+        self._aviso = threading.Event()
+
+    @property
+    def cancelado(self) -> bool:
+        return self._cancelado.is_set()
+
+    def cancelar(self) -> None:
+        """Marca la ejecución como cancelada y despierta al hilo."""
+        self._cancelado.set()
+        self._aviso.set()
+
+    def despertar(self) -> None:
+        """Despierta al hilo para que revise el estado (pausa, confirmación...)."""
+        self._aviso.set()
+
+    def esperar(self, segundos: float) -> bool:
+        """
+        Espera como máximo `segundos`.
+        Devuelve True si el hilo fue despertado antes de agotar la espera.
+        """
+        despertado = self._aviso.wait(max(0.0, segundos))
+        if despertado and not self.cancelado:
+            self._aviso.clear()
+        return despertado
+
+
 # =======================================
 # Estrategia de Ejecución (Polimorfismo)
 # =======================================
@@ -398,6 +586,14 @@ class RobotCocina:
     - Añade soporte para modo manual con temporizador
     - Política de preempción: solo una ejecución activa a la vez
     - Ajustes en caliente durante cocción manual
+    - Separación lector/escritor: el lock solo protege las modificaciones;
+      las lecturas usan una instantánea inmutable publicada tras cada cambio
+    - Preempción sin bloqueo: cada hilo tiene un TokenCancelacion; cancelar
+      lo despierta al instante y el nuevo hilo arranca sin esperar un join
+    - Adelanto opcional de pasos manuales independientes: con el adelanto
+      activado, los pasos manuales marcados con puede_adelantarse que siguen
+      al paso automático en curso pueden confirmarse antes de llegar a ellos,
+      y el robot ya no se detiene en ellos
     """
 
     # Constantes de validación para modo manual
@@ -408,11 +604,17 @@ class RobotCocina:
     TIEMPO_MIN = 1  # segundos
     TIEMPO_MAX = 5400  # 90 minutos
 
+    # Antelación por defecto con la que se anuncia un paso manual
+    ANTELACION_AVISO_MANUAL_S = 30
+
     def __init__(self) -> None:
         # Estado general
         self._estado = EstadoRobot.APAGADO
+        # Lock de escritura: solo lo toman quienes modifican el estado
         self._lock = threading.Lock()
         self._callback_actualizacion: Optional[Callable] = None
+        # Se sustituye la lista al modificarla: se recorre sin copiarla
+        self._observadores: List[Callable[[EventoRobot], None]] = []
 
         # Ejecución de recetas
         self._receta_actual: Optional[Receta] = None
@@ -420,10 +622,20 @@ class RobotCocina:
         self._indice_paso_actual = 0
         self._segundo_en_paso = 0
         self._hilo_coccion: Optional[threading.Thread] = None
-        self._parar = False
+        self._token_coccion: Optional[TokenCancelacion] = None
         self._pausado = False
         self._confirmado = False
 
+        # Anuncio del siguiente paso manual
+        self._antelacion_aviso_manual = self.ANTELACION_AVISO_MANUAL_S
+        self._proximo_manual_indice: Optional[int] = None
+        self._proximo_manual_en_s: Optional[int] = None
+
+        # Adelanto de pasos manuales: índices ya confirmados por adelantado
+        # (conjunto inmutable: se sustituye al cambiar, y así sirve de clave)
+        self._adelanto_manual = False
+        self._adelantados: FrozenSet[int] = frozenset()
+
         # TRACKING DE RECETA COMPLETADA
         self._receta_completada = False
         self._nombre_receta_completada: Optional[str] = None
@@ -435,99 +647,114 @@ class RobotCocina:
         self._manual_tiempo_restante = 0
         self._manual_tiempo_total = 0
         self._hilo_manual: Optional[threading.Thread] = None
-        self._manual_parar = False
+        self._token_manual: Optional[TokenCancelacion] = None
         self._manual_pausado = False
         
         # Estrategia de ejecución actual
         self._estrategia_actual: Optional[EstrategiaEjecucion] = None
 
+        # Última instantánea publicada para los lectores
+        self._instantanea = InstantaneaRobot()
+        # Paso actual y paso adelantable de la última publicación, con la
+        # clave del estado del que dependen: los ticks de cocción, que solo
+        # cambian segundo_en_paso o progreso, los reutilizan sin recalcular
+        self._clave_publicada: Optional[Tuple] = None
+        self._paso_publicado: Optional[PasoReceta] = None
+        self._adelantable_publicado: Optional[int] = None
+
     # ===== PROPIEDADES PÚBLICAS =====
+    # Se leen de la última instantánea publicada: no toman el lock, así que
+    # ningún lector bloquea al hilo de cocción.
+
+    @property
+    def instantanea(self) -> InstantaneaRobot:
+        """Estado completo y coherente del robot en un único objeto inmutable."""
+        return self._instantanea
 
     @property
     def estado(self) -> str:
-        with self._lock:
-            return self._estado
+        return self._instantanea.estado
 
     @property
     def receta_actual(self) -> Optional[Receta]:
-        with self._lock:
-            return self._receta_actual
+        return self._instantanea.receta_actual
 
     @property
     def progreso(self) -> float:
-        with self._lock:
-            return self._progreso
+        return self._instantanea.progreso
 
     @property
     def paso_actual(self) -> Optional[PasoReceta]:
-        with self._lock:
-            if self._receta_actual and 0 <= self._indice_paso_actual < len(self._receta_actual.pasos):
-                return self._receta_actual.pasos[self._indice_paso_actual]
-            return None
+        return self._instantanea.paso_actual
 
     @property
     def indice_paso_actual(self) -> int:
-        with self._lock:
-            return self._indice_paso_actual
+        return self._instantanea.indice_paso_actual
 
     @property
     def segundo_en_paso(self) -> int:
-        with self._lock:
-            return self._segundo_en_paso
+        return self._instantanea.segundo_en_paso
+
+    @property
+    def proximo_manual_en_s(self) -> Optional[int]:
+        """Segundos hasta el siguiente paso manual, si ya se ha anunciado."""
+        return self._instantanea.proximo_manual_en_s
+
+    @property
+    def antelacion_aviso_manual(self) -> int:
+        return self._antelacion_aviso_manual
+
+    @property
+    def adelanto_manual(self) -> bool:
+        return self._adelanto_manual
+
+    @property
+    def adelantable_indice(self) -> Optional[int]:
+        """Paso manual que adelantar_paso_manual puede confirmar ahora por adelantado."""
+        return self._instantanea.adelantable_indice
 
     # PROPIEDADES PARA RECETA COMPLETADA
     @property
     def receta_completada(self) -> bool:
         """Indica si se completó una receta recientemente."""
-        with self._lock:
-            return self._receta_completada
+        return self._instantanea.receta_completada
 
     @property
     def nombre_receta_completada(self) -> Optional[str]:
         """Nombre de la receta que se completó."""
-        with self._lock:
-            return self._nombre_receta_completada
+        return self._instantanea.nombre_receta_completada
 
     # ===== PROPIEDADES PARA MODO MANUAL =====
 
     @property
     def manual_activo(self) -> bool:
         """Indica si el modo manual está ejecutándose."""
-        with self._lock:
-            return self._manual_activo
+        return self._instantanea.manual_activo
 
     @property
     def manual_temperatura(self) -> int:
         """Temperatura actual en modo manual."""
-        with self._lock:
-            return self._manual_temperatura
+        return self._instantanea.manual_temperatura
 
     @property
     def manual_velocidad(self) -> int:
         """Velocidad actual en modo manual."""
-        with self._lock:
-            return self._manual_velocidad
+        return self._instantanea.manual_velocidad
 
     @property
     def manual_tiempo_restante(self) -> int:
         """Tiempo restante en segundos en modo manual."""
-        with self._lock:
-            return self._manual_tiempo_restante
+        return self._instantanea.manual_tiempo_restante
 
     @property
     def manual_tiempo_total(self) -> int:
         """Tiempo total configurado para la cocción manual."""
-        with self._lock:
-            return self._manual_tiempo_total
+        return self._instantanea.manual_tiempo_total
 
     @property
     def manual_progreso(self) -> float:
         """Progreso de la cocción manual (0-100)."""
-        with self._lock:
-            if self._manual_tiempo_total > 0:
-                return ((self._manual_tiempo_total - self._manual_tiempo_restante) / 
-                        self._manual_tiempo_total) * 100.0
-            return 0.0
+        return self._instantanea.manual_progreso
 
     # ===== MÉTODOS DE CONFIGURACIÓN =====
 
@@ -538,11 +765,59 @@ class RobotCocina:
         with self._lock:
             self._callback_actualizacion = callback
 
+    def registrar_observador(self, callback: Callable[[EventoRobot], None]) -> None:
+        """
+        Registra un callback que recibe un EventoRobot en cada transición de
+        la ejecución de recetas (inicio, cambio de paso, espera de
+        confirmación, pausa, fin, cancelación, error).
+
+        Se llama con el lock del robot tomado y desde el hilo que hace la
+        transición: debe ser rápido y no puede llamar a métodos del robot
+        (para reaccionar a un evento, encolarlo y atenderlo en otro hilo).
+        """
+        with self._lock:
+            if callback not in self._observadores:
+                self._observadores = self._observadores + [callback]
+
+    def quitar_observador(self, callback: Callable[[EventoRobot], None]) -> None:
+        """Deja de avisar a un callback registrado con registrar_observador."""
+        with self._lock:
+            self._observadores = [c for c in self._observadores if c != callback]
+
+    def configurar_aviso_manual(self, segundos: int) -> None:
+        """
+        Segundos de antelación con los que se anuncia cada paso manual
+        (evento AVISO_MANUAL y proximo_manual_en_s). 0 desactiva el anuncio.
+        """
+        if segundos < 0:
+            raise ValueError("La antelación no puede ser negativa")
+        with self._lock:
+            self._antelacion_aviso_manual = segundos
+
+    def configurar_adelanto_manual(self, activo: bool) -> None:
+        """
+        Activa o desactiva el adelanto de pasos manuales. Con él activo,
+        mientras se ejecuta un paso automático, adelantar_paso_manual confirma
+        por adelantado el siguiente paso manual si está marcado con
+        puede_adelantarse (y, al repetirla, los siguientes pasos manuales
+        seguidos que también lo estén). Los pasos ya adelantados se respetan
+        aunque luego se desactive.
+        """
+        with self._lock:
+            self._adelanto_manual = activo
+            self._publicar()
+
     def _reset_progreso_y_posicion(self) -> None:
         """Resetea el progreso y la posición en la receta."""
         self._progreso = 0.0
         self._indice_paso_actual = 0
         self._segundo_en_paso = 0
+        self._reset_aviso_manual()
+        self._adelantados = frozenset()
+
+    def _reset_aviso_manual(self) -> None:
+        self._proximo_manual_indice = None
+        self._proximo_manual_en_s = None
 
     def _reset_estado_manual(self) -> None:
         """Resetea el estado del modo manual."""
@@ -551,13 +826,38 @@ class RobotCocina:
         self._manual_velocidad = 0
         self._manual_tiempo_restante = 0
         self._manual_tiempo_total = 0
-        self._manual_parar = False
         self._manual_pausado = False
 
-    # ===== VALIDACIÓN DE PARÁMETROS MANUALES =====
+    def _cancelar_hilo_coccion(self) -> None:
+        """
+        Cancela el hilo de receta en curso sin esperarlo. El hilo se despierta
+        al instante y termina sin modificar el estado del robot.
+        """
+        if self._token_coccion is not None:
+            self._token_coccion.cancelar()
+            self._token_coccion = None
 
+    def _receta_en_curso(self) -> bool:
+        """True si hay una receta empezada y sin terminar (aunque esté pausada)."""
+        return (
+            isinstance(self._estrategia_actual, EjecucionReceta)
+            and self._estado in (EstadoRobot.COCINANDO, EstadoRobot.PAUSADO,
+                                 EstadoRobot.ESPERANDO_CONFIRMACION)
+        )
+
+    def _cancelar_hilo_manual(self) -> None:
+        """Cancela el hilo de cocción manual en curso sin esperarlo."""
+        if self._token_manual is not None:
+            self._token_manual.cancelar()
+            self._token_manual = None
+
+    # ===== VALIDACIONES =====
+    # Son de clase y reciben el estado como argumentos: el robot virtual del
+    # simulador (robot/simulador.py) aplica las mismas guardas.
+
+    @classmethod
     def _validar_parametros_manuales(
-        self, 
+        cls,
         temperatura: int, 
         velocidad: int, 
         tiempo: int
@@ -566,17 +866,65 @@ class RobotCocina:
         Valida los parámetros para cocción manual.
         Lanza ModoManualError si alguno es inválido.
         """
-        if not (self.TEMP_MIN <= temperatura <= self.TEMP_MAX):
+        if not (cls.TEMP_MIN <= temperatura <= cls.TEMP_MAX):
             raise ModoManualError(
-                f"Temperatura debe estar entre {self.TEMP_MIN}°C y {self.TEMP_MAX}°C"
+                f"Temperatura debe estar entre {cls.TEMP_MIN}°C y {cls.TEMP_MAX}°C"
             )
-        if not (self.VEL_MIN <= velocidad <= self.VEL_MAX):
+        if not (cls.VEL_MIN <= velocidad <= cls.VEL_MAX):
             raise ModoManualError(
-                f"Velocidad debe estar entre {self.VEL_MIN} y {self.VEL_MAX}"
+                f"Velocidad debe estar entre {cls.VEL_MIN} y {cls.VEL_MAX}"
             )
-        if not (self.TIEMPO_MIN <= tiempo <= self.TIEMPO_MAX):
+        if not (cls.TIEMPO_MIN <= tiempo <= cls.TIEMPO_MAX):
             raise ModoManualError(
-                f"Tiempo debe estar entre {self.TIEMPO_MIN}s y {self.TIEMPO_MAX}s (90 min)"
+                f"Tiempo debe estar entre {cls.TIEMPO_MIN}s y {cls.TIEMPO_MAX}s (90 min)"
+            )
+
+    @classmethod
+    def _validar_inicio_manual(
+        cls,
+        estado: str,
+        estrategia: Optional[EstrategiaEjecucion],
+        manual_activo: bool,
+        temperatura: int,
+        velocidad: int,
+        tiempo: int,
+        forzar: bool,
+    ) -> None:
+        """Guardas de iniciar_manual."""
+        if estado == EstadoRobot.APAGADO:
+            raise RobotApagadoError("No se puede cocinar con el robot apagado.")
+
+        # Validar parámetros
+        cls._validar_parametros_manuales(temperatura, velocidad, tiempo)
+
+        # Verificar conflicto con receta activa
+        if not forzar and estrategia is not None:
+            if isinstance(estrategia, EjecucionReceta):
+                raise ConflictoEjecucionError(
+                    "Hay una receta en ejecución. Debe cancelarla primero."
+                )
+            elif isinstance(estrategia, EjecucionManual) and manual_activo:
+                raise ConflictoEjecucionError(
+                    "Ya hay una cocción manual activa. Debe cancelarla primero."
+                )
+
+    @staticmethod
+    def _validar_inicio_coccion(
+        estado: str,
+        receta: Optional[Receta],
+        manual_activo: bool,
+        forzar: bool,
+    ) -> None:
+        """Guardas de iniciar_coccion."""
+        if estado == EstadoRobot.APAGADO:
+            raise RobotApagadoError("No se puede cocinar con el robot apagado.")
+        if receta is None:
+            raise RecetaNoSeleccionadaError("No hay ninguna receta seleccionada.")
+
+        # Verificar conflicto con manual activo
+        if not forzar and manual_activo:
+            raise ConflictoEjecucionError(
+                "Hay una cocción manual activa. Debe cancelarla primero."
             )
 
     # ===== CONTROL DE ENCENDIDO/APAGADO =====
@@ -593,13 +941,10 @@ class RobotCocina:
         Apaga el robot. Detiene cualquier proceso en curso.
         """
         with self._lock:
-            # Detener receta si está activa
-            if self._hilo_coccion and self._hilo_coccion.is_alive():
-                self._parar = True
-            
-            # Detener manual si está activo
-            if self._hilo_manual and self._hilo_manual.is_alive():
-                self._manual_parar = True
+            cancelada = self._receta_actual if self._receta_en_curso() else None
+            # Detener receta y manual si están activos
+            self._cancelar_hilo_coccion()
+            self._cancelar_hilo_manual()
             
             self._receta_actual = None
             self._estado = EstadoRobot.APAGADO
@@ -612,6 +957,8 @@ class RobotCocina:
             self._nombre_receta_completada = None
             
             self._notificar_cambio()
+            if cancelada is not None:
+                self._emitir(TipoEvento.CANCELADA, cancelada)
 
     # ===== SELECCIÓN DE RECETA =====
 
@@ -625,7 +972,6 @@ class RobotCocina:
             if self._estado != EstadoRobot.APAGADO:
                 self._estado = EstadoRobot.ESPERA
             self._reset_progreso_y_posicion()
-            self._parar = False
             self._pausado = False
             self._confirmado = False
             self._notificar_cambio()
@@ -654,45 +1000,19 @@ class RobotCocina:
             ConflictoEjecucionError: Si hay una ejecución activa y forzar=False
         """
         with self._lock:
-            if self._estado == EstadoRobot.APAGADO:
-                raise RobotApagadoError("No se puede cocinar con el robot apagado.")
-            
-            # Validar parámetros
-            self._validar_parametros_manuales(temperatura, velocidad, tiempo)
-            
-            # Verificar conflicto con receta activa
-            if not forzar and self._estrategia_actual is not None:
-                if isinstance(self._estrategia_actual, EjecucionReceta):
-                    raise ConflictoEjecucionError(
-                        "Hay una receta en ejecución. Debe cancelarla primero."
-                    )
-                elif isinstance(self._estrategia_actual, EjecucionManual) and self._manual_activo:
-                    raise ConflictoEjecucionError(
-                        "Ya hay una cocción manual activa. Debe cancelarla primero."
-                    )
-            
-            # Si llegamos aquí y hay algo activo, lo cancelamos (forzar=True)
-            if self._hilo_coccion and self._hilo_coccion.is_alive():
-                self._parar = True
-                # Liberar lock temporalmente para permitir que el hilo termine
-                self._lock.release()
-                try:
-                    self._hilo_coccion.join(timeout=3.0)
-                finally:
-                    self._lock.acquire()
+            self._validar_inicio_manual(
+                self._estado, self._estrategia_actual, self._manual_activo,
+                temperatura, velocidad, tiempo, forzar,
+            )
             
-            if self._hilo_manual and self._hilo_manual.is_alive():
-                self._manual_parar = True
-                # Liberar lock temporalmente para permitir que el hilo termine
-                self._lock.release()
-                try:
-                    self._hilo_manual.join(timeout=3.0)
-                finally:
-                    self._lock.acquire()
+            # Si llegamos aquí y hay algo activo, lo cancelamos (forzar=True).
+            # No esperamos a los hilos: sus tokens los despiertan y terminan solos.
+            cancelada = self._receta_actual if self._receta_en_curso() else None
+            self._cancelar_hilo_coccion()
+            self._cancelar_hilo_manual()
             
             # Resetear estados de ejecuciones previas
             self._reset_progreso_y_posicion()
-            self._parar = False
             self._pausado = False
             
             # Configurar parámetros manuales
@@ -701,7 +1021,6 @@ class RobotCocina:
             self._manual_tiempo_restante = tiempo
             self._manual_tiempo_total = tiempo
             self._manual_activo = True
-            self._manual_parar = False
             self._manual_pausado = False
             
             # Limpiar receta actual al entrar en modo manual
@@ -711,12 +1030,16 @@ class RobotCocina:
             self._estrategia_actual = EjecucionManual(temperatura, velocidad, tiempo)
             self._estado = EstadoRobot.COCINANDO
             
-            # Iniciar hilo de ejecución manual
+            # Iniciar hilo de ejecución manual con su propio token
+            self._token_manual = TokenCancelacion()
             self._hilo_manual = threading.Thread(
                 target=self._ejecutar_manual_en_hilo,
+                args=(self._token_manual,),
                 daemon=True,
             )
             self._notificar_cambio()
+            if cancelada is not None:
+                self._emitir(TipoEvento.CANCELADA, cancelada)
             self._hilo_manual.start()
 
     # ===== AJUSTAR PARÁMETROS EN CALIENTE =====
@@ -781,9 +1104,14 @@ class RobotCocina:
             if self._estado == EstadoRobot.COCINANDO:
                 if self._manual_activo:
                     self._manual_pausado = True
+                    token = self._token_manual
                 else:
                     self._pausado = True
-                # El estado visible cambiará a PAUSADO cuando el hilo lo procese.
+                    token = self._token_coccion
+                # El estado visible cambiará a PAUSADO cuando el hilo lo procese,
+                # en cuanto se despierte.
+                if token is not None:
+                    token.despertar()
 
     def detener_coccion(self) -> None:
         """
@@ -793,15 +1121,15 @@ class RobotCocina:
         with self._lock:
             if self._estado in (EstadoRobot.COCINANDO, EstadoRobot.PAUSADO, 
                                 EstadoRobot.ESPERA, EstadoRobot.ESPERANDO_CONFIRMACION):
+                cancelada = self._receta_actual if self._receta_en_curso() else None
                 # Cancelar receta
-                self._parar = True
+                self._cancelar_hilo_coccion()
                 self._pausado = False
                 self._confirmado = False
                 self._reset_progreso_y_posicion()
                 
                 # Cancelar manual
-                self._manual_parar = True
-                self._manual_pausado = False
+                self._cancelar_hilo_manual()
                 self._reset_estado_manual()
                 
                 self._estrategia_actual = None
@@ -812,17 +1140,48 @@ class RobotCocina:
                 self._nombre_receta_completada = None
                 
                 self._notificar_cambio()
+                if cancelada is not None:
+                    self._emitir(TipoEvento.CANCELADA, cancelada)
 
     # ===== CONFIRMACIÓN DE PASO MANUAL =====
 
-    def confirmar_paso_manual(self) -> None:
+    def confirmar_paso_manual(self, indice: Optional[int] = None) -> bool:
         """
         El usuario confirma que ha completado el paso manual.
         El hilo de cocción continuará.
+
+        Con `indice`, solo confirma si ese es el paso que está esperando
+        (dos operadores que confirman el mismo paso no confirman el
+        siguiente). Devuelve si se confirmó; una confirmación repetida del
+        mismo paso no hace nada.
         """
         with self._lock:
-            if self._estado == EstadoRobot.ESPERANDO_CONFIRMACION:
-                self._confirmado = True
+            if (self._estado != EstadoRobot.ESPERANDO_CONFIRMACION or self._confirmado
+                    or (indice is not None and indice != self._indice_paso_actual)):
+                return False
+            self._confirmado = True
+            self._emitir(TipoEvento.CONFIRMACION)
+            if self._token_coccion is not None:
+                self._token_coccion.despertar()
+            return True
+
+    def adelantar_paso_manual(self, indice_esperado: int) -> bool:
+        """
+        Confirma por adelantado el paso manual `indice_esperado`, si es el
+        que puede adelantarse ahora (adelantable_indice): al llegar a él, el
+        robot sigue sin detenerse. Devuelve si se adelantó; con otro índice
+        (p. ej. un segundo clic sobre el mismo paso) no hace nada.
+        """
+        with self._lock:
+            if self._siguiente_adelantable() != indice_esperado:
+                return False
+            self._adelantados = self._adelantados | {indice_esperado}
+            if self._proximo_manual_indice == indice_esperado:
+                # Ya hecho: no hay que anunciarlo
+                self._reset_aviso_manual()
+            self._notificar_cambio()
+            self._emitir(TipoEvento.ADELANTO)
+            return True
 
     # MÉTODO PARA LIMPIAR RECETA COMPLETADA
     def limpiar_receta_completada(self) -> None:
@@ -852,75 +1211,69 @@ class RobotCocina:
             ConflictoEjecucionError: Si hay cocción manual activa y forzar=False
         """
         with self._lock:
-            if self._estado == EstadoRobot.APAGADO:
-                raise RobotApagadoError("No se puede cocinar con el robot apagado.")
-            if self._receta_actual is None:
-                raise RecetaNoSeleccionadaError("No hay ninguna receta seleccionada.")
-            
-            # Verificar conflicto con manual activo
-            if not forzar and self._manual_activo:
-                raise ConflictoEjecucionError(
-                    "Hay una cocción manual activa. Debe cancelarla primero."
-                )
+            self._validar_inicio_coccion(self._estado, self._receta_actual, self._manual_activo, forzar)
             
-            # Si hay manual activo y forzar=True, lo cancelamos
-            if self._hilo_manual and self._hilo_manual.is_alive():
-                self._manual_parar = True
-                # Liberar lock temporalmente para permitir que el hilo termine
-                self._lock.release()
-                try:
-                    self._hilo_manual.join(timeout=3.0)
-                finally:
-                    self._lock.acquire()
+            # Si hay manual activo y forzar=True, lo cancelamos sin esperarlo
+            if self._token_manual is not None:
+                self._cancelar_hilo_manual()
                 self._reset_estado_manual()
 
             # ¿Reanudar desde pausa o confirmación?
-            if self._estado in (EstadoRobot.PAUSADO, EstadoRobot.ESPERANDO_CONFIRMACION):
+            reanudacion = self._estado in (EstadoRobot.PAUSADO, EstadoRobot.ESPERANDO_CONFIRMACION)
+            if reanudacion:
                 # No reseteamos progreso ni posición
                 self._pausado = False
-                self._parar = False
                 self._confirmado = False
             else:
                 # Inicio desde cero
                 self._reset_progreso_y_posicion()
-                self._parar = False
                 self._pausado = False
                 self._confirmado = False
 
-            # Si ya hay un hilo corriendo, lo marcamos para parar
-            if self._hilo_coccion and self._hilo_coccion.is_alive():
-                self._parar = True
+            # Si ya hay un hilo corriendo, lo cancelamos: el nuevo toma el relevo
+            self._cancelar_hilo_coccion()
 
             # Establecer estrategia
             self._estrategia_actual = EjecucionReceta(self._receta_actual)
 
-            # Nuevo hilo de cocción
+            # Nuevo hilo de cocción con su propio token
+            self._token_coccion = TokenCancelacion()
             self._hilo_coccion = threading.Thread(
                 target=self._ejecutar_receta_en_hilo,
+                args=(self._token_coccion,),
                 daemon=True,
             )
             self._estado = EstadoRobot.COCINANDO
             self._notificar_cambio()
+            self._emitir(TipoEvento.REANUDACION if reanudacion else TipoEvento.INICIO)
             self._hilo_coccion.start()
 
     # ===== HILO DE COCCIÓN MANUAL =====
 
-    def _ejecutar_manual_en_hilo(self) -> None:
+    def _ejecutar_manual_en_hilo(self, token: Optional[TokenCancelacion] = None) -> None:
         """
         Ejecuta la cocción manual: decrementa el temporizador cada segundo
         hasta que llegue a 0 o sea pausado/cancelado.
+
+        Espera en su token, así que una cancelación o una pausa se atienden
+        al momento. Si el token se cancela, el hilo termina sin tocar el
+        estado: quien lo canceló ya se ha hecho cargo de él.
         """
+        if token is None:
+            token = self._token_manual or TokenCancelacion()
         try:
+            fin_segundo = time.monotonic() + 1
             while True:
-                time.sleep(1)
+                token.esperar(fin_segundo - time.monotonic())
                 
                 with self._lock:
-                    # Verificar cancelación o apagado
-                    if self._manual_parar or self._estado == EstadoRobot.APAGADO:
+                    # Ejecución cancelada o sustituida por otra
+                    if token.cancelado:
+                        return
+
+                    # Verificar apagado
+                    if self._estado == EstadoRobot.APAGADO:
                         self._reset_estado_manual()
-                        # Solo cambiar a ESPERA si NO está apagado
-                        if self._estado != EstadoRobot.APAGADO:
-                            self._estado = EstadoRobot.ESPERA
                         self._estrategia_actual = None
                         self._receta_actual = None
                         self._notificar_cambio()
@@ -928,11 +1281,13 @@ class RobotCocina:
                     
                     # Verificar pausa
                     if self._manual_pausado:
-                        # Solo pausar si no está apagado
-                        if self._estado != EstadoRobot.APAGADO:
-                            self._estado = EstadoRobot.PAUSADO
-                            self._notificar_cambio()
+                        self._estado = EstadoRobot.PAUSADO
+                        self._notificar_cambio()
                         return
+
+                    # Despertado antes de completar el segundo: seguir esperando
+                    if time.monotonic() < fin_segundo:
+                        continue
                     
                     # Decrementar temporizador
                     if self._manual_tiempo_restante > 0:
@@ -946,9 +1301,11 @@ class RobotCocina:
                         # Esperar un momento para que la UI se actualice
                         self._lock.release()
                         try:
-                            time.sleep(0.2)  # 200ms para que la UI renderice
+                            token.esperar(0.2)  # 200ms para que la UI renderice
                         finally:
                             self._lock.acquire()
+                        if token.cancelado:
+                            return
                         
                         self._reset_estado_manual()
                         # Solo cambiar a ESPERA si NO está apagado
@@ -956,11 +1313,16 @@ class RobotCocina:
                             self._estado = EstadoRobot.ESPERA
                         self._estrategia_actual = None
                         self._receta_actual = None
+                        self._token_manual = None
                         self._notificar_cambio()
                         return
+
+                fin_segundo += 1
                         
         except Exception:
             with self._lock:
+                if token.cancelado:
+                    return
                 # Solo cambiar a ERROR si no está apagado
                 if self._estado != EstadoRobot.APAGADO:
                     self._estado = EstadoRobot.ERROR
@@ -971,13 +1333,22 @@ class RobotCocina:
 
     # ===== HILO DE COCCIÓN DE RECETAS =====
 
-    def _ejecutar_receta_en_hilo(self) -> None:
+    def _ejecutar_receta_en_hilo(self, token: Optional[TokenCancelacion] = None) -> None:
         """
         Ejecuta la receta actual de forma incremental, permitiendo pausa y cancelación.
         Guarda en qué paso y segundo va, para poder reanudar.
         
         Los pasos manuales pausan automáticamente y esperan confirmación del usuario.
+        Las esperas se hacen sobre el token, que despierta al hilo en cuanto hay
+        una pausa, una confirmación o una cancelación.
+
+        Entre bloque y bloque se suelta el lock, así que cada bloque que toca el
+        estado vuelve a comprobar el token: si otra llamada lo ha cancelado
+        mientras tanto, el estado ya es suyo y el hilo termina sin tocarlo.
         """
+        if token is None:
+            token = self._token_coccion or TokenCancelacion()
+        receta: Optional[Receta] = None
         try:
             with self._lock:
                 receta = self._receta_actual
@@ -987,18 +1358,22 @@ class RobotCocina:
                 total_pasos = len(pasos)
                 i = self._indice_paso_actual
                 t = self._segundo_en_paso
+                hasta_manual = self._compilar_hasta_manual(pasos)
 
             if total_pasos == 0:
                 with self._lock:
+                    if token.cancelado:
+                        return
                     self._estado = EstadoRobot.ERROR
                     self._progreso = 0.0
                     self._estrategia_actual = None
                     self._notificar_cambio()
+                    self._emitir(TipoEvento.ERROR)
                 return
 
             while True:
                 with self._lock:
-                    if self._parar or self._estado == EstadoRobot.APAGADO:
+                    if token.cancelado or self._estado == EstadoRobot.APAGADO:
                         raise ProcesoInterrumpidoError("Proceso cancelado por el usuario.")
                     if i >= total_pasos:
                         break  # receta completada
@@ -1010,21 +1385,30 @@ class RobotCocina:
                 # ===== PASO MANUAL =====
                 if proceso.es_manual():
                     with self._lock:
-                        self._estado = EstadoRobot.ESPERANDO_CONFIRMACION
-                        self._confirmado = False
-                        self._notificar_cambio()
+                        if token.cancelado:
+                            return
+                        # Confirmado por adelantado: se pasa sin detenerse
+                        adelantado = i in self._adelantados
+                        if not adelantado:
+                            self._estado = EstadoRobot.ESPERANDO_CONFIRMACION
+                            self._confirmado = False
+                            self._reset_aviso_manual()
+                            self._notificar_cambio()
+                            self._emitir(TipoEvento.ESPERA_CONFIRMACION)
 
-                    # Esperar confirmación del usuario
-                    while True:
-                        time.sleep(0.5)
+                    # Esperar confirmación del usuario (el token nos despierta)
+                    while not adelantado:
+                        token.esperar(0.5)
                         with self._lock:
-                            if self._parar or self._estado == EstadoRobot.APAGADO:
+                            if token.cancelado or self._estado == EstadoRobot.APAGADO:
                                 raise ProcesoInterrumpidoError("Proceso cancelado por el usuario.")
                             if self._confirmado:
                                 break
 
                     # Usuario confirmó, avanzar al siguiente paso
                     with self._lock:
+                        if token.cancelado:
+                            return
                         i += 1
                         t = 0
                         self._indice_paso_actual = i
@@ -1033,43 +1417,65 @@ class RobotCocina:
                         self._progreso = (i / total_pasos) * 100.0
                         self._estado = EstadoRobot.COCINANDO
                         self._notificar_cambio()
+                        if i < total_pasos:
+                            self._emitir(TipoEvento.PASO)
                     continue
 
                 # ===== PASO AUTOMÁTICO =====
                 duracion = max(1, paso.tiempo_segundos or 1)
+                with self._lock:
+                    if token.cancelado:
+                        return
+                    self._actualizar_aviso_manual(hasta_manual[i], t)
 
                 # Ejecutar los "segundos" de este paso
+                fin_segundo = time.monotonic() + 1
                 while t < duracion:
-                    time.sleep(1)
+                    token.esperar(fin_segundo - time.monotonic())
 
                     with self._lock:
-                        if self._parar or self._estado == EstadoRobot.APAGADO:
+                        if token.cancelado or self._estado == EstadoRobot.APAGADO:
                             raise ProcesoInterrumpidoError("Proceso cancelado por el usuario.")
                         if self._pausado:
                             # Guardar posición actual y pasar a PAUSADO
                             self._indice_paso_actual = i
                             self._segundo_en_paso = t
                             self._estado = EstadoRobot.PAUSADO
+                            self._reset_aviso_manual()
                             self._notificar_cambio()
+                            self._emitir(TipoEvento.PAUSA)
                             return
 
+                        # Despertado antes de completar el segundo: seguir esperando
+                        if time.monotonic() < fin_segundo:
+                            continue
+
                         # Avanzar progreso global
                         self._progreso = (
                             (i + (t + 1) / duracion) / total_pasos
                         ) * 100.0
+                        self._actualizar_aviso_manual(hasta_manual[i], t + 1)
                         self._notificar_cambio()
 
                     t += 1
+                    fin_segundo += 1
 
                 # Paso completado, avanzar al siguiente
                 with self._lock:
+                    if token.cancelado:
+                        return
                     i += 1
                     t = 0
                     self._indice_paso_actual = i
                     self._segundo_en_paso = 0
+                    self._publicar()
+                    if i < total_pasos:
+                        self._emitir(TipoEvento.PASO)
 
             # Receta completada
             with self._lock:
+                if token.cancelado:
+                    return
                 if self._estado != EstadoRobot.APAGADO:
                     self._progreso = 100.0
                     self._estado = EstadoRobot.ESPERA
@@ -1080,28 +1486,143 @@ class RobotCocina:
                     
                     # NO reseteamos ni limpiamos nada aquí
                     # La UI lo hará cuando el usuario descarte la card
+                    self._token_coccion = None
                     self._notificar_cambio()
+                    self._emitir(TipoEvento.COMPLETADA)
 
         except ProcesoInterrumpidoError:
             with self._lock:
+                # Si el token se canceló, quien lo hizo ya gestionó el estado
+                if token.cancelado:
+                    return
                 if self._estado != EstadoRobot.APAGADO:
                     self._estado = EstadoRobot.ESPERA
                     self._reset_progreso_y_posicion()
                     self._estrategia_actual = None
                     self._receta_actual = None
                     self._notificar_cambio()
+                    self._emitir(TipoEvento.CANCELADA, receta)
         except Exception:
             with self._lock:
+                if token.cancelado:
+                    return
                 # Solo cambiar a ERROR si no está apagado
                 if self._estado != EstadoRobot.APAGADO:
                     self._estado = EstadoRobot.ERROR
                 self._estrategia_actual = None
                 self._receta_actual = None
                 self._notificar_cambio()
+                self._emitir(TipoEvento.ERROR, receta)
+
+    # ===== ANUNCIO DE PASOS MANUALES =====
 
-    # ===== NOTIFICAR CAMBIOS =====
+    @staticmethod
+    def _compilar_hasta_manual(pasos: List[PasoReceta]) -> List[Tuple[Optional[int], int]]:
+        """
+        Para cada paso i: (índice del siguiente paso manual a partir de i, o
+        None si no hay más, y segundos de pasos automáticos desde el inicio
+        del paso i hasta él). Se calcula una vez al arrancar el hilo.
+        """
+        resultado: List[Tuple[Optional[int], int]] = [(None, 0)] * len(pasos)
+        siguiente: Optional[int] = None
+        segundos = 0
+        for i in range(len(pasos) - 1, -1, -1):
+            if pasos[i].proceso.es_manual():
+                siguiente, segundos = i, 0
+            else:
+                segundos += max(1, pasos[i].tiempo_segundos or 1)
+            resultado[i] = (siguiente, segundos)
+        return resultado
+
+    def _siguiente_adelantable(self, pasos: Optional[List[PasoReceta]] = None) -> Optional[int]:
+        """
+        Índice del paso manual que puede confirmarse ya por adelantado: el
+        primero sin adelantar de los pasos manuales que siguen al paso
+        automático en curso, si está marcado con puede_adelantarse (los
+        pasos se adelantan en orden). Debe llamarse con el lock tomado.
+        """
+        if (not self._adelanto_manual or self._estado != EstadoRobot.COCINANDO
+                or self._pausado or not isinstance(self._estrategia_actual, EjecucionReceta)
+                or self._receta_actual is None):
+            return None
+        if pasos is None:
+            pasos = self._receta_actual.pasos
+        i = self._indice_paso_actual
+        if i >= len(pasos) or pasos[i].proceso.es_manual():
+            return None
+        for j in range(i + 1, len(pasos)):
+            if not pasos[j].proceso.es_manual():
+                return None
+            if j not in self._adelantados:
+                return j if pasos[j].puede_adelantarse else None
+        return None
+
+    def _actualizar_aviso_manual(self, hasta_manual: Tuple[Optional[int], int], t: int) -> None:
+        """
+        Actualiza la cuenta atrás hasta el siguiente paso manual cuando se
+        han hecho `t` segundos del paso actual, y emite AVISO_MANUAL la
+        primera vez que entra en la antelación. Debe llamarse con el lock tomado.
+        """
+        indice, segundos = hasta_manual
+        restante = segundos - t
+        if (indice is None or indice in self._adelantados
+                or restante <= 0 or restante > self._antelacion_aviso_manual):
+            self._reset_aviso_manual()
+            return
+        nuevo = indice != self._proximo_manual_indice
+        self._proximo_manual_indice = indice
+        self._proximo_manual_en_s = restante
+        if nuevo:
+            self._publicar()
+            self._emitir(TipoEvento.AVISO_MANUAL)
+
+    # ===== PUBLICAR / NOTIFICAR CAMBIOS =====
+
+    def _publicar(self) -> None:
+        """
+        Construye y publica una nueva instantánea del estado.
+        Debe llamarse con el lock tomado; la asignación del atributo es
+        atómica, así que los lectores ven la instantánea anterior o la nueva.
+        """
+        receta = self._receta_actual
+        clave = (
+            receta, self._indice_paso_actual, self._estado, self._pausado,
+            self._adelanto_manual, self._estrategia_actual, self._adelantados,
+        )
+        if clave != self._clave_publicada:
+            paso = None
+            adelantable = None
+            if receta is not None:
+                pasos = receta.pasos
+                if 0 <= self._indice_paso_actual < len(pasos):
+                    paso = pasos[self._indice_paso_actual]
+                adelantable = self._siguiente_adelantable(pasos)
+            self._clave_publicada = clave
+            self._paso_publicado = paso
+            self._adelantable_publicado = adelantable
+        paso = self._paso_publicado
+        adelantable = self._adelantable_publicado
+        self._instantanea = InstantaneaRobot(
+            estado=self._estado,
+            receta_actual=receta,
+            progreso=self._progreso,
+            paso_actual=paso,
+            indice_paso_actual=self._indice_paso_actual,
+            segundo_en_paso=self._segundo_en_paso,
+            receta_completada=self._receta_completada,
+            nombre_receta_completada=self._nombre_receta_completada,
+            manual_activo=self._manual_activo,
+            manual_temperatura=self._manual_temperatura,
+            manual_velocidad=self._manual_velocidad,
+            manual_tiempo_restante=self._manual_tiempo_restante,
+            manual_tiempo_total=self._manual_tiempo_total,
+            proximo_manual_indice=self._proximo_manual_indice,
+            proximo_manual_en_s=self._proximo_manual_en_s,
+            adelantable_indice=adelantable,
+        )
 
     def _notificar_cambio(self) -> None:
+        self._publicar()
         if self._callback_actualizacion is not None:
             try:
                 self._callback_actualizacion(self)
@@ -1109,6 +1630,24 @@ class RobotCocina:
                 # No dejamos que un fallo en la UI rompa el robot
                 pass
 
+    def _emitir(self, tipo: str, receta: Optional[Receta] = None) -> None:
+        """
+        Avisa a los observadores de una transición de `receta` (por defecto
+        la actual). Debe llamarse con el lock tomado y tras publicar la
+        instantánea que refleja la transición.
+        """
+        observadores = self._observadores
+        if not observadores:
+            return
+        receta = self._receta_actual if receta is None else receta
+        evento = EventoRobot(self, tipo, receta, self._instantanea, time.time())
+        for callback in observadores:
+            try:
+                callback(evento)
+            except Exception:
+                # Un observador que falla no puede romper la cocción
+                pass
+
     def __repr__(self) -> str:
         return (
             f"RobotCocina(estado={self._estado!r}, "
@@ -0,0 +1,330 @@
+"""
+Planificación de producción por lotes en una flota de robots.
+
+Una orden de producción es una lista de Encargo (receta, cantidad y, si lo
+hay, plazo en segundos desde el inicio). planificar() reparte todas las
+cocciones entre los robots buscando terminar cuanto antes sin pasarse de los
+plazos:
+
+- cada orden de prioridad candidata (plazo más cercano, la más larga primero,
+  menor holgura) se evalúa con el simulador de eventos discretos, que ya
+  modela que un robot libre toma la siguiente cocción de la cola y que los
+  pasos manuales esperan a un operador libre cuando los operadores son
+  limitados (las esperas son fijas, `espera_manual_s`, para que el plan sea
+  determinista);
+- se queda el plan con menos cocciones fuera de plazo, menos retraso total y,
+  a igualdad, el que antes termina.
+
+Con cientos de encargos cada evaluación tarda unos milisegundos.
+
+EjecutorPlan lleva después el plan a los RobotCocina reales: a cada robot le
+selecciona e inicia la siguiente receta de su lista cuando termina la
+anterior, atendiendo sus eventos (registrar_observador) desde un hilo propio.
+"""
+
+import logging
+import math
+import queue
+import threading
+from typing import Callable, Dict, List, NamedTuple, Optional, Sequence, Set, Tuple
+
+from . import simulador
+from .estimador import ESPERA_MANUAL_S
+from .modelos import EventoRobot, Receta, RobotCocina, TipoEvento
+
+logger = logging.getLogger(__name__)
+
+
+class Encargo(NamedTuple):
+    """`cantidad` cocciones de una receta, a terminar antes de plazo_s (opcional)."""
+    receta: Receta
+    cantidad: int = 1
+    plazo_s: Optional[float] = None
+
+
+class Asignacion(NamedTuple):
+    """Una cocción del plan: qué robot la hace y cuándo (segundos desde el inicio)."""
+    receta: Receta
+    robot: int
+    inicio_s: float
+    fin_s: float
+    plazo_s: Optional[float]
+    encargo: int
+
+    @property
+    def retraso_s(self) -> float:
+        if self.plazo_s is None:
+            return 0.0
+        return max(0.0, self.fin_s - self.plazo_s)
+
+
+class Plan(NamedTuple):
+    """Asignaciones ordenadas por robot y por inicio."""
+    asignaciones: List[Asignacion]
+    num_robots: int
+
+    @property
+    def fin_s(self) -> float:
+        """Instante en que termina la última cocción (makespan)."""
+        return max((a.fin_s for a in self.asignaciones), default=0.0)
+
+    @property
+    def retrasadas(self) -> List[Asignacion]:
+        return [a for a in self.asignaciones if a.retraso_s > 0]
+
+    def por_robot(self) -> List[List[Asignacion]]:
+        """Lista de cocciones de cada robot, en el orden en que debe hacerlas."""
+        listas: List[List[Asignacion]] = [[] for _ in range(self.num_robots)]
+        for asignacion in self.asignaciones:
+            listas[asignacion.robot].append(asignacion)
+        return listas
+
+
+# ================
+# Planificación
+# ================
+
+def duracion_estimada(receta: Receta, espera_manual_s: float = ESPERA_MANUAL_S) -> float:
+    """Segundos de una receta con una espera fija por paso manual."""
+    tramos = simulador.compilar_receta(receta)
+    return sum(t.segundos for t in tramos) + (len(tramos) - 1) * espera_manual_s
+
+
+def _criterios(duracion: float, plazo: Optional[float]) -> List[Tuple[float, ...]]:
+    plazo = math.inf if plazo is None else plazo
+    return [
+        (plazo, -duracion),           # plazo más cercano; a igualdad, la más larga
+        (-duracion,),                 # la más larga primero (makespan)
+        (plazo - duracion, -duracion),  # menor holgura
+    ]
+
+
+def _evaluar(
+    unidades: List[Tuple[int, Encargo]],
+    orden: List[int],
+    num_robots: int,
+    operadores: Optional[int],
+    espera_manual_s: float,
+) -> Plan:
+    simulacion = simulador.Simulacion(num_robots, simulador.constante(espera_manual_s), operadores)
+    for indice in orden:
+        simulacion.encargar(unidades[indice][1].receta)
+    resultado = simulacion.ejecutar()
+
+    asignaciones = []
+    for coccion in resultado.cocciones:
+        numero_encargo, encargo = unidades[orden[coccion.numero]]
+        asignaciones.append(Asignacion(
+            encargo.receta, coccion.robot, coccion.inicio_s, coccion.fin_s, encargo.plazo_s, numero_encargo,
+        ))
+    asignaciones.sort(key=lambda a: (a.robot, a.inicio_s))
+    return Plan(asignaciones, num_robots)
+
+
+def planificar(
+    encargos: Sequence[Encargo],
+    num_robots: int,
+    operadores: Optional[int] = None,
+    espera_manual_s: float = ESPERA_MANUAL_S,
+) -> Plan:
+    """
+    Reparte las cocciones de `encargos` entre num_robots robots.
+
+    operadores limita cuántos pasos manuales se atienden a la vez (None = sin
+    límite); espera_manual_s es lo que se supone que tarda cada uno.
+    """
+    if num_robots < 1:
+        raise ValueError("Se necesita al menos un robot")
+    unidades: List[Tuple[int, Encargo]] = []
+    for numero, encargo in enumerate(encargos):
+        if encargo.cantidad < 0:
+            raise ValueError("La cantidad de un encargo no puede ser negativa")
+        unidades.extend((numero, encargo) for _ in range(encargo.cantidad))
+    if not unidades:
+        return Plan([], num_robots)
+
+    # La duración de cada receta se calcula una vez aunque se repita
+    duraciones: Dict[int, float] = {}
+    claves = []
+    for _, encargo in unidades:
+        duracion = duraciones.get(id(encargo.receta))
+        if duracion is None:
+            duracion = duraciones[id(encargo.receta)] = duracion_estimada(encargo.receta, espera_manual_s)
+        claves.append(_criterios(duracion, encargo.plazo_s))
+
+    mejor: Optional[Plan] = None
+    mejor_puntuacion = None
+    for criterio in range(len(claves[0])):
+        orden = sorted(range(len(unidades)), key=lambda i: claves[i][criterio])
+        plan = _evaluar(unidades, orden, num_robots, operadores, espera_manual_s)
+        retrasadas = plan.retrasadas
+        puntuacion = (len(retrasadas), sum(a.retraso_s for a in retrasadas), plan.fin_s)
+        if mejor_puntuacion is None or puntuacion < mejor_puntuacion:
+            mejor, mejor_puntuacion = plan, puntuacion
+    return mejor
+
+
+# ====================
+# Ejecución del plan
+# ====================
+
+# Eventos que dejan libre al robot
+_FIN_DE_COCCION = (TipoEvento.COMPLETADA, TipoEvento.CANCELADA, TipoEvento.ERROR)
+
+
+class EjecutorPlan:
+    """
+    Lleva un Plan a robots reales: robots[i] cocina, en orden, las
+    asignaciones del robot i.
+
+    Se sigue el orden del plan, no sus horas: cada robot empieza su siguiente
+    receta en cuanto termina la anterior. Si una cocción del plan se cancela
+    o falla, ese robot se detiene (alguien ha intervenido) y sus recetas
+    restantes quedan pendientes.
+    """
+
+    def __init__(
+        self,
+        plan: Plan,
+        robots: Sequence[RobotCocina],
+        al_terminar: Optional[Callable[["EjecutorPlan"], None]] = None,
+    ) -> None:
+        if len(robots) != plan.num_robots:
+            raise ValueError(f"El plan es para {plan.num_robots} robots y hay {len(robots)}")
+        self._robots = list(robots)
+        self._pendientes = [list(lista) for lista in plan.por_robot()]
+        self._en_curso: List[Optional[Asignacion]] = [None] * len(self._robots)
+        self._completadas: List[Asignacion] = []
+        self._fallidas: List[Asignacion] = []
+        # Robots a los que ya no se lanzan recetas (intervenidos o con error)
+        self._detenidos: Set[int] = set()
+        self._al_terminar = al_terminar
+
+        self._cola: "queue.Queue[Optional[Tuple[int, Optional[EventoRobot]]]]" = queue.Queue()
+        self._hilo: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._observadores = [self._crear_observador(numero) for numero in range(len(self._robots))]
+
+    # ==========
+    # Consulta
+    # ==========
+
+    @property
+    def pendientes(self) -> int:
+        """Cocciones del plan que aún no han empezado."""
+        with self._lock:
+            return sum(len(lista) for lista in self._pendientes)
+
+    @property
+    def completadas(self) -> List[Asignacion]:
+        with self._lock:
+            return list(self._completadas)
+
+    @property
+    def fallidas(self) -> List[Asignacion]:
+        """Cocciones canceladas o con error."""
+        with self._lock:
+            return list(self._fallidas)
+
+    @property
+    def terminado(self) -> bool:
+        """True cuando ya no hay cocciones en curso ni robots que vayan a seguir."""
+        with self._lock:
+            if any(asignacion is not None for asignacion in self._en_curso):
+                return False
+            return self._hilo is None or all(
+                not pendientes or numero in self._detenidos
+                for numero, pendientes in enumerate(self._pendientes)
+            )
+
+    # ==========
+    # Control
+    # ==========
+
+    def iniciar(self) -> None:
+        """Enciende los robots y arranca en cada uno la primera receta de su lista."""
+        with self._lock:
+            if self._hilo is not None:
+                return
+            self._hilo = threading.Thread(target=self._bucle, name="ejecutor-plan", daemon=True)
+            self._hilo.start()
+        for numero, robot in enumerate(self._robots):
+            robot.registrar_observador(self._observadores[numero])
+            self._cola.put((numero, None))
+
+    def detener(self, timeout: Optional[float] = None) -> None:
+        """
+        Deja de lanzar recetas. Las que están en curso siguen en sus robots;
+        el resto queda pendiente.
+        """
+        for numero, robot in enumerate(self._robots):
+            robot.quitar_observador(self._observadores[numero])
+        with self._lock:
+            hilo = self._hilo
+            self._hilo = None
+        if hilo is not None:
+            self._cola.put(None)
+            hilo.join(timeout)
+
+    # ================
+    # Hilo del plan
+    # ================
+
+    def _crear_observador(self, numero: int) -> Callable[[EventoRobot], None]:
+        # Se llama con el lock del robot tomado: solo encola
+        def observador(evento: EventoRobot) -> None:
+            if evento.tipo in _FIN_DE_COCCION:
+                self._cola.put((numero, evento))
+        return observador
+
+    def _bucle(self) -> None:
+        while True:
+            elemento = self._cola.get()
+            if elemento is None:
+                return
+            numero, evento = elemento
+            try:
+                if self._atender(numero, evento):
+                    self._siguiente(numero)
+            except Exception:
+                logger.exception("Error al lanzar la siguiente receta del plan en el robot %d", numero)
+            if self._al_terminar is not None and self.terminado:
+                self._al_terminar(self)
+                self._al_terminar = None
+
+    def _atender(self, numero: int, evento: Optional[EventoRobot]) -> bool:
+        """Registra el fin de la cocción en curso. Devuelve si el robot sigue con el plan."""
+        if evento is None:
+            return True
+        with self._lock:
+            asignacion = self._en_curso[numero]
+            # Eventos de recetas ajenas al plan (alguien usó el robot a mano)
+            if asignacion is None or evento.receta is not asignacion.receta:
+                return False
+            self._en_curso[numero] = None
+            if evento.tipo == TipoEvento.COMPLETADA:
+                self._completadas.append(asignacion)
+                return True
+            self._fallidas.append(asignacion)
+            self._detenidos.add(numero)
+            return False
+
+    def _siguiente(self, numero: int) -> None:
+        with self._lock:
+            if self._hilo is None or numero in self._detenidos or not self._pendientes[numero]:
+                return
+            asignacion = self._pendientes[numero].pop(0)
+            self._en_curso[numero] = asignacion
+        robot = self._robots[numero]
+        if robot.receta_completada:
+            robot.limpiar_receta_completada()
+        robot.encender()
+        robot.seleccionar_receta(asignacion.receta)
+        try:
+            robot.iniciar_coccion()
+        except Exception:
+            with self._lock:
+                self._en_curso[numero] = None
+                self._fallidas.append(asignacion)
+                self._detenidos.add(numero)
+            raise
@@ -1,12 +1,96 @@
 import sqlite3
 import json
-from typing import List, Optional, Dict, Tuple, Any
+from concurrent.futures import Future
+from itertools import groupby
+from operator import itemgetter
+from typing import List, Optional, Dict, Iterator, Tuple, Any, Callable, Union
 
+from . import analitica
 from .modelos import (
     ProcesoCocina, ProcesoManual, ProcesoAutomatico, 
-    PasoReceta, Receta, RecetaBase, RecetaUsuario
+    PasoReceta, Receta, RecetaBase, RecetaUsuario, ResumenReceta
 )
-from data.init_db import conectar, reinicio_fabrica, inicializar_bd
+from data.init_db import conexion_lectura, _reinicio_fabrica_sin_commit, inicializar_bd, recalcular_resumenes
+from data.escritor import ESCRITOR, ESPERA_RESULTADO_S
+
+
+# Paso de una receta nueva: (orden, id_proceso, temperatura, tiempo_segundos,
+# velocidad, instrucciones) y, opcionalmente, puede_adelantarse.
+PasoNuevo = Union[
+    Tuple[int, int, Optional[int], Optional[int], Optional[int], Optional[str]],
+    Tuple[int, int, Optional[int], Optional[int], Optional[int], Optional[str], bool],
+]
+
+# =============================
+# Cambios en recetas y procesos
+# =============================
+
+# Contadores de modificaciones: global (reinicio de fábrica), por origen y por
+# receta. Quien cachee algo derivado de una receta puede usar version_receta()
+# como parte de la clave: solo crece cuando cambia esa receta.
+_version_recetas = 0
+_versiones_por_clave: Dict[Tuple[str, Optional[int]], int] = {}
+
+# Callbacks (origen, id_receta) a los que se avisa tras cada modificación.
+# origen=None indica que han cambiado todas las recetas (reinicio de fábrica);
+# id_receta=None indica todas las recetas de ese origen.
+_observadores_recetas: List[Callable[[Optional[str], Optional[int]], None]] = []
+
+
+def version_receta(origen: str, id_receta: int) -> int:
+    """Devuelve la versión del contenido de una receta concreta."""
+    return (
+        _version_recetas
+        + _versiones_por_clave.get((origen, None), 0)
+        + _versiones_por_clave.get((origen, id_receta), 0)
+    )
+
+
+def registrar_observador_recetas(
+    callback: Callable[[Optional[str], Optional[int]], None]
+) -> None:
+    """Registra un callback que se invocará cada vez que cambie una receta."""
+    if callback not in _observadores_recetas:
+        _observadores_recetas.append(callback)
+
+
+def _notificar_cambio_recetas(origen: Optional[str], ids_recetas: Optional[List[int]] = None) -> None:
+    """Incrementa las versiones afectadas y avisa a los observadores."""
+    global _version_recetas
+    if origen is None:
+        _version_recetas += 1
+    else:
+        for clave in ([(origen, None)] if ids_recetas is None else [(origen, i) for i in ids_recetas]):
+            _versiones_por_clave[clave] = _versiones_por_clave.get(clave, 0) + 1
+    for callback in list(_observadores_recetas):
+        if ids_recetas is None:
+            callback(origen, None)
+        else:
+            for id_receta in ids_recetas:
+                callback(origen, id_receta)
+
+
+# Igual que para recetas: callbacks (origen, id_proceso) avisados tras cada
+# alta o baja de procesos. origen=None / id_proceso=None significan "todos".
+_observadores_procesos: List[Callable[[Optional[str], Optional[int]], None]] = []
+
+
+def registrar_observador_procesos(
+    callback: Callable[[Optional[str], Optional[int]], None]
+) -> None:
+    """Registra un callback que se invocará cada vez que cambie un proceso."""
+    if callback not in _observadores_procesos:
+        _observadores_procesos.append(callback)
+
+
+def _notificar_cambio_procesos(origen: Optional[str], ids_procesos: Optional[List[int]] = None) -> None:
+    """Avisa a los observadores de procesos."""
+    for callback in list(_observadores_procesos):
+        if ids_procesos is None:
+            callback(origen, None)
+        else:
+            for id_proceso in ids_procesos:
+                callback(origen, id_proceso)
 
 
 # =============================
@@ -69,109 +153,153 @@ def _fila_a_proceso_usuario(fila: Tuple) -> ProcesoCocina:
         )
 
 
+def _contar_filas(tabla: str) -> int:
+    """Devuelve el número de filas de una tabla (para paginar en la UI)."""
+    conn = conexion_lectura()
+    cur = conn.cursor()
+    cur.execute(f"SELECT COUNT(*) FROM {tabla};")
+    return cur.fetchone()[0]
+
+
+def _limite_sql(limite: Optional[int], desplazamiento: int) -> Tuple[int, int]:
+    """Parámetros para 'LIMIT ? OFFSET ?' (en SQLite, LIMIT -1 = sin límite)."""
+    return (-1 if limite is None else limite, desplazamiento)
+
+
+# A partir de este número de ids, las operaciones en bloque los cargan en una
+# tabla temporal indexada en lugar de pasarlos como un único array JSON
+UMBRAL_TABLA_TEMPORAL = 500
+
+# Por encima de este número de ids cambiados se avisa de que ha cambiado todo
+# el origen: recargar la colección una vez es más barato que miles de diffs
+MAX_AVISOS_INDIVIDUALES = 50
+
+
+def _subconsulta_ids(conn: sqlite3.Connection, ids: List[int]) -> Tuple[str, Tuple]:
+    """
+    Devuelve (subconsulta, parámetros) que seleccionan los `ids` para usarlos en
+    'WHERE x IN (subconsulta)'. La sentencia tiene siempre la misma forma,
+    sea cual sea el número de ids (sin límite de parámetros de SQLite).
+    """
+    if len(ids) < UMBRAL_TABLA_TEMPORAL:
+        return "SELECT value FROM json_each(?)", (json.dumps(ids),)
+
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS ids_operacion (id INTEGER PRIMARY KEY);")
+    conn.execute("DELETE FROM temp.ids_operacion;")
+    conn.executemany("INSERT OR IGNORE INTO temp.ids_operacion (id) VALUES (?);", ((i,) for i in ids))
+    return "SELECT id FROM temp.ids_operacion", ()
+
+
+def _ids_a_avisar(ids: List[int]) -> Optional[List[int]]:
+    """Ids para los observadores, o None ("todo el origen") si son demasiados."""
+    return ids if len(ids) <= MAX_AVISOS_INDIVIDUALES else None
+
+
 # =============
 # PROCESOS
 # =============
 
-def cargar_procesos_base() -> List[ProcesoCocina]:
+def cargar_procesos_base(limite: Optional[int] = None, desplazamiento: int = 0) -> List[ProcesoCocina]:
     """
-    Devuelve una lista de todos los procesos de fábrica (procesos_base).
+    Devuelve una lista de los procesos de fábrica (procesos_base).
+    Con `limite`/`desplazamiento` devuelve solo una página.
     """
-    conn = conectar()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, nombre, tipo, tipo_ejecucion, instrucciones
-            FROM procesos_base
-            ORDER BY id;
-            """
-        )
-        filas = cur.fetchall()
-        return [_fila_a_proceso_base(f) for f in filas]
-    finally:
-        conn.close()
+    conn = conexion_lectura()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT id, nombre, tipo, tipo_ejecucion, instrucciones
+        FROM procesos_base
+        ORDER BY id
+        LIMIT ? OFFSET ?;
+        """,
+        _limite_sql(limite, desplazamiento),
+    )
+    filas = cur.fetchall()
+    return [_fila_a_proceso_base(f) for f in filas]
 
 
-def cargar_procesos_usuario() -> List[ProcesoCocina]:
+def cargar_procesos_usuario(limite: Optional[int] = None, desplazamiento: int = 0) -> List[ProcesoCocina]:
     """
-    Devuelve una lista de todos los procesos creados por el usuario (procesos_usuario).
+    Devuelve una lista de los procesos creados por el usuario (procesos_usuario).
+    Con `limite`/`desplazamiento` devuelve solo una página.
     """
-    conn = conectar()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, nombre, tipo, tipo_ejecucion, instrucciones
-            FROM procesos_usuario
-            ORDER BY id;
-            """
-        )
-        filas = cur.fetchall()
-        return [_fila_a_proceso_usuario(f) for f in filas]
-    finally:
-        conn.close()
+    conn = conexion_lectura()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT id, nombre, tipo, tipo_ejecucion, instrucciones
+        FROM procesos_usuario
+        ORDER BY id
+        LIMIT ? OFFSET ?;
+        """,
+        _limite_sql(limite, desplazamiento),
+    )
+    filas = cur.fetchall()
+    return [_fila_a_proceso_usuario(f) for f in filas]
+
+
+def contar_procesos_base() -> int:
+    """Número total de procesos de fábrica."""
+    return _contar_filas("procesos_base")
+
+
+def contar_procesos_usuario() -> int:
+    """Número total de procesos de usuario."""
+    return _contar_filas("procesos_usuario")
 
 
 def obtener_proceso_base_por_id(id_proceso: int) -> Optional[ProcesoCocina]:
     """
     Devuelve un proceso_base por id, o None si no existe.
     """
-    conn = conectar()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, nombre, tipo, tipo_ejecucion, instrucciones
-            FROM procesos_base
-            WHERE id = ?;
-            """,
-            (id_proceso,),
-        )
-        fila = cur.fetchone()
-        if fila is None:
-            return None
-        return _fila_a_proceso_base(fila)
-    finally:
-        conn.close()
+    conn = conexion_lectura()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT id, nombre, tipo, tipo_ejecucion, instrucciones
+        FROM procesos_base
+        WHERE id = ?;
+        """,
+        (id_proceso,),
+    )
+    fila = cur.fetchone()
+    if fila is None:
+        return None
+    return _fila_a_proceso_base(fila)
 
 
 def obtener_proceso_usuario_por_id(id_proceso: int) -> Optional[ProcesoCocina]:
     """
     Devuelve un proceso_usuario por id, o None si no existe.
     """
-    conn = conectar()
-    try:
-        cur = conn.cursor()
-        cur.execute(
-            """
-            SELECT id, nombre, tipo, tipo_ejecucion, instrucciones
-            FROM procesos_usuario
-            WHERE id = ?;
-            """,
-            (id_proceso,),
-        )
-        fila = cur.fetchone()
-        if fila is None:
-            return None
-        return _fila_a_proceso_usuario(fila)
-    finally:
-        conn.close()
+    conn = conexion_lectura()
+    cur = conn.cursor()
+    cur.execute(
+        """
+        SELECT id, nombre, tipo, tipo_ejecucion, instrucciones
+        FROM procesos_usuario
+        WHERE id = ?;
+        """,
+        (id_proceso,),
+    )
+    fila = cur.fetchone()
+    if fila is None:
+        return None
+    return _fila_a_proceso_usuario(fila)
 
 
-def crear_proceso_usuario(
+def encolar_crear_proceso_usuario(
     nombre: str,
     tipo: str,
     tipo_ejecucion: str,
     instrucciones: str,
-) -> ProcesoCocina:
+) -> "Future[ProcesoCocina]":
     """
-    Crea un nuevo proceso en la tabla procesos_usuario y devuelve el objeto ProcesoCocina.
-    
-    No se comprueba aquí nombres duplicados: esto se controla en la capa de UI.
+    Encola en el escritor de BD el alta de un proceso de usuario y devuelve un
+    Future con el ProcesoCocina creado.
     """
-    conn = conectar()
-    try:
+    def comando(conn: sqlite3.Connection) -> ProcesoCocina:
         cur = conn.cursor()
         cur.execute(
             """
@@ -181,7 +309,6 @@ def crear_proceso_usuario(
             (nombre, tipo, tipo_ejecucion, instrucciones),
         )
         id_nuevo = cur.lastrowid
-        conn.commit()
         # Polimorfismo: Retornar la subclase correcta
         if tipo_ejecucion == "manual":
             return ProcesoManual(
@@ -201,206 +328,203 @@ def crear_proceso_usuario(
                 instrucciones=instrucciones,
                 origen="usuario",
             )
-    finally:
-        conn.close()
+
+    return ESCRITOR.enviar(
+        comando,
+        lambda proceso: _notificar_cambio_procesos("usuario", [proceso.id]),
+    )
 
 
-def eliminar_proceso_usuario(id_proceso: int) -> None:
+def crear_proceso_usuario(
+    nombre: str,
+    tipo: str,
+    tipo_ejecucion: str,
+    instrucciones: str,
+) -> ProcesoCocina:
     """
-    Elimina un proceso_usuario por id. También elimina los pasos de recetas_usuario
-    que lo usen, para evitar referencias colgantes.
+    Crea un nuevo proceso en la tabla procesos_usuario y devuelve el objeto ProcesoCocina.
+    
+    No se comprueba aquí nombres duplicados: esto se controla en la capa de UI.
     """
-    conn = conectar()
-    try:
+    return encolar_crear_proceso_usuario(nombre, tipo, tipo_ejecucion, instrucciones).result(ESPERA_RESULTADO_S)
+
+
+def encolar_eliminar_procesos_usuario(ids_procesos: List[int]) -> "Future[List[int]]":
+    """
+    Encola en el escritor de BD la baja de varios procesos de usuario en una
+    sola transacción. Sus pasos se borran en cascada (ON DELETE CASCADE). El
+    Future devuelve los ids de las recetas que han perdido pasos.
+    """
+    ids_procesos = list(dict.fromkeys(ids_procesos))
+
+    def comando(conn: sqlite3.Connection) -> List[int]:
+        if not ids_procesos:
+            return []
         cur = conn.cursor()
-        # Borrar pasos que usan ese proceso
+        subconsulta, parametros = _subconsulta_ids(conn, ids_procesos)
+        # Recetas afectadas, para actualizar su resumen tras el borrado
         cur.execute(
-            """
-            DELETE FROM pasos_receta_usuario
-            WHERE id_proceso = ?;
+            f"""
+            SELECT DISTINCT id_receta FROM pasos_receta_usuario
+            WHERE id_proceso_usuario IN ({subconsulta});
             """,
-            (id_proceso,),
+            parametros,
         )
-        # Borrar el propio proceso
+        recetas_afectadas = [fila[0] for fila in cur.fetchall()]
+        # Borrar los procesos (y, en cascada, los pasos que los usan)
         cur.execute(
-            """
+            f"""
             DELETE FROM procesos_usuario
-            WHERE id = ?;
+            WHERE id IN ({subconsulta});
             """,
-            (id_proceso,),
+            parametros,
         )
-        conn.commit()
-    finally:
-        conn.close()
+        if recetas_afectadas:
+            recalcular_resumenes(conn, "usuario", recetas_afectadas)
+        return recetas_afectadas
+
+    def al_confirmar(recetas_afectadas: List[int]) -> None:
+        if ids_procesos:
+            _notificar_cambio_procesos("usuario", _ids_a_avisar(ids_procesos))
+        if recetas_afectadas:
+            _notificar_cambio_recetas("usuario", _ids_a_avisar(recetas_afectadas))
+
+    return ESCRITOR.enviar(comando, al_confirmar)
+
+
+def eliminar_procesos_usuario(ids_procesos: List[int]) -> List[int]:
+    """
+    Elimina varios procesos de usuario (y los pasos que los usan) en una sola
+    transacción. Devuelve los ids de las recetas que han perdido pasos.
+    """
+    return encolar_eliminar_procesos_usuario(ids_procesos).result(ESPERA_RESULTADO_S)
+
+
+def encolar_eliminar_proceso_usuario(id_proceso: int) -> "Future[List[int]]":
+    """Como encolar_eliminar_procesos_usuario, para un solo proceso."""
+    return encolar_eliminar_procesos_usuario([id_proceso])
+
+
+def eliminar_proceso_usuario(id_proceso: int) -> None:
+    """
+    Elimina un proceso_usuario por id. También elimina los pasos de recetas_usuario
+    que lo usen, para evitar referencias colgantes.
+    """
+    encolar_eliminar_proceso_usuario(id_proceso).result(ESPERA_RESULTADO_S)
 
 
 # ==============
 # RECETAS
 # ==============
 
-def _cargar_recetas_generico(
-    tabla_recetas: str,
-    tabla_pasos: str,
-    tabla_procesos: str,
-    origen: str,
-) -> List[Receta]:
+# Una sola consulta ordenada por receta y paso (recetas LEFT JOIN pasos): los
+# pasos de cada receta llegan seguidos, así que se puede agrupar sobre la marcha.
+# El índice (id_receta, orden) de los pasos da ese orden sin ordenar en memoria.
+_CONSULTA_RECETAS = {
+    "base": """
+        SELECT r.id, r.nombre, r.descripcion, r.ingredientes,
+               p.orden, p.temperatura, p.tiempo_segundos, p.velocidad, p.instrucciones,
+               pr.id, pr.nombre, pr.tipo, pr.tipo_ejecucion, pr.instrucciones,
+               'base' AS origen_proceso, p.puede_adelantarse
+        FROM recetas_base AS r
+        LEFT JOIN pasos_receta_base AS p
+            ON p.id_receta = r.id
+        LEFT JOIN procesos_base AS pr
+            ON pr.id = p.id_proceso
+        {filtro}
+        ORDER BY r.id, p.orden;
+    """,
+    # Los procesos de usuario se guardan en los pasos con un offset de 10000
+    "usuario": """
+        SELECT r.id, r.nombre, r.descripcion, r.ingredientes,
+               p.orden, p.temperatura, p.tiempo_segundos, p.velocidad, p.instrucciones,
+               CASE
+                   WHEN p.id_proceso >= 10000 THEN p.id_proceso - 10000
+                   ELSE p.id_proceso
+               END,
+               COALESCE(pr_user.nombre, pr_base.nombre),
+               COALESCE(pr_user.tipo, pr_base.tipo),
+               COALESCE(pr_user.tipo_ejecucion, pr_base.tipo_ejecucion),
+               COALESCE(pr_user.instrucciones, pr_base.instrucciones),
+               CASE WHEN p.id_proceso >= 10000 THEN 'usuario' ELSE 'base' END,
+               p.puede_adelantarse
+        FROM recetas_usuario AS r
+        LEFT JOIN pasos_receta_usuario AS p
+            ON p.id_receta = r.id
+        LEFT JOIN procesos_usuario AS pr_user
+            ON pr_user.id = p.id_proceso_usuario
+        LEFT JOIN procesos_base AS pr_base
+            ON p.id_proceso < 10000 AND pr_base.id = p.id_proceso
+        {filtro}
+        ORDER BY r.id, p.orden;
+    """,
+}
+
+
+def _fila_a_paso(fila: Tuple) -> PasoReceta:
     """
-    Función interna para cargar recetas y convertirlas en objetos Receta.
-    
-    Parámetros:
-        tabla_recetas: 'recetas_base' o 'recetas_usuario'
-        tabla_pasos: 'pasos_receta_base' o 'pasos_receta_usuario'
-        tabla_procesos: 'procesos_base' o 'procesos_usuario'
-        origen: 'base' o 'usuario'
+    Convierte la parte de paso + proceso de una fila de _CONSULTA_RECETAS.
+    Estructura: (orden, temperatura, tiempo, velocidad, instrucciones,
+                 id, nombre, tipo, tipo_ejecucion, instrucciones_proceso, origen,
+                 puede_adelantarse)
     """
-    conn = conectar()
-    try:
-        cur = conn.cursor()
+    (orden, paso_temp, paso_tiempo, paso_vel, paso_instr,
+     pid, pnombre, ptipo, ptipo_ej, proc_instr, origen_proc, adelantable) = fila
 
-        # 1) Cargar todas las recetas
-        cur.execute(
-            f"""
-            SELECT id, nombre, descripcion, ingredientes
-            FROM {tabla_recetas}
-            ORDER BY id;
-            """
+    # Polimorfismo: Instanciar la subclase correcta según tipo_ejecucion
+    if ptipo_ej == "manual":
+        proceso = ProcesoManual(
+            id_=pid,
+            nombre=pnombre,
+            tipo=ptipo,
+            tipo_ejecucion=ptipo_ej,
+            instrucciones=proc_instr,
+            origen=origen_proc,
         )
-        filas_recetas = cur.fetchall()
-        if not filas_recetas:
-            return []
+    else:
+        proceso = ProcesoAutomatico(
+            id_=pid,
+            nombre=pnombre,
+            tipo=ptipo,
+            tipo_ejecucion=ptipo_ej,
+            instrucciones=proc_instr,
+            origen=origen_proc,
+        )
+    return PasoReceta(
+        orden=orden,
+        proceso=proceso,
+        temperatura=paso_temp,
+        tiempo_segundos=paso_tiempo,
+        velocidad=paso_vel,
+        instrucciones=paso_instr,
+        puede_adelantarse=bool(adelantable),
+    )
 
-        # 2) Cargar todos los pasos + procesos asociados de una sola vez
-        ids_recetas = [r[0] for r in filas_recetas]
-        marcadores = ",".join("?" for _ in ids_recetas)
 
-        # Si son recetas de usuario, buscar en ambas tablas de procesos
-        if tabla_pasos == "pasos_receta_usuario":
-            cur.execute(
-                f"""
-                SELECT p.id_receta,
-                       p.orden,
-                       p.temperatura,
-                       p.tiempo_segundos,
-                       p.velocidad,
-                       p.instrucciones,
-                       CASE 
-                           WHEN p.id_proceso >= 10000 THEN p.id_proceso - 10000
-                           ELSE p.id_proceso 
-                       END as id,
-                       COALESCE(pr_user.nombre, pr_base.nombre) as nombre,
-                       COALESCE(pr_user.tipo, pr_base.tipo) as tipo,
-                       COALESCE(pr_user.tipo_ejecucion, pr_base.tipo_ejecucion) as tipo_ejecucion,
-                       COALESCE(pr_user.instrucciones, pr_base.instrucciones) as proc_instrucciones,
-                       CASE WHEN p.id_proceso >= 10000 THEN 'usuario' ELSE 'base' END as origen
-                FROM {tabla_pasos} AS p
-                LEFT JOIN procesos_usuario AS pr_user
-                    ON p.id_proceso >= 10000 AND pr_user.id = (p.id_proceso - 10000)
-                LEFT JOIN procesos_base AS pr_base
-                    ON p.id_proceso < 10000 AND pr_base.id = p.id_proceso
-                WHERE p.id_receta IN ({marcadores})
-                ORDER BY p.id_receta, p.orden;
-                """,
-                ids_recetas,
-            )
+def _iterar_recetas(
+    conn: sqlite3.Connection,
+    origen: str,
+    id_receta: Optional[int] = None,
+) -> Iterator[Receta]:
+    """
+    Genera las recetas de un origen (o solo la pedida) con una conexión dada,
+    agrupando por receta las filas del cursor según llegan.
+    """
+    filtro = "WHERE r.id = ?" if id_receta is not None else ""
+    cur = conn.cursor()
+    try:
+        cur.execute(
+            _CONSULTA_RECETAS[origen].format(filtro=filtro),
+            (id_receta,) if id_receta is not None else (),
+        )
+        for (id_, nombre, descripcion, ingredientes_json), filas in groupby(cur, key=itemgetter(0, 1, 2, 3)):
+            pasos = []
+            for fila in filas:
+                # Receta sin pasos (LEFT JOIN) o paso de fábrica sin proceso
+                if fila[4] is None or (origen == "base" and fila[9] is None):
+                    continue
+                pasos.append(_fila_a_paso(fila[4:]))
 
-            filas_pasos = cur.fetchall()
-            # Procesar con origen dinámico
-            pasos_por_receta: Dict[int, List[PasoReceta]] = {}
-            for fila in filas_pasos:
-                (id_receta, orden, paso_temp, paso_tiempo, paso_vel, paso_instr,
-                 pid, pnombre, ptipo, ptipo_ej, proc_instr, origen_proc) = fila
-                
-                # Polimorfismo: Instanciar la subclase correcta según tipo_ejecucion
-                if ptipo_ej == "manual":
-                    proceso = ProcesoManual(
-                        id_=pid,
-                        nombre=pnombre,
-                        tipo=ptipo,
-                        tipo_ejecucion=ptipo_ej,
-                        instrucciones=proc_instr,
-                        origen=origen_proc,
-                    )
-                else:
-                    proceso = ProcesoAutomatico(
-                        id_=pid,
-                        nombre=pnombre,
-                        tipo=ptipo,
-                        tipo_ejecucion=ptipo_ej,
-                        instrucciones=proc_instr,
-                        origen=origen_proc,
-                    )
-                paso = PasoReceta(
-                    orden=orden,
-                    proceso=proceso,
-                    temperatura=paso_temp,
-                    tiempo_segundos=paso_tiempo,
-                    velocidad=paso_vel,
-                    instrucciones=paso_instr,
-                )
-                pasos_por_receta.setdefault(id_receta, []).append(paso)
-        else:
-            # Recetas de base: solo buscar en procesos_base
-            cur.execute(
-                f"""
-                SELECT p.id_receta,
-                       p.orden,
-                       p.temperatura,
-                       p.tiempo_segundos,
-                       p.velocidad,
-                       p.instrucciones,
-                       pr.id,
-                       pr.nombre,
-                       pr.tipo,
-                       pr.tipo_ejecucion,
-                       pr.instrucciones
-                FROM {tabla_pasos} AS p
-                JOIN {tabla_procesos} AS pr
-                    ON p.id_proceso = pr.id
-                WHERE p.id_receta IN ({marcadores})
-                ORDER BY p.id_receta, p.orden;
-                """,
-                ids_recetas,
-            )
-            filas_pasos = cur.fetchall()
-            pasos_por_receta: Dict[int, List[PasoReceta]] = {}
-            for fila in filas_pasos:
-                (id_receta, orden, paso_temp, paso_tiempo, paso_vel, paso_instr,
-                 pid, pnombre, ptipo, ptipo_ej, proc_instr) = fila
-                
-                # Polimorfismo: Instanciar la subclase correcta
-                if ptipo_ej == "manual":
-                    proceso = ProcesoManual(
-                        id_=pid,
-                        nombre=pnombre,
-                        tipo=ptipo,
-                        tipo_ejecucion=ptipo_ej,
-                        instrucciones=proc_instr,
-                        origen=origen,
-                    )
-                else:
-                    proceso = ProcesoAutomatico(
-                        id_=pid,
-                        nombre=pnombre,
-                        tipo=ptipo,
-                        tipo_ejecucion=ptipo_ej,
-                        instrucciones=proc_instr,
-                        origen=origen,
-                    )
-                paso = PasoReceta(
-                    orden=orden,
-                    proceso=proceso,
-                    temperatura=paso_temp,
-                    tiempo_segundos=paso_tiempo,
-                    velocidad=paso_vel,
-                    instrucciones=paso_instr,
-                )
-                pasos_por_receta.setdefault(id_receta, []).append(paso)
-
-        # 3) Construir objetos Receta
-        recetas: List[Receta] = []
-        for id_receta, nombre, descripcion, ingredientes_json in filas_recetas:
-            pasos = pasos_por_receta.get(id_receta, [])
-            
             # Parsear ingredientes JSON
             ingredientes = []
             if ingredientes_json:
@@ -408,29 +532,29 @@ def _cargar_recetas_generico(
                     ingredientes = json.loads(ingredientes_json)
                 except Exception:
                     pass
-            
+
             # Polimorfismo: Instanciar la subclase correcta según origen
-            if origen == "base":
-                receta = RecetaBase(
-                    id_=id_receta,
-                    nombre=nombre,
-                    descripcion=descripcion or "",
-                    ingredientes=ingredientes,
-                    pasos=pasos,
-                )
-            else:
-                receta = RecetaUsuario(
-                    id_=id_receta,
-                    nombre=nombre,
-                    descripcion=descripcion or "",
-                    ingredientes=ingredientes,
-                    pasos=pasos,
-                )
-            recetas.append(receta)
-
-        return recetas
+            clase = RecetaBase if origen == "base" else RecetaUsuario
+            yield clase(
+                id_=id_,
+                nombre=nombre,
+                descripcion=descripcion or "",
+                ingredientes=ingredientes,
+                pasos=pasos,
+            )
     finally:
-        conn.close()
+        cur.close()
+
+
+def iterar_recetas(origen: str, id_receta: Optional[int] = None) -> Iterator[Receta]:
+    """
+    Genera, una a una y ordenadas por id, las recetas completas (con pasos y
+    procesos) de origen 'base' o 'usuario'. Cada receta se entrega en cuanto
+    se han leído sus pasos, así que la memoria usada es la de una receta:
+    es el cargador para exportaciones, análisis y cualquier recorrido del
+    catálogo completo.
+    """
+    return _iterar_recetas(conexion_lectura(), origen, id_receta)
 
 
 def cargar_recetas_base() -> List[Receta]:
@@ -438,12 +562,7 @@ def cargar_recetas_base() -> List[Receta]:
     Devuelve una lista de todas las recetas de fábrica (recetas_base)
     con sus pasos y procesos asociados.
     """
-    return _cargar_recetas_generico(
-        tabla_recetas="recetas_base",
-        tabla_pasos="pasos_receta_base",
-        tabla_procesos="procesos_base",
-        origen="base",
-    )
+    return list(iterar_recetas("base"))
 
 
 def cargar_recetas_usuario() -> List[Receta]:
@@ -451,38 +570,154 @@ def cargar_recetas_usuario() -> List[Receta]:
     Devuelve una lista de todas las recetas creadas por el usuario (recetas_usuario)
     con sus pasos y procesos asociados.
     """
-    return _cargar_recetas_generico(
-        tabla_recetas="recetas_usuario",
-        tabla_pasos="pasos_receta_usuario",
-        tabla_procesos="procesos_usuario",
-        origen="usuario",
+    return list(iterar_recetas("usuario"))
+
+
+def obtener_receta(origen: str, id_receta: int) -> Optional[Receta]:
+    """
+    Devuelve la receta completa (con pasos y procesos) de origen 'base' o
+    'usuario' con el id indicado, o None si no existe.
+    """
+    return next(iterar_recetas(origen, id_receta), None)
+
+
+# =======================
+# PASOS EN COLUMNAS
+# =======================
+
+# Pasos de cada origen con las columnas de analitica.ColumnasPasos, sin NULL
+_CONSULTA_COLUMNAS_PASOS = {
+    "base": """
+        SELECT p.id_receta, p.orden, p.id_proceso,
+               CASE WHEN pr.tipo_ejecucion = 'manual' THEN 1 ELSE 0 END,
+               COALESCE(p.temperatura, 0), COALESCE(p.tiempo_segundos, 0), COALESCE(p.velocidad, 0),
+               COALESCE(p.puede_adelantarse, 0)
+        FROM pasos_receta_base AS p
+        LEFT JOIN procesos_base AS pr
+            ON pr.id = p.id_proceso
+        ORDER BY p.id_receta, p.orden;
+    """,
+    "usuario": """
+        SELECT p.id_receta, p.orden, p.id_proceso,
+               CASE WHEN COALESCE(pr_user.tipo_ejecucion, pr_base.tipo_ejecucion) = 'manual'
+                    THEN 1 ELSE 0 END,
+               COALESCE(p.temperatura, 0), COALESCE(p.tiempo_segundos, 0), COALESCE(p.velocidad, 0),
+               COALESCE(p.puede_adelantarse, 0)
+        FROM pasos_receta_usuario AS p
+        LEFT JOIN procesos_usuario AS pr_user
+            ON pr_user.id = p.id_proceso_usuario
+        LEFT JOIN procesos_base AS pr_base
+            ON p.id_proceso < 10000 AND pr_base.id = p.id_proceso
+        ORDER BY p.id_receta, p.orden;
+    """,
+}
+
+
+def pasos_como_columnas(origen: str) -> "analitica.ColumnasPasos":
+    """
+    Devuelve todos los pasos de las recetas de origen 'base' o 'usuario' como
+    arrays de NumPy por columna (id_receta, orden, id_proceso, manual,
+    temperatura, tiempo_segundos, velocidad, adelantable), leídos directamente del cursor
+    sin crear objetos PasoReceta. Necesita NumPy (ver robot/analitica.py).
+    """
+    cur = conexion_lectura().cursor()
+    try:
+        cur.execute(_CONSULTA_COLUMNAS_PASOS[origen])
+        return analitica.columnas_desde_cursor(cur)
+    finally:
+        cur.close()
+
+
+# =======================
+# RESÚMENES DE RECETAS
+# =======================
+
+def _cargar_resumenes_generico(
+    tabla_recetas: str,
+    origen: str,
+    limite: Optional[int] = None,
+    desplazamiento: int = 0,
+    id_receta: Optional[int] = None,
+) -> List[ResumenReceta]:
+    """
+    Carga los datos de listado de las recetas usando las columnas de resumen
+    precalculadas, sin leer ningún paso. Admite paginación y, si se indica
+    id_receta, devuelve solo esa receta.
+    """
+    filtro = "WHERE id = ?" if id_receta is not None else ""
+    parametros = (id_receta,) if id_receta is not None else ()
+    conn = conexion_lectura()
+    cur = conn.cursor()
+    cur.execute(
+        f"""
+        SELECT id, nombre, descripcion, num_pasos, pasos_manuales,
+               tiempo_automatico_segundos, temperatura_maxima
+        FROM {tabla_recetas}
+        {filtro}
+        ORDER BY id
+        LIMIT ? OFFSET ?;
+        """,
+        parametros + _limite_sql(limite, desplazamiento),
     )
+    return [
+        ResumenReceta(
+            id_=id_,
+            nombre=nombre,
+            descripcion=descripcion or "",
+            num_pasos=num_pasos,
+            pasos_manuales=pasos_manuales,
+            tiempo_automatico_segundos=tiempo,
+            temperatura_maxima=temperatura,
+            origen=origen,
+        )
+        for id_, nombre, descripcion, num_pasos, pasos_manuales, tiempo, temperatura in cur.fetchall()
+    ]
 
 
-def crear_receta_usuario(
+def cargar_resumenes_recetas_base(limite: Optional[int] = None, desplazamiento: int = 0) -> List[ResumenReceta]:
+    """
+    Devuelve el resumen de las recetas de fábrica (sin pasos), opcionalmente paginado.
+    """
+    return _cargar_resumenes_generico("recetas_base", "base", limite, desplazamiento)
+
+
+def cargar_resumenes_recetas_usuario(limite: Optional[int] = None, desplazamiento: int = 0) -> List[ResumenReceta]:
+    """
+    Devuelve el resumen de las recetas de usuario (sin pasos), opcionalmente paginado.
+    """
+    return _cargar_resumenes_generico("recetas_usuario", "usuario", limite, desplazamiento)
+
+
+def obtener_resumen_receta(origen: str, id_receta: int) -> Optional[ResumenReceta]:
+    """
+    Devuelve el resumen de una receta concreta ('base' o 'usuario'), o None si no existe.
+    """
+    resumenes = _cargar_resumenes_generico(f"recetas_{origen}", origen, id_receta=id_receta)
+    return resumenes[0] if resumenes else None
+
+
+def contar_recetas_base() -> int:
+    """Número total de recetas de fábrica."""
+    return _contar_filas("recetas_base")
+
+
+def contar_recetas_usuario() -> int:
+    """Número total de recetas de usuario."""
+    return _contar_filas("recetas_usuario")
+
+
+def encolar_crear_receta_usuario(
     nombre: str,
     descripcion: str,
     ingredientes: List[Dict[str, Any]],
-    pasos: List[Tuple[int, int, Optional[int], Optional[int], Optional[int], Optional[str]]],
-) -> Receta:
+    pasos: List[PasoNuevo],
+) -> "Future[Receta]":
     """
-    Crea una nueva receta de usuario.
-
-    Parámetros:
-        nombre: nombre de la receta
-        descripcion: texto descriptivo
-        ingredientes: lista de dicts con {nombre, cantidad, unidad, nota}
-        pasos: lista de tuplas (orden, id_proceso, temperatura, tiempo_segundos, velocidad, instrucciones)
-               por ejemplo: [
-                   (1, 3, None, None, None, "Añadir ingredientes secos"),  # Manual
-                   (2, 5, 100, 180, 2, None),  # Automático
-               ]
-
-    Devuelve:
-        Objeto Receta con sus pasos (cada paso incluye ProcesoCocina origen='usuario' o 'base').
+    Encola en el escritor de BD el alta de una receta de usuario (con sus
+    pasos y su resumen, en la misma transacción) y devuelve un Future con la
+    Receta creada. Parámetros como crear_receta_usuario.
     """
-    conn = conectar()
-    try:
+    def comando(conn: sqlite3.Connection) -> Receta:
         cur = conn.cursor()
 
         # Convertir ingredientes a JSON
@@ -499,155 +734,128 @@ def crear_receta_usuario(
         id_receta = cur.lastrowid
 
         # Insertar los pasos CON parámetros
-        for orden, id_proceso, temp, tiempo, vel, instr in pasos:
-            # No modificar el id_proceso aquí, ya viene correcto
+        for paso in pasos:
+            orden, id_proceso, temp, tiempo, vel, instr = paso[:6]
+            adelantable = len(paso) > 6 and paso[6]
+            # No modificar el id_proceso aquí, ya viene correcto. id_proceso_usuario
+            # (sin offset) es la clave foránea que borra el paso con su proceso.
+            id_proceso_usuario = id_proceso - 10000 if id_proceso >= 10000 else None
             cur.execute(
                 """
                 INSERT INTO pasos_receta_usuario 
-                    (id_receta, id_proceso, orden, temperatura, tiempo_segundos, velocidad, instrucciones)
-                VALUES (?, ?, ?, ?, ?, ?, ?);
+                    (id_receta, id_proceso, id_proceso_usuario, orden,
+                     temperatura, tiempo_segundos, velocidad, instrucciones, puede_adelantarse)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?);
                 """,
-                (id_receta, id_proceso, orden, temp, tiempo, vel, instr),
+                (id_receta, id_proceso, id_proceso_usuario, orden, temp, tiempo, vel, instr,
+                 int(bool(adelantable))),
             )
 
-        conn.commit()
+        # Mantener las columnas de resumen en la misma transacción
+        recalcular_resumenes(conn, "usuario", [id_receta])
 
-        # Cargar la receta recién creada con sus pasos
-        cur.execute(
-            """
-            SELECT id, nombre, descripcion, ingredientes
-            FROM recetas_usuario
-            WHERE id = ?;
-            """,
-            (id_receta,),
-        )
-        fila_receta = cur.fetchone()
-        if fila_receta is None:
+        # Cargar la receta recién creada con sus pasos (la transacción ve sus propias escrituras)
+        receta = next(_iterar_recetas(conn, "usuario", id_receta), None)
+        if receta is None:
             raise RuntimeError("No se pudo recuperar la receta recién creada.")
+        return receta
 
-        # Cargar pasos + procesos (buscar tanto en base como en usuario)
-        cur.execute(
-            """
-            SELECT p.orden,
-                   p.temperatura,
-                   p.tiempo_segundos,
-                   p.velocidad,
-                   p.instrucciones,
-                   COALESCE(pr_user.id, pr_base.id) as id,
-                   COALESCE(pr_user.nombre, pr_base.nombre) as nombre,
-                   COALESCE(pr_user.tipo, pr_base.tipo) as tipo,
-                   COALESCE(pr_user.tipo_ejecucion, pr_base.tipo_ejecucion) as tipo_ejecucion,
-                   COALESCE(pr_user.instrucciones, pr_base.instrucciones) as proc_instrucciones,
-                   CASE WHEN pr_user.id IS NOT NULL THEN 'usuario' ELSE 'base' END as origen
-            FROM pasos_receta_usuario AS p
-            LEFT JOIN procesos_usuario AS pr_user
-                ON p.id_proceso = pr_user.id
-            LEFT JOIN procesos_base AS pr_base
-                ON p.id_proceso = pr_base.id
-            WHERE p.id_receta = ?
-            ORDER BY p.orden;
+    return ESCRITOR.enviar(
+        comando,
+        lambda receta: _notificar_cambio_recetas("usuario", [receta.id]),
+    )
+
+
+def crear_receta_usuario(
+    nombre: str,
+    descripcion: str,
+    ingredientes: List[Dict[str, Any]],
+    pasos: List[PasoNuevo],
+) -> Receta:
+    """
+    Crea una nueva receta de usuario.
+
+    Parámetros:
+        nombre: nombre de la receta
+        descripcion: texto descriptivo
+        ingredientes: lista de dicts con {nombre, cantidad, unidad, nota}
+        pasos: lista de tuplas (orden, id_proceso, temperatura, tiempo_segundos, velocidad, instrucciones)
+               con un 7º elemento opcional, puede_adelantarse (pasos manuales),
+               por ejemplo: [
+                   (1, 3, None, None, None, "Añadir ingredientes secos"),  # Manual
+                   (2, 5, 100, 180, 2, None),  # Automático
+               ]
+
+    Devuelve:
+        Objeto Receta con sus pasos (cada paso incluye ProcesoCocina origen='usuario' o 'base').
+    """
+    return encolar_crear_receta_usuario(nombre, descripcion, ingredientes, pasos).result(ESPERA_RESULTADO_S)
+
+
+def encolar_eliminar_recetas_usuario(ids_recetas: List[int]) -> "Future[None]":
+    """
+    Encola en el escritor de BD la baja de varias recetas de usuario en una
+    sola sentencia; sus pasos se borran en cascada (ON DELETE CASCADE).
+    """
+    ids_recetas = list(dict.fromkeys(ids_recetas))
+
+    def comando(conn: sqlite3.Connection) -> None:
+        if not ids_recetas:
+            return
+        subconsulta, parametros = _subconsulta_ids(conn, ids_recetas)
+        conn.execute(
+            f"""
+            DELETE FROM recetas_usuario
+            WHERE id IN ({subconsulta});
             """,
-            (id_receta,),
+            parametros,
         )
-        filas_pasos = cur.fetchall()
-
-        pasos_obj: List[PasoReceta] = []
-        for fila in filas_pasos:
-            (orden, paso_temp, paso_tiempo, paso_vel, paso_instr,
-             pid, pnombre, ptipo, ptipo_ej, proc_instr, origen) = fila
-            
-            # Polimorfismo: Instanciar la subclase correcta
-            if ptipo_ej == "manual":
-                proceso = ProcesoManual(
-                    id_=pid,
-                    nombre=pnombre,
-                    tipo=ptipo,
-                    tipo_ejecucion=ptipo_ej,
-                    instrucciones=proc_instr,
-                    origen=origen,
-                )
-            else:
-                proceso = ProcesoAutomatico(
-                    id_=pid,
-                    nombre=pnombre,
-                    tipo=ptipo,
-                    tipo_ejecucion=ptipo_ej,
-                    instrucciones=proc_instr,
-                    origen=origen,
-                )
-            pasos_obj.append(
-                PasoReceta(
-                    orden=orden,
-                    proceso=proceso,
-                    temperatura=paso_temp,
-                    tiempo_segundos=paso_tiempo,
-                    velocidad=paso_vel,
-                    instrucciones=paso_instr,
-                )
-            )
 
-        # Parsear ingredientes
-        ingredientes_parsed = []
-        if fila_receta[3]:
-            try:
-                ingredientes_parsed = json.loads(fila_receta[3])
-            except Exception:
-                pass
-
-        return RecetaUsuario(
-            id_=id_receta,
-            nombre=fila_receta[1],
-            descripcion=fila_receta[2] or "",
-            ingredientes=ingredientes_parsed,
-            pasos=pasos_obj,
-        )
-    finally:
-        conn.close()
+    def al_confirmar(_) -> None:
+        if ids_recetas:
+            _notificar_cambio_recetas("usuario", _ids_a_avisar(ids_recetas))
+
+    return ESCRITOR.enviar(comando, al_confirmar)
+
+
+def eliminar_recetas_usuario(ids_recetas: List[int]) -> None:
+    """Elimina varias recetas de usuario y sus pasos en una sola transacción."""
+    encolar_eliminar_recetas_usuario(ids_recetas).result(ESPERA_RESULTADO_S)
+
+
+def encolar_eliminar_receta_usuario(id_receta: int) -> "Future[None]":
+    """Como encolar_eliminar_recetas_usuario, para una sola receta."""
+    return encolar_eliminar_recetas_usuario([id_receta])
 
 
 def eliminar_receta_usuario(id_receta: int) -> None:
     """
     Elimina una receta de usuario y sus pasos asociados.
     """
-    conn = conectar()
-    try:
-        cur = conn.cursor()
-        # Borrar los pasos primero
-        cur.execute(
-            """
-            DELETE FROM pasos_receta_usuario
-            WHERE id_receta = ?;
-            """,
-            (id_receta,),
-        )
-        # Borrar la receta
-        cur.execute(
-            """
-            DELETE FROM recetas_usuario
-            WHERE id = ?;
-            """,
-            (id_receta,),
-        )
-        conn.commit()
-    finally:
-        conn.close()
+    encolar_eliminar_receta_usuario(id_receta).result(ESPERA_RESULTADO_S)
 
 
 # ===================================
 # Reinicio de fábrica (envoltura)
 # ===================================
 
+def _tras_reinicio(_) -> None:
+    _notificar_cambio_procesos(None)
+    _notificar_cambio_recetas(None)
+
+
+def encolar_reinicio_de_fabrica() -> "Future[None]":
+    """Encola el reinicio de fábrica en el escritor de BD."""
+    return ESCRITOR.enviar(_reinicio_fabrica_sin_commit, _tras_reinicio)
+
+
 def reinicio_de_fabrica() -> None:
     """
     Envuelve a data.init_db.reinicio_fabrica, para que puedas llamarlo desde
     tu lógica de aplicación (por ejemplo desde la UI) sin importar los detalles
     de conexión.
     """
-    conn = conectar()
-    try:
-        reinicio_fabrica(conn)
-    finally:
-        conn.close()
+    encolar_reinicio_de_fabrica().result(ESPERA_RESULTADO_S)
 
 
 # ===================================
@@ -0,0 +1,141 @@
+"""
+Servicios asíncronos para los manejadores de NiceGUI.
+
+Las funciones de servicios son bloqueantes. Llamarlas directamente desde un
+manejador o un ui.timer detiene el bucle de eventos, y con él la interfaz de
+todos los clientes conectados, mientras dura la consulta. Aquí están sus
+equivalentes `async`: cada llamada se ejecuta en el hilo dedicado de BD
+(EJECUTOR_BD) y el manejador hace `await` sin bloquear el bucle.
+
+Las escrituras no ocupan ese hilo: se encolan en el escritor de BD
+(data/escritor.py) y se espera su Future con asyncio.wrap_future. Los avisos a
+los observadores (catálogo, caché de fragmentos, índice de búsqueda) se
+emiten desde esos hilos, nunca desde el bucle de eventos.
+"""
+
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, TypeVar
+
+from . import servicios
+from .catalogo import CATALOGO, ORIGENES
+from .modelos import ProcesoCocina, Receta, ResumenReceta
+
+T = TypeVar("T")
+
+# Hilo dedicado a las lecturas lanzadas desde la UI
+EJECUTOR_BD = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bd")
+
+
+async def en_hilo_bd(funcion: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    """Ejecuta funcion(*args, **kwargs) en el hilo de BD y espera su resultado."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(EJECUTOR_BD, functools.partial(funcion, *args, **kwargs))
+
+
+# =============
+# PROCESOS
+# =============
+
+async def cargar_procesos_base(limite: Optional[int] = None, desplazamiento: int = 0) -> List[ProcesoCocina]:
+    return await en_hilo_bd(servicios.cargar_procesos_base, limite, desplazamiento)
+
+
+async def cargar_procesos_usuario(limite: Optional[int] = None, desplazamiento: int = 0) -> List[ProcesoCocina]:
+    return await en_hilo_bd(servicios.cargar_procesos_usuario, limite, desplazamiento)
+
+
+async def obtener_proceso_base_por_id(id_proceso: int) -> Optional[ProcesoCocina]:
+    return await en_hilo_bd(servicios.obtener_proceso_base_por_id, id_proceso)
+
+
+async def obtener_proceso_usuario_por_id(id_proceso: int) -> Optional[ProcesoCocina]:
+    return await en_hilo_bd(servicios.obtener_proceso_usuario_por_id, id_proceso)
+
+
+async def crear_proceso_usuario(
+    nombre: str,
+    tipo: str,
+    tipo_ejecucion: str,
+    instrucciones: str,
+) -> ProcesoCocina:
+    return await asyncio.wrap_future(
+        servicios.encolar_crear_proceso_usuario(nombre, tipo, tipo_ejecucion, instrucciones)
+    )
+
+
+async def eliminar_proceso_usuario(id_proceso: int) -> None:
+    await asyncio.wrap_future(servicios.encolar_eliminar_proceso_usuario(id_proceso))
+
+
+async def eliminar_procesos_usuario(ids_procesos: List[int]) -> List[int]:
+    return await asyncio.wrap_future(servicios.encolar_eliminar_procesos_usuario(ids_procesos))
+
+
+# ==============
+# RECETAS
+# ==============
+
+async def obtener_receta(origen: str, id_receta: int) -> Optional[Receta]:
+    return await en_hilo_bd(servicios.obtener_receta, origen, id_receta)
+
+
+async def cargar_resumenes_recetas_base(
+    limite: Optional[int] = None, desplazamiento: int = 0,
+) -> List[ResumenReceta]:
+    return await en_hilo_bd(servicios.cargar_resumenes_recetas_base, limite, desplazamiento)
+
+
+async def cargar_resumenes_recetas_usuario(
+    limite: Optional[int] = None, desplazamiento: int = 0,
+) -> List[ResumenReceta]:
+    return await en_hilo_bd(servicios.cargar_resumenes_recetas_usuario, limite, desplazamiento)
+
+
+async def obtener_resumen_receta(origen: str, id_receta: int) -> Optional[ResumenReceta]:
+    return await en_hilo_bd(servicios.obtener_resumen_receta, origen, id_receta)
+
+
+async def crear_receta_usuario(
+    nombre: str,
+    descripcion: str,
+    ingredientes: List[Dict[str, Any]],
+    pasos: List[servicios.PasoNuevo],
+) -> Receta:
+    return await asyncio.wrap_future(
+        servicios.encolar_crear_receta_usuario(nombre, descripcion, ingredientes, pasos)
+    )
+
+
+async def eliminar_receta_usuario(id_receta: int) -> None:
+    await asyncio.wrap_future(servicios.encolar_eliminar_receta_usuario(id_receta))
+
+
+async def eliminar_recetas_usuario(ids_recetas: List[int]) -> None:
+    await asyncio.wrap_future(servicios.encolar_eliminar_recetas_usuario(ids_recetas))
+
+
+# ===================================
+# Reinicio de fábrica y catálogo
+# ===================================
+
+def _cargar_catalogo() -> None:
+    for origen in ORIGENES:
+        CATALOGO.procesos(origen)
+        CATALOGO.resumenes(origen)
+
+
+async def precargar_catalogo() -> None:
+    """
+    Carga en el hilo de BD las colecciones del catálogo que falten, para que
+    las páginas (que leen CATALOGO desde el bucle de eventos) no tengan que
+    esperar a la BD. Se usa al arrancar y tras un reinicio de fábrica.
+    """
+    await en_hilo_bd(_cargar_catalogo)
+
+
+async def reinicio_de_fabrica() -> None:
+    await asyncio.wrap_future(servicios.encolar_reinicio_de_fabrica())
+    # El reinicio vacía el catálogo entero: recargarlo fuera del bucle de eventos
+    await precargar_catalogo()
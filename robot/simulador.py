@@ -0,0 +1,509 @@
+"""
+Simulador de eventos discretos de una flota de robots de cocina.
+
+Responde a preguntas de capacidad ("¿cuántos robots hacen falta para servir
+este menú antes de las 13:00?") sin cocinar en tiempo real. Cada robot
+virtual (RobotVirtual) recorre los mismos estados que RobotCocina (EstadoRobot)
+y se pone en marcha con las mismas estrategias (EjecucionReceta,
+EjecucionManual), que llaman a su _ejecutar_receta_en_hilo /
+_ejecutar_manual_en_hilo; pero en lugar de un hilo que avanza segundo a
+segundo, esos métodos programan el siguiente evento en un reloj virtual.
+
+Para que cada cocción cueste pocos eventos, cada receta se compila una vez
+en tramos: los pasos automáticos seguidos se ejecutan como un único evento
+(su duración es la suma de la de cada paso, max(1, tiempo_segundos) como en
+RobotCocina) y solo los pasos manuales detienen al robot en
+ESPERANDO_CONFIRMACION, salvo los que se confirman por adelantado durante el
+paso automático anterior (como permite RobotCocina con el adelanto activo).
+Lo que tarda el operador en hacer y confirmar un paso manual se toma de una
+distribución (constante, uniforme, exponencial, lognormal o empírica). Con `operadores` se limita además cuántas
+confirmaciones se atienden a la vez: el resto espera en cola.
+"""
+
+import heapq
+import math
+import random
+from collections import deque
+from typing import Callable, Deque, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from .modelos import (
+    ConflictoEjecucionError,
+    EjecucionManual,
+    EjecucionReceta,
+    EstadoRobot,
+    EstrategiaEjecucion,
+    Receta,
+    RobotCocina,
+)
+
+# Segundos que tarda un operador en hacer y confirmar un paso manual
+Distribucion = Callable[[random.Random], float]
+
+# Máximo de robots que prueba robots_necesarios
+MAX_ROBOTS = 100
+
+
+# ==============================
+# Distribuciones de la espera
+# ==============================
+
+def constante(segundos: float) -> Distribucion:
+    return lambda rng: segundos
+
+
+def uniforme(minimo: float, maximo: float) -> Distribucion:
+    return lambda rng: rng.uniform(minimo, maximo)
+
+
+def exponencial(media: float) -> Distribucion:
+    return lambda rng: rng.expovariate(1.0 / media)
+
+
+def lognormal(mediana: float, sigma: float) -> Distribucion:
+    """Espera con cola larga: la mitad de las veces menos de `mediana`."""
+    mu = math.log(mediana)
+    return lambda rng: rng.lognormvariate(mu, sigma)
+
+
+def empirica(muestras: Sequence[float]) -> Distribucion:
+    """Remuestreo de esperas observadas (p. ej. del historial de cocciones)."""
+    muestras = list(muestras)
+    if not muestras:
+        raise ValueError("Se necesita al menos una muestra")
+    return lambda rng: rng.choice(muestras)
+
+
+# Espera por defecto: un operador atento con algún despiste ocasional
+ESPERA_MANUAL = lognormal(30.0, 0.6)
+
+
+# ==================
+# Recetas en tramos
+# ==================
+
+class Tramo(NamedTuple):
+    """
+    Pasos automáticos seguidos (`segundos` en total) que terminan en el paso
+    manual `indice_manual`, o en el fin de la receta si es None.
+    """
+    segundos: int
+    indice_manual: Optional[int]
+
+
+def compilar_receta(receta: Receta, adelanto_manual: bool = True) -> Tuple[Tramo, ...]:
+    """
+    Tramos de una receta; siempre hay al menos uno (el que llega al final).
+
+    Con adelanto_manual (como configura app.py), los pasos manuales que
+    RobotCocina deja confirmar por adelantado (marcados con
+    puede_adelantarse, tras un paso automático y sin un paso manual no
+    adelantable en medio) no detienen al robot: se supone que el operador
+    los hace mientras sigue el paso automático anterior.
+    """
+    tramos: List[Tramo] = []
+    segundos = 0
+    adelantables = False
+    for indice, paso in enumerate(receta.pasos):
+        if not paso.proceso.es_manual():
+            segundos += max(1, paso.tiempo_segundos or 1)
+            adelantables = adelanto_manual
+        elif adelantables and paso.puede_adelantarse:
+            continue
+        else:
+            tramos.append(Tramo(segundos, indice))
+            segundos = 0
+            adelantables = False
+    tramos.append(Tramo(segundos, None))
+    return tuple(tramos)
+
+
+# ================
+# Robot virtual
+# ================
+
+class RobotVirtual:
+    """
+    Robot con la máquina de estados de RobotCocina sobre el reloj de una
+    Simulacion. Las guardas de inicio son las del robot real (sus
+    _validar_inicio_*); no hay pausa ni reanudación (un robot simulado no se
+    pausa).
+    """
+
+    def __init__(self, simulacion: "Simulacion", numero: int) -> None:
+        self._simulacion = simulacion
+        self._numero = numero
+        self._estado = EstadoRobot.APAGADO
+        self._estrategia_actual: Optional[EstrategiaEjecucion] = None
+
+        self._receta_actual: Optional[Receta] = None
+        self._tramos: Tuple[Tramo, ...] = ()
+        self._tramo = 0
+        self._indice_paso_actual = 0
+        self._receta_completada = False
+
+        self._manual_activo = False
+        self._manual_tiempo_restante = 0
+
+    @property
+    def numero(self) -> int:
+        return self._numero
+
+    @property
+    def estado(self) -> str:
+        return self._estado
+
+    @property
+    def receta_actual(self) -> Optional[Receta]:
+        return self._receta_actual
+
+    @property
+    def indice_paso_actual(self) -> int:
+        return self._indice_paso_actual
+
+    @property
+    def receta_completada(self) -> bool:
+        return self._receta_completada
+
+    @property
+    def manual_activo(self) -> bool:
+        return self._manual_activo
+
+    # ===== CONTROL =====
+
+    def encender(self) -> None:
+        if self._estado == EstadoRobot.APAGADO:
+            self._estado = EstadoRobot.ESPERA
+
+    def seleccionar_receta(self, receta: Receta) -> None:
+        self._receta_actual = receta
+        if self._estado != EstadoRobot.APAGADO:
+            self._estado = EstadoRobot.ESPERA
+        self._tramos = self._simulacion._tramos(receta)
+        self._tramo = 0
+        self._indice_paso_actual = 0
+        self._receta_completada = False
+
+    def iniciar_coccion(self) -> None:
+        RobotCocina._validar_inicio_coccion(self._estado, self._receta_actual, self._manual_activo, False)
+        if self._estado != EstadoRobot.ESPERA:
+            # Sin pausa no hay nada que reanudar
+            raise ConflictoEjecucionError("El robot ya está ejecutando algo.")
+        self._estrategia_actual = EjecucionReceta(self._receta_actual)
+        self._estado = EstadoRobot.COCINANDO
+        self._estrategia_actual.ejecutar(self)
+
+    def iniciar_manual(self, temperatura: int, velocidad: int, tiempo: int) -> None:
+        RobotCocina._validar_inicio_manual(
+            self._estado, self._estrategia_actual, self._manual_activo,
+            temperatura, velocidad, tiempo, False,
+        )
+        self._receta_actual = None
+        self._manual_activo = True
+        self._manual_tiempo_restante = tiempo
+        self._estrategia_actual = EjecucionManual(temperatura, velocidad, tiempo)
+        self._estado = EstadoRobot.COCINANDO
+        self._estrategia_actual.ejecutar(self)
+
+    def confirmar_paso_manual(self, indice: Optional[int] = None) -> bool:
+        if (self._estado != EstadoRobot.ESPERANDO_CONFIRMACION
+                or (indice is not None and indice != self._indice_paso_actual)):
+            return False
+        self._indice_paso_actual += 1
+        self._tramo += 1
+        self._estado = EstadoRobot.COCINANDO
+        self._ejecutar_receta_en_hilo()
+        return True
+
+    def limpiar_receta_completada(self) -> None:
+        self._receta_completada = False
+        self._estrategia_actual = None
+        self._receta_actual = None
+
+    # ===== EJECUCIÓN (llamada por las estrategias) =====
+
+    def _ejecutar_receta_en_hilo(self) -> None:
+        """Programa el fin del tramo en curso en el reloj virtual."""
+        segundos = self._tramos[self._tramo].segundos
+        if segundos == 0:
+            # Paso manual justo tras otro (o al principio): sin evento intermedio
+            self._fin_tramo()
+        else:
+            self._simulacion._programar(segundos, self._fin_tramo)
+
+    def _fin_tramo(self) -> None:
+        tramo = self._tramos[self._tramo]
+        if tramo.indice_manual is not None:
+            self._indice_paso_actual = tramo.indice_manual
+            self._estado = EstadoRobot.ESPERANDO_CONFIRMACION
+            self._simulacion._espera_confirmacion(self)
+            return
+        self._indice_paso_actual = len(self._receta_actual.pasos)
+        self._estado = EstadoRobot.ESPERA
+        self._receta_completada = True
+        self._simulacion._coccion_terminada(self)
+
+    def _ejecutar_manual_en_hilo(self) -> None:
+        self._simulacion._programar(self._manual_tiempo_restante, self._fin_manual)
+
+    def _fin_manual(self) -> None:
+        self._manual_activo = False
+        self._manual_tiempo_restante = 0
+        self._estrategia_actual = None
+        self._estado = EstadoRobot.ESPERA
+        self._simulacion._coccion_terminada(self)
+
+    def __repr__(self) -> str:
+        return (
+            f"RobotVirtual(numero={self._numero}, estado={self._estado!r}, "
+            f"receta_actual={self._receta_actual!r}, paso={self._indice_paso_actual})"
+        )
+
+
+# ===============
+# Simulación
+# ===============
+
+class CoccionSimulada(NamedTuple):
+    """
+    Una receta cocinada en la simulación (tiempos en segundos virtuales).
+    numero es la posición de la cocción entre todas las encargadas, en el
+    orden de las llamadas a encargar (una por unidad de `cantidad`).
+    """
+    receta: Receta
+    robot: int
+    llegada_s: float
+    inicio_s: float
+    fin_s: float
+    espera_manual_s: float
+    numero: int
+
+    @property
+    def duracion_s(self) -> float:
+        return self.fin_s - self.inicio_s
+
+
+class ResultadoSimulacion(NamedTuple):
+    cocciones: List[CoccionSimulada]
+    num_robots: int
+    eventos: int
+
+    @property
+    def fin_s(self) -> float:
+        """Instante en que termina la última cocción (makespan)."""
+        return max((c.fin_s for c in self.cocciones), default=0.0)
+
+    @property
+    def espera_manual_s(self) -> float:
+        """Tiempo total de los robots parados esperando a un operador."""
+        return sum(c.espera_manual_s for c in self.cocciones)
+
+    @property
+    def ocupacion(self) -> float:
+        """Fracción del tiempo (hasta fin_s) que los robots han estado cocinando."""
+        if self.num_robots == 0 or self.fin_s <= 0:
+            return 0.0
+        return sum(c.duracion_s for c in self.cocciones) / (self.num_robots * self.fin_s)
+
+
+class _Pedido(NamedTuple):
+    receta: Receta
+    llegada_s: float
+    numero: int
+
+
+class Simulacion:
+    """
+    Flota de `num_robots` robots que cocinan, por orden de llegada, las
+    recetas encargadas. Un robot libre toma el siguiente encargo ya llegado.
+
+    espera_manual: distribución de lo que tarda un operador en hacer y
+    confirmar un paso manual. operadores: confirmaciones que se atienden a la
+    vez (None = sin límite). adelanto_manual: los pasos manuales adelantables
+    no detienen al robot (compilar_receta).
+    """
+
+    def __init__(
+        self,
+        num_robots: int,
+        espera_manual: Distribucion = ESPERA_MANUAL,
+        operadores: Optional[int] = None,
+        semilla: Optional[int] = None,
+        adelanto_manual: bool = True,
+    ) -> None:
+        if num_robots < 1:
+            raise ValueError("Se necesita al menos un robot")
+        if operadores is not None and operadores < 1:
+            raise ValueError("Se necesita al menos un operador")
+        self._espera_manual = espera_manual
+        self._operadores_libres = operadores
+        self._rng = random.Random(semilla)
+        self._adelanto_manual = adelanto_manual
+
+        self._ahora = 0.0
+        self._eventos: List[Tuple[float, int, Callable[[], None]]] = []
+        self._secuencia = 0
+        self._num_eventos = 0
+
+        self._pedidos: List[_Pedido] = []
+        self._num_pedidos = 0
+        self._cola_pedidos: Deque[_Pedido] = deque()
+        self._cola_confirmaciones: Deque[RobotVirtual] = deque()
+        self._compiladas: Dict[int, Tuple[Receta, Tuple[Tramo, ...]]] = {}
+
+        self._robots = [RobotVirtual(self, numero) for numero in range(num_robots)]
+        self._libres: Deque[RobotVirtual] = deque(self._robots)
+        # Por robot: (pedido en curso, inicio, inicio de la espera actual, espera acumulada)
+        self._en_curso: Dict[int, List] = {}
+        self._cocciones: List[CoccionSimulada] = []
+
+    @property
+    def ahora(self) -> float:
+        """Instante virtual actual, en segundos desde el inicio."""
+        return self._ahora
+
+    @property
+    def robots(self) -> List[RobotVirtual]:
+        return list(self._robots)
+
+    def encargar(self, receta: Receta, cantidad: int = 1, llegada_s: float = 0.0) -> None:
+        """Encarga `cantidad` cocciones de una receta, disponibles desde llegada_s."""
+        if not receta.pasos:
+            raise ValueError(f"La receta {receta.nombre!r} no tiene pasos")
+        primero = self._num_pedidos
+        self._num_pedidos += cantidad
+        self._pedidos.extend(_Pedido(receta, llegada_s, primero + i) for i in range(cantidad))
+
+    def ejecutar(self, hasta_s: Optional[float] = None) -> ResultadoSimulacion:
+        """
+        Simula hasta que no quedan eventos (o hasta `hasta_s`) y devuelve las
+        cocciones terminadas.
+        """
+        # Los encargos entran en la cola de la flota al llegar
+        for pedido in sorted(self._pedidos, key=lambda p: p.llegada_s):
+            self._programar(pedido.llegada_s - self._ahora, lambda p=pedido: self._llega(p))
+        self._pedidos = []
+        for robot in self._robots:
+            robot.encender()
+
+        eventos = self._eventos
+        while eventos:
+            if hasta_s is not None and eventos[0][0] > hasta_s:
+                break
+            self._ahora, _, accion = heapq.heappop(eventos)
+            self._num_eventos += 1
+            accion()
+
+        return ResultadoSimulacion(list(self._cocciones), len(self._robots), self._num_eventos)
+
+    # ===== Reloj =====
+
+    def _programar(self, retraso: float, accion: Callable[[], None]) -> None:
+        self._secuencia += 1
+        heapq.heappush(self._eventos, (self._ahora + retraso, self._secuencia, accion))
+
+    def _tramos(self, receta: Receta) -> Tuple[Tramo, ...]:
+        # Cada receta se compila una vez por simulación (se guarda la receta
+        # junto a sus tramos para que su id() no se reutilice)
+        compilada = self._compiladas.get(id(receta))
+        if compilada is None:
+            compilada = (receta, compilar_receta(receta, self._adelanto_manual))
+            self._compiladas[id(receta)] = compilada
+        return compilada[1]
+
+    # ===== Encargos =====
+
+    def _llega(self, pedido: _Pedido) -> None:
+        self._cola_pedidos.append(pedido)
+        self._repartir()
+
+    def _repartir(self) -> None:
+        while self._libres and self._cola_pedidos:
+            robot = self._libres.popleft()
+            pedido = self._cola_pedidos.popleft()
+            self._en_curso[robot.numero] = [pedido, self._ahora, 0.0, 0.0]
+            robot.seleccionar_receta(pedido.receta)
+            robot.iniciar_coccion()
+
+    def _coccion_terminada(self, robot: RobotVirtual) -> None:
+        datos = self._en_curso.pop(robot.numero, None)
+        if datos is not None:
+            pedido, inicio, _, espera = datos
+            self._cocciones.append(
+                CoccionSimulada(
+                    pedido.receta, robot.numero, pedido.llegada_s, inicio, self._ahora, espera, pedido.numero,
+                )
+            )
+        robot.limpiar_receta_completada()
+        self._libres.append(robot)
+        self._repartir()
+
+    # ===== Operadores =====
+
+    def _espera_confirmacion(self, robot: RobotVirtual) -> None:
+        self._en_curso[robot.numero][2] = self._ahora
+        if self._operadores_libres is None:
+            self._programar(self._espera_manual(self._rng), lambda: self._confirmar(robot))
+            return
+        self._cola_confirmaciones.append(robot)
+        self._atender()
+
+    def _atender(self) -> None:
+        while self._operadores_libres and self._cola_confirmaciones:
+            robot = self._cola_confirmaciones.popleft()
+            self._operadores_libres -= 1
+            self._programar(self._espera_manual(self._rng), lambda r=robot: self._confirmar(r))
+
+    def _confirmar(self, robot: RobotVirtual) -> None:
+        datos = self._en_curso[robot.numero]
+        datos[3] += self._ahora - datos[2]
+        if self._operadores_libres is not None:
+            self._operadores_libres += 1
+            self._atender()
+        robot.confirmar_paso_manual()
+
+
+# ====================
+# Planificación
+# ====================
+
+def simular(
+    recetas: Sequence[Receta],
+    num_robots: int,
+    espera_manual: Distribucion = ESPERA_MANUAL,
+    operadores: Optional[int] = None,
+    semilla: Optional[int] = 0,
+) -> ResultadoSimulacion:
+    """Simula cocinar `recetas` (todas disponibles en el instante 0)."""
+    simulacion = Simulacion(num_robots, espera_manual, operadores, semilla)
+    for receta in recetas:
+        simulacion.encargar(receta)
+    return simulacion.ejecutar()
+
+
+def robots_necesarios(
+    recetas: Sequence[Receta],
+    plazo_s: float,
+    espera_manual: Distribucion = ESPERA_MANUAL,
+    operadores: Optional[int] = None,
+    semilla: Optional[int] = 0,
+    max_robots: int = MAX_ROBOTS,
+) -> Optional[int]:
+    """
+    Menor número de robots con el que todas las recetas terminan dentro de
+    `plazo_s` segundos, o None si ni con max_robots se llega.
+
+    Búsqueda binaria sobre el número de robots: supone que con más robots no
+    se termina más tarde, lo que con esperas aleatorias es solo aproximado.
+    """
+    if not recetas:
+        return 0
+    if simular(recetas, max_robots, espera_manual, operadores, semilla).fin_s > plazo_s:
+        return None
+    bajo, alto = 1, max_robots
+    while bajo < alto:
+        medio = (bajo + alto) // 2
+        if simular(recetas, medio, espera_manual, operadores, semilla).fin_s <= plazo_s:
+            alto = medio
+        else:
+            bajo = medio + 1
+    return bajo
@@ -0,0 +1,220 @@
+"""
+Fragmentos HTML precalculados de las recetas (ingredientes y pasos).
+
+El dashboard muestra los ingredientes y los pasos de la receta seleccionada.
+En lugar de reconstruir decenas de elementos NiceGUI cada vez que se cambia de
+receta, se genera una sola vez el HTML de cada receta y se guarda en una caché
+indexada por (origen, id) y por la versión del contenido de cada receta.
+Cambiar de receta pasa a ser una búsqueda en la caché + un único set_content().
+"""
+
+import threading
+from collections import OrderedDict
+from html import escape
+from typing import Awaitable, Callable, NamedTuple, Optional, Tuple
+
+from robot import servicios
+from utils.utils_tiempo import segundos_a_mmss
+
+
+class FragmentosReceta(NamedTuple):
+    """HTML listo para pintar de una receta."""
+    ingredientes: str = ""
+    pasos: str = ""
+
+
+# ======================
+# Generación del HTML
+# ======================
+
+# Marcado propio con clases de Tailwind: no depende del DOM que generen
+# ui.icon()/ui.badge() en cada versión de NiceGUI/Quasar. Los iconos solo
+# necesitan la fuente Material Icons que ya carga NiceGUI.
+_CLASES_ICONO = "material-icons inline-block text-lg leading-none select-none"
+_CLASES_BADGE = "inline-flex items-center whitespace-nowrap rounded px-1.5 py-0.5 text-xs leading-none text-white"
+
+_COLORES_BADGE = {
+    'purple': 'bg-purple-600',
+    'green': 'bg-green-600',
+    'indigo': 'bg-indigo-500',
+}
+
+
+def _icono(nombre: str, clases: str) -> str:
+    """Icono Material como <span> con la fuente de iconos y clases Tailwind."""
+    return f'<span class="{_CLASES_ICONO} {clases}" aria-hidden="true">{nombre}</span>'
+
+
+def _badge(texto: str, color: str) -> str:
+    """Badge como <span> con clases Tailwind (color: clave de _COLORES_BADGE)."""
+    return f'<span class="{_CLASES_BADGE} {_COLORES_BADGE[color]}">{escape(texto)}</span>'
+
+
+def renderizar_ingredientes(receta) -> str:
+    """Devuelve el HTML de la lista de ingredientes ('' si no tiene)."""
+    ingredientes = getattr(receta, 'ingredientes', None)
+    if not ingredientes:
+        return ""
+
+    partes = ['<div class="space-y-2">']
+    for ing in ingredientes:
+        nota = (
+            f' <span class="text-gray-500">({escape(str(ing["nota"]))})</span>'
+            if ing.get('nota') else ''
+        )
+        partes.append(
+            f'<div class="flex items-center gap-2">'
+            f'<span class="text-indigo-600 dark:text-indigo-400">•</span>'
+            f'<b>{escape(str(ing["nombre"]))}</b>: '
+            f'{escape(str(ing["cantidad"]))} {escape(str(ing["unidad"]))}{nota}'
+            f'</div>'
+        )
+    partes.append('</div>')
+    return "".join(partes)
+
+
+def renderizar_pasos(receta) -> str:
+    """
+    Devuelve el HTML de los pasos ('' si no tiene), con el mismo diseño que
+    tenían los elementos NiceGUI: borde izquierdo, badge Manual/Automático,
+    nombre del proceso y parámetros o instrucciones.
+    """
+    pasos = getattr(receta, 'pasos', None)
+    if not pasos:
+        return ""
+
+    partes = ['<div class="space-y-3">']
+    for paso in pasos:
+        partes.append('<div class="flex flex-col border-l-4 border-indigo-500 pl-4 py-2 gap-1">')
+
+        # Línea 1: "Paso X:" + Badge
+        badge = _badge('Manual', 'purple') if paso.proceso.es_manual() else _badge('Automático', 'green')
+        if paso.proceso.es_manual() and paso.puede_adelantarse:
+            badge += _badge('Adelantable', 'indigo')
+        partes.append(
+            f'<div class="flex flex-row items-center gap-2">'
+            f'<span class="font-bold text-indigo-600 dark:text-indigo-400">Paso {paso.orden}:</span>'
+            f'{badge}</div>'
+        )
+
+        # Línea 2: Nombre del proceso
+        partes.append(f'<div class="font-medium">{escape(paso.proceso.nombre)}</div>')
+
+        # Línea 3: Parámetros/Instrucciones
+        if paso.proceso.es_manual():
+            instr = paso.instrucciones or paso.proceso.instrucciones or ""
+            if instr:
+                partes.append(
+                    f'<div class="flex flex-row items-center gap-1">'
+                    f'{_icono("edit_note", "text-purple-500 dark:text-purple-400")}'
+                    f'<span class="text-sm text-gray-600 dark:text-gray-400 italic">{escape(instr)}</span>'
+                    f'</div>'
+                )
+        else:
+            temp = paso.temperatura if paso.temperatura is not None else 0
+            tiempo = paso.tiempo_segundos if paso.tiempo_segundos is not None else 0
+            vel = paso.velocidad if paso.velocidad is not None else 0
+            partes.append(
+                f'<div class="flex flex-row items-center gap-2 text-sm text-gray-600 dark:text-gray-400">'
+                f'{_icono("thermostat", "text-red-500 dark:text-red-400")}<span>{temp}°C</span>'
+                f'<span>·</span>'
+                f'{_icono("timer", "text-orange-500 dark:text-orange-400")}<span>{segundos_a_mmss(tiempo)}</span>'
+                f'<span>·</span>'
+                f'{_icono("speed", "text-blue-500 dark:text-blue-400")}<span>{vel}</span>'
+                f'</div>'
+            )
+
+        partes.append('</div>')
+    partes.append('</div>')
+    return "".join(partes)
+
+
+# ======================
+# Caché
+# ======================
+
+class CacheFragmentos:
+    """
+    Caché LRU de FragmentosReceta por receta.
+
+    Cada entrada guarda la versión de la receta con la que se generó; si la
+    versión ha cambiado se regenera. Además, servicios avisa de cada
+    modificación para desalojar inmediatamente las recetas afectadas.
+    """
+
+    def __init__(self, max_entradas: int = 256):
+        self._max_entradas = max_entradas
+        self._entradas: "OrderedDict[Tuple[str, int], Tuple[int, FragmentosReceta]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _buscar(self, clave: Tuple[str, int], version: int) -> Optional[FragmentosReceta]:
+        with self._lock:
+            entrada = self._entradas.get(clave)
+            if entrada is not None and entrada[0] == version:
+                self._entradas.move_to_end(clave)
+                return entrada[1]
+        return None
+
+    def _guardar(self, clave: Tuple[str, int], version: int, receta) -> FragmentosReceta:
+        if receta is None:
+            return FragmentosReceta()
+
+        fragmentos = FragmentosReceta(
+            ingredientes=renderizar_ingredientes(receta),
+            pasos=renderizar_pasos(receta),
+        )
+
+        with self._lock:
+            self._entradas[clave] = (version, fragmentos)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self._max_entradas:
+                self._entradas.popitem(last=False)
+        return fragmentos
+
+    def obtener(self, origen: str, id_receta: int, cargar: Callable[[], object]) -> FragmentosReceta:
+        """
+        Devuelve los fragmentos de la receta (origen, id_receta).
+
+        `cargar` solo se invoca si no hay entrada válida en la caché; debe
+        devolver la receta completa (o None si ya no existe).
+        """
+        clave = (origen, id_receta)
+        version = servicios.version_receta(origen, id_receta)
+        fragmentos = self._buscar(clave, version)
+        if fragmentos is None:
+            fragmentos = self._guardar(clave, version, cargar())
+        return fragmentos
+
+    async def obtener_async(
+        self, origen: str, id_receta: int, cargar: Callable[[], Awaitable[object]],
+    ) -> FragmentosReceta:
+        """Como obtener(), pero `cargar` es una corrutina (p. ej. de servicios_async)."""
+        clave = (origen, id_receta)
+        version = servicios.version_receta(origen, id_receta)
+        fragmentos = self._buscar(clave, version)
+        if fragmentos is None:
+            fragmentos = self._guardar(clave, version, await cargar())
+        return fragmentos
+
+    def invalidar(self, origen: Optional[str] = None, id_receta: Optional[int] = None) -> None:
+        """
+        Desaloja entradas: una receta concreta, todas las de un origen
+        (id_receta=None) o todas (origen=None).
+        """
+        with self._lock:
+            if origen is None:
+                self._entradas.clear()
+            elif id_receta is None:
+                for clave in [c for c in self._entradas if c[0] == origen]:
+                    del self._entradas[clave]
+            else:
+                self._entradas.pop((origen, id_receta), None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entradas)
+
+
+# Instancia compartida por todas las páginas/clientes
+CACHE_FRAGMENTOS = CacheFragmentos()
+servicios.registrar_observador_recetas(CACHE_FRAGMENTOS.invalidar)
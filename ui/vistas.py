@@ -1,3 +1,4 @@
+from collections import OrderedDict
 from typing import Dict, List, Optional
 
 from nicegui import ui
@@ -10,7 +11,11 @@ from robot.modelos import (
     ModoManualError,
     ConflictoEjecucionError,
 )
-from robot import servicios
+from robot import servicios_async
+from robot.catalogo import CATALOGO
+from robot.busqueda import INDICE_RECETAS, buscar_recetas, normalizar
+from robot.atencion import COLA_ATENCION
+from ui.fragmentos import CACHE_FRAGMENTOS
 from utils.utils_tiempo import mmss_a_segundos, segundos_a_mmss
 
 THEME_STATE = {'dark': False}
@@ -35,12 +40,47 @@ COLORS = {
 CARD_BASE = '!bg-white dark:!bg-gray-800 shadow-lg rounded-xl'
 CARD_MIN_H = 'min-h-[170px]'
 
+# Paginación: solo se crean las filas/tarjetas visibles
+FILAS_POR_PAGINA = 10
+OPCIONES_FILAS = [10, 25, 50]
+RECETAS_POR_PAGINA = 12
+
+# Selector de recetas del dashboard: opciones por búsqueda y caché por sesión
+OPCIONES_BUSQUEDA = 20
+MAX_BUSQUEDAS_CACHEADAS = 32
+
+COLUMNAS_PROCESOS = [
+    {'name': 'nombre', 'label': 'Nombre', 'field': 'nombre', 'align': 'left'},
+    {'name': 'tipo', 'label': 'Tipo', 'field': 'tipo', 'align': 'left'},
+    {'name': 'tipo_ej', 'label': 'Tipo de Ejecución', 'field': 'tipo_ej', 'align': 'left'},
+]
+
 def _card_classes(extra: str = '') -> str: 
     return f'{CARD_BASE} {CARD_MIN_H} {extra}'.strip()
 
 
+def _suscribir_catalogo(al_cambiar) -> None:
+    """
+    Suscribe la página actual a los cambios de CATALOGO. Los cambios se recogen
+    desde un ui.timer de la propia página (nunca desde el hilo que modificó los
+    datos) y la suscripción se cancela al desconectarse el cliente.
+    """
+    suscripcion = CATALOGO.suscribir()
+
+    def recoger_cambios():
+        cambios = suscripcion.pendientes()
+        if cambios:
+            al_cambiar(cambios)
+
+    ui.timer(interval=0.5, callback=recoger_cambios)
+    ui.context.client.on_disconnect(suscripcion.cancelar)
+
+
 def _crear_navegacion(robot: RobotCocina, refrescar_callback=None):
-    """Drawer lateral de navegación moderna."""
+    """
+    Drawer lateral de navegación moderna. `refrescar_callback` es una corrutina
+    que repinta la página tras un reinicio de fábrica.
+    """
     with ui.left_drawer(fixed=True, bordered=True).classes(
         '!bg-gradient-to-b !from-indigo-50 !to-white dark:!from-gray-800 dark:!to-gray-700 overflow-y-auto'
     ) as drawer:
@@ -68,6 +108,7 @@ def _crear_navegacion(robot: RobotCocina, refrescar_callback=None):
             nav_item('dashboard', 'Panel de Control', '/')
             nav_item('precision_manufacturing', 'Procesos', '/procesos')
             nav_item('menu_book', 'Recetas', '/recetas')
+            nav_item('pan_tool', 'Operador', '/operador')
 
             ui.separator().classes('my-4')
 
@@ -95,11 +136,12 @@ def _crear_navegacion(robot: RobotCocina, refrescar_callback=None):
                         'text-sm text-gray-600 dark:text-gray-400 mb-3'
                     )
 
-                    def hacer_reinicio():
-                        servicios.reinicio_de_fabrica()
+                    async def hacer_reinicio():
+                        # En el hilo de BD: el resto de clientes sigue respondiendo
+                        await servicios_async.reinicio_de_fabrica()
                         robot.apagar()
                         if refrescar_callback:
-                            refrescar_callback()
+                            await refrescar_callback()
                         ui.notify('Reinicio de fábrica completado.', type='positive')
 
                     with ui.dialog() as dialog_reset:
@@ -125,7 +167,6 @@ def _crear_navegacion(robot: RobotCocina, refrescar_callback=None):
 def registrar_vistas(robot: RobotCocina) -> None:
     """Registra las vistas con diseño renovado y layout consistente."""
 
-    RECETAS_DISPONIBLES: Dict[str, object] = {}
     ULTIMA_RECETA_SELECCIONADA: dict[str, Optional[str]] = {'label': None}
     ESTADO_RECETA = {'nombre': '(ninguna)'}
     ESTADO_BARRA = {
@@ -144,35 +185,34 @@ def registrar_vistas(robot: RobotCocina) -> None:
 
     NOTIFICACIONES_MOSTRADAS = set()
 
-    def construir_etiquetas_recetas() -> List[str]:
-        RECETAS_DISPONIBLES.clear()
-        etiquetas: List[str] = []
+    def etiqueta_receta(resumen) -> str:
+        return f"[Base] {resumen.nombre}" if resumen.es_de_fabrica() else f"[Usuario] {resumen.nombre}"
 
-        recetas_base = servicios.cargar_recetas_base()
-        for r in recetas_base:
-            label = f"[Base] {r.nombre}"
-            RECETAS_DISPONIBLES[label] = r
-            etiquetas.append(label)
+    def resumen_de_etiqueta(label: Optional[str]):
+        """Resumen (del catálogo compartido) de la receta con esa etiqueta, o None."""
+        if not label:
+            return None
+        if label.startswith("[Base] "):
+            return CATALOGO.resumen_por_nombre("base", label[len("[Base] "):])
+        if label.startswith("[Usuario] "):
+            return CATALOGO.resumen_por_nombre("usuario", label[len("[Usuario] "):])
+        return None
 
-        recetas_usuario = servicios.cargar_recetas_usuario()
-        for r in recetas_usuario:
-            label = f"[Usuario] {r.nombre}"
-            RECETAS_DISPONIBLES[label] = r
-            etiquetas.append(label)
+    def construir_etiquetas_recetas(texto: str = '') -> List[str]:
+        """
+        Devuelve las etiquetas de las mejores coincidencias para `texto`
+        (como mucho OPCIONES_BUSQUEDA).
+        """
+        # Solo resúmenes: la receta completa se carga al seleccionarla
+        return [etiqueta_receta(r) for r in buscar_recetas(texto, OPCIONES_BUSQUEDA)]
 
-        return etiquetas
-    
-    def calcular_tiempo_estimado(receta):
-        """Calcula el tiempo estimado de una receta usando los parámetros del PASO."""
-        tiempo_total_segundos = 0
-        pasos_manuales = 0
-
-        for paso in receta.pasos:
-            if paso.proceso.es_manual():
-                pasos_manuales += 1
-            else:
-                # CAMBIO: Ahora usamos paso.tiempo_segundos en lugar de proceso.tiempo_segundos
-                tiempo_total_segundos += paso.tiempo_segundos or 0
+    def calcular_tiempo_estimado(resumen):
+        """
+        Formatea el tiempo estimado de una receta a partir de su resumen
+        precalculado (ResumenReceta), sin recorrer los pasos.
+        """
+        tiempo_total_segundos = resumen.tiempo_automatico_segundos
+        pasos_manuales = resumen.pasos_manuales
 
         if tiempo_total_segundos <= 0:
             return None
@@ -213,14 +253,16 @@ def registrar_vistas(robot: RobotCocina) -> None:
         2. El modo manual NO está activo (acaba de terminar)
         3. Aún no se ha notificado
         """
-        estado_actual = robot.estado
-        receta_actual = robot.receta_actual
+        # Una sola instantánea para leer un estado coherente sin bloquear al robot
+        inst = robot.instantanea
+        estado_actual = inst.estado
+        receta_actual = inst.receta_actual
         
         # ===== DETECTAR RECETA COMPLETADA =====
         # Solo notificar si hay una receta y el robot está en espera
         if estado_actual == EstadoRobot.ESPERA and receta_actual is not None:
             # Obtener progreso
-            prog_actual = float(getattr(robot, 'progreso', 0.0) or 0.0)
+            prog_actual = float(inst.progreso or 0.0)
             
             # Detectar receta completada: progreso en 0 o cercano a 100
             # (el robot resetea a 0 después de completar)
@@ -242,7 +284,7 @@ def registrar_vistas(robot: RobotCocina) -> None:
         
         # ===== DETECTAR MODO MANUAL COMPLETADO =====
         # Detectar cuando el modo manual acaba de terminar
-        if estado_actual == EstadoRobot.ESPERA and not robot.manual_activo:
+        if estado_actual == EstadoRobot.ESPERA and not inst.manual_activo:
             # Si antes estaba activo y ahora no, significa que acaba de terminar
             if ESTADO_BARRA.get('manual_estaba_activo', False):
                 # Verificar si ya fue notificada
@@ -259,7 +301,7 @@ def registrar_vistas(robot: RobotCocina) -> None:
                 ESTADO_BARRA['manual_estaba_activo'] = False
         
         # Actualizar flag de manual activo para detectar transiciones
-        if robot.manual_activo:
+        if inst.manual_activo:
             ESTADO_BARRA['manual_estaba_activo'] = True
 
     # ==================================================================================
@@ -272,8 +314,8 @@ def registrar_vistas(robot: RobotCocina) -> None:
         ui.page_title('Dashboard - Robot de Cocina')
         
         # Función de refresco completo para el dashboard
-        def refrescar_dashboard_completo():
-            refrescar_recetas()
+        async def refrescar_dashboard_completo():
+            await refrescar_recetas()
             switch_encendido.value = False
             ESTADO_BARRA['completada'] = False
             ESTADO_BARRA['ultimo_paso_index'] = -1
@@ -557,6 +599,15 @@ def registrar_vistas(robot: RobotCocina) -> None:
                             clearable=True,
                         ).props('outlined').classes('w-full min-h-[56px]')
 
+                        # Búsqueda en servidor: el select solo lleva las mejores coincidencias.
+                        # throttle sin eventos iniciales = esperar a que el usuario deje de teclear.
+                        select_receta.on(
+                            'input-value',
+                            lambda e: on_texto_busqueda(e.args),
+                            throttle=0.25,
+                            leading_events=False,
+                        )
+
                         with ui.row().classes('gap-2'):
                             boton_actualizar = ui.button('Actualizar Lista', on_click=lambda: refrescar_recetas(), color='indigo').props('outline icon=refresh')
                             boton_nueva = ui.button('Nueva Receta', on_click=lambda: ui.navigate.to('/recetas'), color='green').props('outline icon=add_circle')
@@ -606,7 +657,7 @@ def registrar_vistas(robot: RobotCocina) -> None:
                             ui.icon('touch_app', size='md').classes('text-indigo-600 dark:text-indigo-400')
                             ui.label('Control de Cocción').classes('text-xl font-bold text-gray-800 dark:text-white')
 
-                        def iniciar_coccion():
+                        async def iniciar_coccion():
                             # Verificar modo de operación
                             if modo['valor'] == 'Manual':
                                 # ===== MODO MANUAL =====
@@ -711,7 +762,8 @@ def registrar_vistas(robot: RobotCocina) -> None:
                                 ui.notify('Selecciona una receta', type='warning')
                                 return
 
-                            receta = RECETAS_DISPONIBLES.get(label)
+                            resumen = resumen_de_etiqueta(label)
+                            receta = await servicios_async.obtener_receta(resumen.origen, resumen.id) if resumen else None
                             if not receta:
                                 ui.notify('Receta no encontrada', type='negative')
                                 return
@@ -1054,80 +1106,33 @@ def registrar_vistas(robot: RobotCocina) -> None:
 
             with pasos_expansion:
                 with ui.column().classes('gap-2'):
-                    pasos_contenedor = ui.column().classes('space-y-3')
+                    # Un único elemento HTML: el marcado sale de CACHE_FRAGMENTOS
+                    pasos_contenedor = ui.html('<div></div>', sanitize=False)
 
             pasos_expansion.set_visibility(False)
 
-            def renderizar_pasos_receta(receta):
-                """Renderiza los pasos manteniendo el diseño original."""
-                # Limpiar contenido anterior
-                pasos_contenedor.clear()
-                
-                if not receta or not getattr(receta, 'pasos', None):
-                    pasos_expansion.set_visibility(False)
+            async def mostrar_fragmentos_receta(origen, id_receta, cargar, label=None):
+                """
+                Pinta ingredientes y pasos de una receta a partir de la caché de
+                fragmentos HTML; la corrutina `cargar` solo se espera si no está
+                cacheada. Si se indica `label` y mientras tanto se ha elegido otra
+                receta en el selector, no se pinta nada.
+                """
+                fragmentos = await CACHE_FRAGMENTOS.obtener_async(origen, id_receta, cargar)
+                if label is not None and ULTIMA_RECETA_SELECCIONADA['label'] != label:
                     return
-                
-                from utils.utils_tiempo import segundos_a_mmss
-                
-                with pasos_contenedor:
-                    for paso in receta.pasos:
-                        # Contenedor del paso con borde izquierdo
-                        with ui.column().classes('border-l-4 border-indigo-500 pl-4 py-2 gap-1'):
-                            # Línea 1: "Paso X:" + Badge
-                            with ui.row().classes('items-center gap-2'):
-                                ui.label(f'Paso {paso.orden}:').classes(
-                                    'font-bold text-indigo-600 dark:text-indigo-400'
-                                )
-                                if paso.proceso.es_manual():
-                                    ui.badge('Manual').props('color=purple')
-                                else:
-                                    ui.badge('Automático').props('color=green')
-                            
-                            # Línea 2: Nombre del proceso
-                            ui.label(paso.proceso.nombre).classes('font-medium')
-                            
-                            # Línea 3: Parámetros/Instrucciones
-                            if paso.proceso.es_manual():
-                                # Paso manual: icono + instrucciones en línea
-                                instr = paso.instrucciones or paso.proceso.instrucciones or ""
-                                if instr:
-                                    with ui.row().classes('items-center gap-1'):
-                                        ui.icon('edit_note').classes(
-                                            'text-purple-500 dark:text-purple-400'
-                                        ).style('font-size: 1.125rem')
-                                        ui.label(instr).classes(
-                                            'text-sm text-gray-600 dark:text-gray-400 italic'
-                                        )
-                            else:
-                                # Paso automático: iconos + parámetros en línea horizontal
-                                temp = paso.temperatura if paso.temperatura is not None else 0
-                                tiempo = paso.tiempo_segundos if paso.tiempo_segundos is not None else 0
-                                vel = paso.velocidad if paso.velocidad is not None else 0
-                                
-                                with ui.row().classes('items-center gap-2 text-sm text-gray-600 dark:text-gray-400'):
-                                    # Temperatura
-                                    ui.icon('thermostat').classes(
-                                        'text-red-500 dark:text-red-400'
-                                    ).style('font-size: 1.125rem')
-                                    ui.label(f'{temp}°C')
-                                    
-                                    ui.label('·')
-                                    
-                                    # Tiempo
-                                    ui.icon('timer').classes(
-                                        'text-orange-500 dark:text-orange-400'
-                                    ).style('font-size: 1.125rem')
-                                    ui.label(segundos_a_mmss(tiempo))
-                                    
-                                    ui.label('·')
-                                    
-                                    # Velocidad
-                                    ui.icon('speed').classes(
-                                        'text-blue-500 dark:text-blue-400'
-                                    ).style('font-size: 1.125rem')
-                                    ui.label(f'{vel}')
-                
-                pasos_expansion.set_visibility(True)
+
+                if fragmentos.ingredientes:
+                    ingredientes_lista.set_content(fragmentos.ingredientes)
+                    ingredientes_expansion.set_visibility(True)
+                else:
+                    ingredientes_expansion.set_visibility(False)
+
+                if fragmentos.pasos:
+                    pasos_contenedor.set_content(fragmentos.pasos)
+                    pasos_expansion.set_visibility(True)
+                else:
+                    pasos_expansion.set_visibility(False)
 
             # ============ FILA 4: PASO ACTUAL ============
             paso_card = ui.card().classes(
@@ -1153,8 +1158,9 @@ def registrar_vistas(robot: RobotCocina) -> None:
             paso_card.set_visibility(False)
 
             def confirmar_paso():
-                robot.confirmar_paso_manual()
-                ui.notify('Paso confirmado, continuando...', type='positive')
+                # Un segundo clic (u otra pestaña) sobre el mismo paso no hace nada
+                if robot.confirmar_paso_manual(robot.indice_paso_actual):
+                    ui.notify('Paso confirmado, continuando...', type='positive')
                 boton_confirmar.set_visibility(False)
                 paso_card.set_visibility(False)
 
@@ -1220,8 +1226,46 @@ def registrar_vistas(robot: RobotCocina) -> None:
                             'rounded stripe animated color=green'
                         ).classes('w-full')
 
+                    # 🔹 Anuncio del siguiente paso manual (con antelación)
+                    with ui.row().classes(
+                        'w-full items-center gap-3 p-3 rounded-lg !bg-purple-50 dark:!bg-purple-900/30 '
+                        '!border !border-purple-300 dark:!border-purple-700'
+                    ) as aviso_manual_row:
+                        ui.icon('notifications_active', size='sm').classes('text-purple-600 dark:text-purple-400 animate-pulse')
+                        aviso_manual_label = ui.label('').classes(
+                            'font-semibold text-purple-700 dark:text-purple-300'
+                        )
+                    aviso_manual_row.set_visibility(False)
+
+                    # 🔹 Paso manual que puede hacerse ya, sin esperar a este paso
+                    with ui.row().classes(
+                        'w-full items-center justify-between gap-3 p-3 rounded-lg !bg-indigo-50 dark:!bg-indigo-900/30 '
+                        '!border !border-indigo-300 dark:!border-indigo-700'
+                    ) as adelanto_row:
+                        with ui.column().classes('gap-0'):
+                            adelanto_label = ui.label('').classes(
+                                'font-semibold text-indigo-700 dark:text-indigo-300'
+                            )
+                            adelanto_instrucciones = ui.label('').classes(
+                                'text-sm text-gray-600 dark:text-gray-400'
+                            )
+                        ui.button(
+                            'Hecho',
+                            on_click=lambda: adelantar_paso(),
+                        ).props('unelevated color=indigo icon=fast_forward')
+                    adelanto_row.set_visibility(False)
+
             paso_auto_card.set_visibility(False)
 
+            # Paso que muestra la fila de adelanto: el botón adelanta ese y no otro
+            adelanto_mostrado = {'indice': None}
+
+            def adelantar_paso():
+                indice = adelanto_mostrado['indice']
+                if indice is None or not robot.adelantar_paso_manual(indice):
+                    return
+                ui.notify('Paso manual adelantado: el robot no se detendrá en él', type='positive')
+
             # ============ FILA 5: RECETA COMPLETADA ============
             completado_card = ui.card().classes(
                 'w-full bg-gradient-to-r from-emerald-50 to-green-50 '
@@ -1357,6 +1401,32 @@ def registrar_vistas(robot: RobotCocina) -> None:
                 paso_auto_barra.value = progreso_paso
                 paso_auto_progreso.text = f'{int(progreso_paso * 100)}%'
 
+                # Paso manual anunciado: el operador puede ir preparándolo
+                inst = robot.instantanea
+                indice_manual = inst.proximo_manual_indice
+                if inst.proximo_manual_en_s is not None and indice_manual is not None and indice_manual < total_pasos:
+                    aviso_manual_label.text = (
+                        f'Paso manual en {segundos_a_mmss(inst.proximo_manual_en_s)}: '
+                        f'{pasos[indice_manual].proceso.nombre}'
+                    )
+                    aviso_manual_row.set_visibility(True)
+                else:
+                    aviso_manual_row.set_visibility(False)
+
+                indice_adelanto = inst.adelantable_indice
+                adelanto_mostrado['indice'] = indice_adelanto
+                if indice_adelanto is not None and indice_adelanto < total_pasos:
+                    paso_adelanto = pasos[indice_adelanto]
+                    adelanto_label.text = (
+                        f'Puedes adelantar el paso {indice_adelanto + 1}: {paso_adelanto.proceso.nombre}'
+                    )
+                    adelanto_instrucciones.text = (
+                        paso_adelanto.instrucciones or paso_adelanto.proceso.instrucciones or ''
+                    )
+                    adelanto_row.set_visibility(True)
+                else:
+                    adelanto_row.set_visibility(False)
+
                 paso_auto_card.set_visibility(True)
 
             def set_cards_bloqueadas(bloquear: bool):
@@ -1386,47 +1456,69 @@ def registrar_vistas(robot: RobotCocina) -> None:
                 else:
                     card_modo.classes(remove='opacity-50 pointer-events-none')
 
-            def refrescar_recetas():
-                etiquetas = construir_etiquetas_recetas()
-                select_receta.options = etiquetas
-                select_receta.disabled = not bool(etiquetas)
+            # Caché de búsquedas de esta sesión: (versión del índice, texto) -> etiquetas
+            busquedas_sesion: "OrderedDict[tuple, List[str]]" = OrderedDict()
+
+            def etiquetas_para(texto: str) -> List[str]:
+                clave = (INDICE_RECETAS.version, normalizar(texto))
+                etiquetas = busquedas_sesion.get(clave)
+                if etiquetas is None:
+                    etiquetas = construir_etiquetas_recetas(texto)
+                    # construir_etiquetas_recetas puede haber reconstruido el índice
+                    clave = (INDICE_RECETAS.version, normalizar(texto))
+                    busquedas_sesion[clave] = etiquetas
+                    while len(busquedas_sesion) > MAX_BUSQUEDAS_CACHEADAS:
+                        busquedas_sesion.popitem(last=False)
+                else:
+                    busquedas_sesion.move_to_end(clave)
+                return etiquetas
+
+            def fijar_opciones(etiquetas: List[str]) -> None:
+                """Cambia las opciones del select sin perder la receta seleccionada."""
+                opciones = list(etiquetas)
+                if select_receta.value and select_receta.value not in opciones:
+                    opciones.insert(0, select_receta.value)
+                select_receta.options = opciones
+                select_receta.update()
+
+            def on_texto_busqueda(texto) -> None:
+                fijar_opciones(etiquetas_para(texto or ''))
+
+            def seleccionar_en_select(resumen) -> str:
+                """Añade la etiqueta de `resumen` a las opciones (si falta) y la selecciona."""
+                label = etiqueta_receta(resumen)
+                if label not in select_receta.options:
+                    select_receta.options = [label] + list(select_receta.options)
+                select_receta.value = label
+                seleccion['label_receta'] = label
+                return label
 
+            async def refrescar_recetas():
                 label_guardado = ULTIMA_RECETA_SELECCIONADA['label']
-                receta_mostrada = None
 
-                if label_guardado and label_guardado in etiquetas:
-                    select_receta.value = label_guardado
-                    seleccion['label_receta'] = label_guardado
-                    receta_mostrada = RECETAS_DISPONIBLES.get(label_guardado)
+                busquedas_sesion.clear()
+                etiquetas = etiquetas_para('')
+                fijar_opciones(etiquetas)
+                select_receta.disabled = not bool(etiquetas)
+
+                resumen_mostrado = resumen_de_etiqueta(label_guardado)
+                cargar = None
+
+                if resumen_mostrado is not None:
+                    seleccionar_en_select(resumen_mostrado)
+                    cargar = lambda r=resumen_mostrado: servicios_async.obtener_receta(r.origen, r.id)
                 elif robot.receta_actual is not None:
-                    for label, receta in RECETAS_DISPONIBLES.items():
-                        if getattr(receta, 'id', None) == getattr(robot.receta_actual, 'id', object()):
-                            select_receta.value = label
-                            seleccion['label_receta'] = label
-                            receta_mostrada = receta
-                            break
-
-                if receta_mostrada:
-                    ESTADO_RECETA['nombre'] = receta_mostrada.nombre
-                    
-                    if getattr(receta_mostrada, 'ingredientes', None):
-                        html_ings = '<div class="space-y-2">'
-                        for ing in receta_mostrada.ingredientes:
-                            nota = f' <span class="text-gray-500">({ing["nota"]})</span>' if ing.get('nota') else ''
-                            html_ings += (
-                                f'<div class="flex items-center gap-2">'
-                                f'<span class="text-indigo-600 dark:text-indigo-400">•</span>'
-                                f'<b>{ing["nombre"]}</b>: {ing["cantidad"]} {ing["unidad"]}{nota}'
-                                f'</div>'
-                            )
-                        html_ings += '</div>'
-                        ingredientes_lista.set_content(html_ings)
-                        ingredientes_expansion.set_visibility(True)
-                    else:
-                        ingredientes_expansion.set_visibility(False)
-                    
-                    # Mostrar pasos de la receta
-                    renderizar_pasos_receta(receta_mostrada)
+                    receta_robot = robot.receta_actual
+                    resumen_mostrado = CATALOGO.resumen(receta_robot.origen, receta_robot.id)
+                    if resumen_mostrado is not None:
+                        seleccionar_en_select(resumen_mostrado)
+
+                        async def cargar():
+                            return receta_robot
+
+                if resumen_mostrado:
+                    ESTADO_RECETA['nombre'] = resumen_mostrado.nombre
+                    await mostrar_fragmentos_receta(resumen_mostrado.origen, resumen_mostrado.id, cargar)
                 else:
                     ESTADO_RECETA['nombre'] = "(ninguna)"
                     ingredientes_expansion.set_visibility(False)
@@ -1435,16 +1527,16 @@ def registrar_vistas(robot: RobotCocina) -> None:
                 select_receta.update()
                 ui.notify('Recetas actualizadas', type='info')
 
-            def on_cambio_receta(e):
+            async def on_cambio_receta(e):
                 """Maneja el cambio de receta seleccionada."""
                 label = e.value
                 seleccion['label_receta'] = label
                 ULTIMA_RECETA_SELECCIONADA['label'] = label
 
-                receta = RECETAS_DISPONIBLES.get(label)
-                if receta:
-                    ESTADO_RECETA['nombre'] = receta.nombre
-                    texto_tiempo = calcular_tiempo_estimado(receta)
+                resumen = resumen_de_etiqueta(label)
+                if resumen:
+                    ESTADO_RECETA['nombre'] = resumen.nombre
+                    texto_tiempo = calcular_tiempo_estimado(resumen)
 
                     if texto_tiempo:
                         tiempo_label.text = texto_tiempo
@@ -1452,25 +1544,12 @@ def registrar_vistas(robot: RobotCocina) -> None:
                     else:
                         tiempo_row.set_visibility(False)
                     
-                    # Mostrar ingredientes
-                    if getattr(receta, 'ingredientes', None):
-                        html_ings = '<div class="space-y-2">'
-                        for ing in receta.ingredientes:
-                            nota = f' <span class="text-gray-500">({ing["nota"]})</span>' if ing.get('nota') else ''
-                            html_ings += (
-                                f'<div class="flex items-center gap-2">'
-                                f'<span class="text-indigo-600 dark:text-indigo-400">•</span>'
-                                f'<b>{ing["nombre"]}</b>: {ing["cantidad"]} {ing["unidad"]}{nota}'
-                                f'</div>'
-                            )
-                        html_ings += '</div>'
-                        ingredientes_lista.set_content(html_ings)
-                        ingredientes_expansion.set_visibility(True)
-                    else:
-                        ingredientes_expansion.set_visibility(False)
-                    
-                    # ========== MOSTRAR PASOS CON PARÁMETROS DEL PASO ==========
-                    renderizar_pasos_receta(receta)
+                    # Ingredientes y pasos: caché de fragmentos (la receta solo se carga si falta)
+                    await mostrar_fragmentos_receta(
+                        resumen.origen, resumen.id,
+                        lambda: servicios_async.obtener_receta(resumen.origen, resumen.id),
+                        label=label,
+                    )
                 else:
                     ESTADO_RECETA['nombre'] = "(ninguna)"
                     tiempo_row.set_visibility(False)
@@ -1480,21 +1559,23 @@ def registrar_vistas(robot: RobotCocina) -> None:
             select_receta.on_value_change(on_cambio_receta)
 
             def refrescar_ui():
-                estado_actual = robot.estado
+                # Una sola instantánea para leer un estado coherente sin bloquear al robot
+                inst = robot.instantanea
+                estado_actual = inst.estado
                 
                 # Obtener progreso y estados (necesarios para la barra de progreso)
-                prog_actual = float(getattr(robot, 'progreso', 0.0) or 0.0)
+                prog_actual = float(inst.progreso or 0.0)
                 prog_anterior = ESTADO_BARRA.get('ultimo_progreso', 0.0)
                 estado_anterior = ESTADO_BARRA.get('ultimo_estado', EstadoRobot.ESPERA)
 
                 # DETECCIÓN SIMPLE Y DIRECTA
                 # El robot nos dice explícitamente cuando completó una receta
-                if robot.receta_completada and not ESTADO_COMPLETADO['mostrar']:
+                if inst.receta_completada and not ESTADO_COMPLETADO['mostrar']:
                     ESTADO_COMPLETADO['mostrar'] = True
-                    ESTADO_COMPLETADO['receta_nombre'] = robot.nombre_receta_completada
+                    ESTADO_COMPLETADO['receta_nombre'] = inst.nombre_receta_completada
                     ESTADO_COMPLETADO['receta_label'] = ULTIMA_RECETA_SELECCIONADA['label']
                     
-                    completado_receta.text = robot.nombre_receta_completada or "Receta"
+                    completado_receta.text = inst.nombre_receta_completada or "Receta"
                     completado_card.set_visibility(True)
                     
                     paso_card.set_visibility(False)
@@ -1518,8 +1599,9 @@ def registrar_vistas(robot: RobotCocina) -> None:
 
                     ESTADO_RECETA['nombre'] = ESTADO_COMPLETADO['receta_nombre']
 
-                    if ESTADO_COMPLETADO['receta_label']:
-                        select_receta.value = ESTADO_COMPLETADO['receta_label']
+                    resumen_completado = resumen_de_etiqueta(ESTADO_COMPLETADO['receta_label'])
+                    if resumen_completado is not None:
+                        seleccionar_en_select(resumen_completado)
                         ULTIMA_RECETA_SELECCIONADA['label'] = ESTADO_COMPLETADO['receta_label']
 
                     if ESTADO_COMPLETADO['receta_nombre']:
@@ -1569,7 +1651,7 @@ def registrar_vistas(robot: RobotCocina) -> None:
 
                 # Progreso
                 # Solo marcar como completada si hay una receta activa
-                if not ESTADO_BARRA.get('completada', False) and robot.receta_actual is not None:
+                if not ESTADO_BARRA.get('completada', False) and inst.receta_actual is not None:
                     if prog_actual >= 99.9:
                         ESTADO_BARRA['completada'] = True
                     elif (
@@ -1604,7 +1686,7 @@ def registrar_vistas(robot: RobotCocina) -> None:
                 boton_cancelar.set_enabled(not robot_apagado)
 
                 # Paso actual
-                receta = robot.receta_actual
+                receta = inst.receta_actual
                 if receta:
                     # Solo actualizar nombre si hay cocción activa
                     if estado_actual in (EstadoRobot.COCINANDO, EstadoRobot.PAUSADO, EstadoRobot.ESPERANDO_CONFIRMACION):
@@ -1614,7 +1696,7 @@ def registrar_vistas(robot: RobotCocina) -> None:
                         if not ESTADO_COMPLETADO['mostrar']:
                             pasos = receta.pasos
                             if pasos:
-                                idx = robot.indice_paso_actual
+                                idx = inst.indice_paso_actual
                                 if 0 <= idx < len(pasos):
                                     paso = pasos[idx]
                                     paso_label.text = f'Paso {idx+1}/{len(pasos)}: {paso.proceso.nombre}'
@@ -1663,28 +1745,28 @@ def registrar_vistas(robot: RobotCocina) -> None:
                     boton_confirmar.set_visibility(False)
 
                 # ===== ACTUALIZAR ESTADO MANUAL =====
-                if robot.manual_activo:
+                if inst.manual_activo:
                     from utils.utils_tiempo import segundos_a_mmss
                     
                     # Temperatura
-                    temp_slider.value = robot.manual_temperatura
-                    temp_display.text = f"{robot.manual_temperatura}°C"
-                    temp_gauge.value = robot.manual_temperatura / 120.0
+                    temp_slider.value = inst.manual_temperatura
+                    temp_display.text = f"{inst.manual_temperatura}°C"
+                    temp_gauge.value = inst.manual_temperatura / 120.0
                     
                     # Velocidad
-                    vel_slider.value = robot.manual_velocidad
-                    vel_display.text = str(robot.manual_velocidad)
-                    vel_gauge.value = robot.manual_velocidad / 10.0
+                    vel_slider.value = inst.manual_velocidad
+                    vel_display.text = str(inst.manual_velocidad)
+                    vel_gauge.value = inst.manual_velocidad / 10.0
                     
                     # Tiempo
-                    tiempo_restante = robot.manual_tiempo_restante
+                    tiempo_restante = inst.manual_tiempo_restante
                     tiempo_str = segundos_a_mmss(tiempo_restante)
                     tiempo_display.text = tiempo_str
                     tiempo_gauge.value = tiempo_restante / 5400.0
                     
                     # Actualizar estado_manual
-                    estado_manual['temperatura'] = robot.manual_temperatura
-                    estado_manual['velocidad'] = robot.manual_velocidad
+                    estado_manual['temperatura'] = inst.manual_temperatura
+                    estado_manual['velocidad'] = inst.manual_velocidad
                     estado_manual['tiempo_segundos'] = tiempo_restante
                     
                 elif ESTADO_BARRA.get('manual_estaba_activo', False):
@@ -1748,7 +1830,16 @@ def registrar_vistas(robot: RobotCocina) -> None:
             
             ui.timer(interval=0.5, callback=refrescar_ui)
             ui.timer(interval=0.5, callback=monitor_global_recetas)
-            refrescar_recetas()
+
+            def al_cambiar_catalogo(cambios):
+                if any(c.afecta_a('recetas') for c in cambios):
+                    # Las búsquedas cacheadas de esta sesión ya no son válidas
+                    busquedas_sesion.clear()
+                    fijar_opciones(etiquetas_para(''))
+
+            _suscribir_catalogo(al_cambiar_catalogo)
+            # Primera carga una vez conectado el cliente, con la BD fuera del bucle de eventos
+            ui.timer(0, refrescar_recetas, once=True)
 
     # ==================================================================================
     # PÁGINA PROCESOS
@@ -1759,12 +1850,8 @@ def registrar_vistas(robot: RobotCocina) -> None:
         aplicar_tema_global()
         ui.page_title('Procesos - Robot de Cocina')
         
-        # Estados para controlar la visualización de procesos
-        mostrar_todos_base = {'value': False}
-        mostrar_todos_usuario = {'value': False}
-        
         # Función de refresco para procesos
-        def refrescar_procesos_completo():
+        async def refrescar_procesos_completo():
             refrescar_procesos()
         
         drawer = _crear_navegacion(robot, refrescar_procesos_completo)
@@ -1844,15 +1931,16 @@ def registrar_vistas(robot: RobotCocina) -> None:
                                                 on_click=confirm_dialog.close
                                             ).props('flat')
 
+                                            async def eliminar_proceso():
+                                                await servicios_async.eliminar_proceso_usuario(proceso.id)
+                                                confirm_dialog.close()
+                                                dlg.close()
+                                                refrescar_procesos()
+                                                ui.notify('Proceso eliminado', type='positive')
+
                                             ui.button(
                                                 'Eliminar',
-                                                on_click=lambda: [
-                                                    servicios.eliminar_proceso_usuario(proceso.id),
-                                                    confirm_dialog.close(),
-                                                    dlg.close(),
-                                                    refrescar_procesos(),
-                                                    ui.notify('Proceso eliminado', type='positive')
-                                                ]
+                                                on_click=eliminar_proceso,
                                             ).props('unelevated color=red icon=delete')
 
                                 ui.button(
@@ -1870,36 +1958,19 @@ def registrar_vistas(robot: RobotCocina) -> None:
                         ui.label('Procesos de Fábrica').classes('text-2xl font-bold text-gray-800 dark:text-white')
                     ui.label('Procesos predefinidos del sistema (no editables). Haz clic en una fila para ver detalles.').classes('text-gray-600 dark:text-gray-400')
 
+                    # Solo los procesos de la página visible (paginación en servidor)
                     procesos_base_map = {}
                     tabla_base = ui.table(
-                        columns=[
-                            {'name': 'nombre', 'label': 'Nombre', 'field': 'nombre', 'align': 'left'},
-                            {'name': 'tipo', 'label': 'Tipo', 'field': 'tipo', 'align': 'left'},
-                            {'name': 'tipo_ej', 'label': 'Tipo de Ejecución', 'field': 'tipo_ej', 'align': 'left'},
-                        ],
+                        columns=COLUMNAS_PROCESOS,
                         rows=[],
-                        row_key='nombre'
-                    ).props('flat').classes('w-full cursor-pointer')
+                        row_key='id',
+                        pagination={'rowsPerPage': FILAS_POR_PAGINA, 'page': 1, 'rowsNumber': 0},
+                    ).props(f'flat :rows-per-page-options="{OPCIONES_FILAS}"').classes('w-full cursor-pointer')
                     
-                    tabla_base.on('row-click', lambda e: mostrar_detalle_proceso(procesos_base_map.get(e.args[1]['nombre'])))
-                    
-                    # Botón para expandir/contraer procesos de fábrica (DEBAJO de la tabla)
-                    boton_expandir_base = ui.button(
-                        'Mostrar todos los procesos',
-                        icon='expand_more',
-                        on_click=lambda: toggle_base()
-                    ).props('flat color=indigo').classes('mt-2')
-                    
-                    def toggle_base():
-                        mostrar_todos_base['value'] = not mostrar_todos_base['value']
-                        refrescar_procesos()
-                        if mostrar_todos_base['value']:
-                            boton_expandir_base.props('icon=expand_less')
-                            boton_expandir_base.text = 'Mostrar menos'
-                        else:
-                            boton_expandir_base.props('icon=expand_more')
-                            boton_expandir_base.text = 'Mostrar todos los procesos'
-                        boton_expandir_base.update()
+                    tabla_base.on('row-click', lambda e: mostrar_detalle_proceso(procesos_base_map.get(e.args[1]['id'])))
+                    tabla_base.on('request', lambda e: cargar_pagina_procesos(
+                        tabla_base, procesos_base_map, 'base', e.args['pagination'],
+                    ))
 
             with ui.card().classes('w-full shadow-xl bg-gradient-to-br from-blue-50 to-indigo-50 dark:from-gray-800 dark:to-gray-900'):
                 with ui.column().classes('w-full p-6 gap-4'):
@@ -1919,7 +1990,7 @@ def registrar_vistas(robot: RobotCocina) -> None:
                         ).props('outlined dense')
 
                     # ========== FUNCIÓN CREAR PROCESO ==========
-                    def crear_proceso():
+                    async def crear_proceso():
                         """Crea un nuevo proceso SIN parámetros de ejecución."""
                         # Validaciones
                         nombre = (input_nombre.value or '').strip()
@@ -1939,7 +2010,7 @@ def registrar_vistas(robot: RobotCocina) -> None:
                         
                         # CAMBIO: Crear proceso sin parámetros numéricos
                         try:
-                            servicios.crear_proceso_usuario(
+                            await servicios_async.crear_proceso_usuario(
                                 nombre=nombre,
                                 tipo=tipo,
                                 tipo_ejecucion=tipo_ej_bd,
@@ -1974,100 +2045,66 @@ def registrar_vistas(robot: RobotCocina) -> None:
 
                     procesos_map = {}
                     tabla_usuario = ui.table(
-                        columns=[
-                            {'name': 'nombre', 'label': 'Nombre', 'field': 'nombre', 'align': 'left'},
-                            {'name': 'tipo', 'label': 'Tipo', 'field': 'tipo', 'align': 'left'},
-                            {'name': 'tipo_ej', 'label': 'Tipo de Ejecución', 'field': 'tipo_ej', 'align': 'left'},
-                        ],
+                        columns=COLUMNAS_PROCESOS,
                         rows=[],
-                        row_key='nombre'
-                    ).props('flat').classes('w-full cursor-pointer')
-                    
-                    tabla_usuario.on('row-click', lambda e: mostrar_detalle_proceso(procesos_map.get(e.args[1]['nombre'])))
-                    
-                    # Botón para expandir/contraer procesos de usuario (DEBAJO de la tabla)
-                    boton_expandir_usuario = ui.button(
-                        'Mostrar todos los procesos',
-                        icon='expand_more',
-                        on_click=lambda: toggle_usuario()
-                    ).props('flat color=indigo').classes('mt-2')
+                        row_key='id',
+                        pagination={'rowsPerPage': FILAS_POR_PAGINA, 'page': 1, 'rowsNumber': 0},
+                    ).props(f'flat :rows-per-page-options="{OPCIONES_FILAS}"').classes('w-full cursor-pointer')
                     
-                    def toggle_usuario():
-                        mostrar_todos_usuario['value'] = not mostrar_todos_usuario['value']
-                        refrescar_procesos()
-                        if mostrar_todos_usuario['value']:
-                            boton_expandir_usuario.props('icon=expand_less')
-                            boton_expandir_usuario.text = 'Mostrar menos'
-                        else:
-                            boton_expandir_usuario.props('icon=expand_more')
-                            boton_expandir_usuario.text = 'Mostrar todos los procesos'
-                        boton_expandir_usuario.update()
+                    tabla_usuario.on('row-click', lambda e: mostrar_detalle_proceso(procesos_map.get(e.args[1]['id'])))
+                    tabla_usuario.on('request', lambda e: cargar_pagina_procesos(
+                        tabla_usuario, procesos_map, 'usuario', e.args['pagination'],
+                    ))
 
             # ========== FUNCIÓN REFRESCAR PROCESOS ==========
-            def refrescar_procesos():
-                """Carga los procesos y actualiza las tablas SIN datos numéricos."""
-                
-                # Procesos base
-                procs_base = servicios.cargar_procesos_base()
-                procesos_base_map.clear()
-                
-                # Limitar a 10 si no se ha expandido
-                procs_base_a_mostrar = procs_base if mostrar_todos_base['value'] else procs_base[:10]
-                
-                # CAMBIO: Sin columnas numéricas
-                tabla_base.rows = [
-                    {
-                        'nombre': p.nombre,
-                        'tipo': p.tipo.capitalize(),
-                        'tipo_ej': 'Manual' if p.es_manual() else 'Automático',
-                    }
-                    for p in procs_base_a_mostrar
-                ]
-                
-                for p in procs_base:
-                    procesos_base_map[p.nombre] = p
-                
-                tabla_base.update()
-                
-                # Actualizar visibilidad del botón de fábrica
-                total_base = len(procs_base)
-                if total_base > 10:
-                    boton_expandir_base.set_visibility(True)
-                else:
-                    boton_expandir_base.set_visibility(False)
+            def cargar_pagina_procesos(tabla, mapa, origen, paginacion=None):
+                """
+                Envía a la tabla solo la página visible de los procesos del
+                catálogo compartido y actualiza su paginación (rowsNumber = total).
+                """
+                paginacion = dict(paginacion or tabla.pagination)
+                todos = CATALOGO.procesos(origen)
+                total = len(todos)
+                por_pagina = paginacion.get('rowsPerPage') or FILAS_POR_PAGINA
+                ultima_pagina = max(1, -(-total // por_pagina))
+                pagina = min(max(1, paginacion.get('page') or 1), ultima_pagina)
+
+                procs = todos[(pagina - 1) * por_pagina:pagina * por_pagina]
+
+                mapa.clear()
+                for p in procs:
+                    mapa[p.id] = p
 
-                # Procesos usuario
-                procs_user = servicios.cargar_procesos_usuario()
-                
-                # Limitar a 10 si no se ha expandido
-                procs_user_a_mostrar = procs_user if mostrar_todos_usuario['value'] else procs_user[:10]
-                
                 # CAMBIO: Sin columnas numéricas
-                tabla_usuario.rows = [
+                tabla.rows = [
                     {
+                        'id': p.id,
                         'nombre': p.nombre,
                         'tipo': p.tipo.capitalize(),
                         'tipo_ej': 'Manual' if p.es_manual() else 'Automático',
                     }
-                    for p in procs_user_a_mostrar
+                    for p in procs
                 ]
-                
-                tabla_usuario.update()
+                paginacion.update(page=pagina, rowsPerPage=por_pagina, rowsNumber=total)
+                tabla.pagination = paginacion
+                tabla.update()
 
-                procesos_map.clear()
-                for p in procs_user:
-                    procesos_map[p.nombre] = p
-                
-                # Actualizar visibilidad del botón de usuario
-                total_user = len(procs_user)
-                if total_user > 10:
-                    boton_expandir_usuario.set_visibility(True)
-                else:
-                    boton_expandir_usuario.set_visibility(False)
+            def refrescar_procesos():
+                """Recarga la página actual de ambas tablas de procesos."""
+                cargar_pagina_procesos(tabla_base, procesos_base_map, 'base')
+                cargar_pagina_procesos(tabla_usuario, procesos_map, 'usuario')
 
             refrescar_procesos()
             ui.timer(interval=0.5, callback=monitor_global_recetas)
 
+            def al_cambiar_catalogo(cambios):
+                if any(c.afecta_a('procesos', 'base') for c in cambios):
+                    cargar_pagina_procesos(tabla_base, procesos_base_map, 'base')
+                if any(c.afecta_a('procesos', 'usuario') for c in cambios):
+                    cargar_pagina_procesos(tabla_usuario, procesos_map, 'usuario')
+
+            _suscribir_catalogo(al_cambiar_catalogo)
+
     # ==================================================================================
     # PÁGINA RECETAS
     # ==================================================================================
@@ -2078,7 +2115,7 @@ def registrar_vistas(robot: RobotCocina) -> None:
         ui.page_title('Recetas - Robot de Cocina')
         
         # Función de refresco para recetas
-        def refrescar_recetas_completo():
+        async def refrescar_recetas_completo():
             refrescar_recetas()
         
         drawer = _crear_navegacion(robot, refrescar_recetas_completo)
@@ -2102,6 +2139,10 @@ def registrar_vistas(robot: RobotCocina) -> None:
                         ui.label('Recetas de Fábrica').classes('text-2xl font-bold text-gray-800 dark:text-white')
 
                     recetas_base_grid = ui.row().classes('w-full gap-4 flex-wrap')
+                    paginador_base = ui.pagination(
+                        1, 1, direction_links=True,
+                        on_change=lambda: pintar_grid_base(),
+                    ).classes('self-center')
 
             with ui.card().classes('w-full shadow-xl bg-gradient-to-br from-blue-50 to-indigo-50 dark:from-gray-800 dark:to-gray-900'):
                 with ui.column().classes('w-full p-6 gap-4'):
@@ -2200,7 +2241,8 @@ def registrar_vistas(robot: RobotCocina) -> None:
                             'temp': None,
                             'tiempo': None,
                             'vel': None,
-                            'instr': None
+                            'instr': None,
+                            'adelantar': None
                         }
 
                         def actualizar_inputs_parametros(proceso_label):
@@ -2221,6 +2263,9 @@ def registrar_vistas(robot: RobotCocina) -> None:
                                     params_state['instr'] = ui.textarea(
                                         'Escribe las instrucciones específicas para este paso'
                                     ).props('outlined dense').classes('w-full')
+                                    params_state['adelantar'] = ui.checkbox(
+                                        'Puede hacerse mientras sigue el paso automático anterior'
+                                    )
                                     
                                     # Resetear numéricos
                                     params_state['temp'] = None
@@ -2250,6 +2295,7 @@ def registrar_vistas(robot: RobotCocina) -> None:
                                     
                                     # Resetear instrucciones
                                     params_state['instr'] = None
+                                    params_state['adelantar'] = None
 
                         # Conectar el cambio de proceso a la función
                         select_proc.on_value_change(lambda e: actualizar_inputs_parametros(e.value))
@@ -2356,7 +2402,8 @@ def registrar_vistas(robot: RobotCocina) -> None:
                                 'temp': None,
                                 'tiempo': None,
                                 'vel': None,
-                                'instr': instr.strip()
+                                'instr': instr.strip(),
+                                'adelantar': bool(params_state['adelantar'] and params_state['adelantar'].value)
                             })
                         else:
                             # Automático: temperatura, tiempo, velocidad
@@ -2390,7 +2437,8 @@ def registrar_vistas(robot: RobotCocina) -> None:
                                     'temp': temp,
                                     'tiempo': tiempo_seg,
                                     'vel': vel,
-                                    'instr': None
+                                    'instr': None,
+                                    'adelantar': False
                                 })
                             except Exception as ex:
                                 ui.notify(f'Error en parámetros: {ex}', type='negative')
@@ -2402,7 +2450,7 @@ def registrar_vistas(robot: RobotCocina) -> None:
                         select_proc.value = None
                         params_container.clear()
 
-                    def crear_receta():
+                    async def crear_receta():
                         nombre = (input_nombre_receta.value or '').strip()
                         desc = (input_desc_receta.value or '').strip()
 
@@ -2431,10 +2479,11 @@ def registrar_vistas(robot: RobotCocina) -> None:
                                     paso_dict['temp'],
                                     paso_dict['tiempo'],
                                     paso_dict['vel'],
-                                    paso_dict['instr']
+                                    paso_dict['instr'],
+                                    paso_dict['adelantar']
                                 ))
                             
-                            servicios.crear_receta_usuario(
+                            await servicios_async.crear_receta_usuario(
                                 nombre=nombre,
                                 descripcion=desc,
                                 ingredientes=ingredientes_temp,
@@ -2479,45 +2528,31 @@ def registrar_vistas(robot: RobotCocina) -> None:
                         ui.label('Mis Recetas').classes('text-2xl font-bold')
 
                     recetas_user_grid = ui.row().classes('w-full gap-4 flex-wrap')
+                    paginador_usuario = ui.pagination(
+                        1, 1, direction_links=True,
+                        on_change=lambda: pintar_grid_usuario(),
+                    ).classes('self-center')
 
-            def mostrar_detalle_receta(receta):
+            async def mostrar_detalle_receta(resumen):
                 """Muestra el detalle de una receta con parámetros del PASO."""
+                # Las tarjetas solo tienen el resumen: cargar ahora la receta completa
+                receta = await servicios_async.obtener_receta(resumen.origen, resumen.id)
+                if receta is None:
+                    ui.notify('Receta no encontrada', type='negative')
+                    return
+
                 with ui.dialog() as dlg, ui.card().classes('max-w-2xl overflow-x-hidden').props('lang=es'):
                     with ui.column().classes('p-6 gap-4'):
                         # Título y descripción
                         ui.label(receta.nombre).classes('text-3xl font-bold whitespace-normal break-words overflow-wrap-anywhere hyphens-auto')
                         ui.label(receta.descripcion).classes('text-gray-600 dark:text-gray-400 whitespace-normal break-words overflow-wrap-anywhere hyphens-auto')
 
-                        # ========== CALCULAR TIEMPO ESTIMADO ==========
-                        # CAMBIO: Usar paso.tiempo_segundos en lugar de proceso.tiempo_segundos
-                        tiempo_total_segundos = 0
-                        pasos_manuales = 0
-                        for paso in receta.pasos:
-                            if paso.proceso.es_manual():
-                                pasos_manuales += 1
-                            else:
-                                # IMPORTANTE: Usar paso.tiempo_segundos
-                                tiempo_total_segundos += paso.tiempo_segundos or 0
-                        
-                        # Formatear tiempo
-                        if tiempo_total_segundos > 0:
-                            horas = tiempo_total_segundos // 3600
-                            minutos = (tiempo_total_segundos % 3600) // 60
-                            segundos = tiempo_total_segundos % 60
-                            
-                            tiempo_str = ""
-                            if horas > 0:
-                                tiempo_str = f"{horas}h {minutos}m"
-                            elif minutos > 0:
-                                tiempo_str = f"{minutos}m {segundos}s" if segundos > 0 else f"{minutos}m"
-                            else:
-                                tiempo_str = f"{segundos}s"
-                            
-                            nota_manual = f" (+ {pasos_manuales} paso{'s' if pasos_manuales != 1 else ''} manual{'es' if pasos_manuales != 1 else ''})" if pasos_manuales > 0 else ""
-                            
+                        # ========== TIEMPO ESTIMADO (precalculado) ==========
+                        texto_tiempo = calcular_tiempo_estimado(resumen)
+                        if texto_tiempo:
                             with ui.row().classes('items-center gap-2 bg-indigo-50 dark:bg-gray-700 p-3 rounded-lg'):
                                 ui.icon('schedule', size='sm').classes('text-indigo-600 dark:text-indigo-400')
-                                ui.label(f'Tiempo estimado: {tiempo_str}{nota_manual}').classes('text-sm font-medium text-gray-700 dark:text-gray-300')
+                                ui.label(texto_tiempo).classes('text-sm font-medium text-gray-700 dark:text-gray-300')
 
                         # ========== INGREDIENTES ==========
                         if receta.ingredientes:
@@ -2595,15 +2630,16 @@ def registrar_vistas(robot: RobotCocina) -> None:
                                                 on_click=confirm_dialog.close
                                             ).props('flat')
 
+                                            async def eliminar_receta():
+                                                await servicios_async.eliminar_receta_usuario(receta.id)
+                                                confirm_dialog.close()
+                                                dlg.close()
+                                                refrescar_recetas()
+                                                ui.notify('Receta eliminada', type='positive')
+
                                             ui.button(
                                                 'Eliminar',
-                                                on_click=lambda: [
-                                                    servicios.eliminar_receta_usuario(receta.id),
-                                                    confirm_dialog.close(),
-                                                    dlg.close(),
-                                                    refrescar_recetas(),
-                                                    ui.notify('Receta eliminada', type='positive')
-                                                ]
+                                                on_click=eliminar_receta,
                                             ).props('unelevated color=red icon=delete')
 
                                 ui.button(
@@ -2615,9 +2651,14 @@ def registrar_vistas(robot: RobotCocina) -> None:
                 dlg.open()
 
             def refrescar_recetas():
+                refrescar_opciones_procesos()
+                pintar_grid_base()
+                pintar_grid_usuario()
+
+            def refrescar_opciones_procesos():
                 procesos_map.clear()
-                procs_base = servicios.cargar_procesos_base()
-                procs_usr = servicios.cargar_procesos_usuario()
+                procs_base = CATALOGO.procesos('base')
+                procs_usr = CATALOGO.procesos('usuario')
                 opciones = []
 
                 for p in procs_base:
@@ -2633,31 +2674,27 @@ def registrar_vistas(robot: RobotCocina) -> None:
                 select_proc.options = opciones
                 select_proc.update()
 
-                recetas_base_grid.clear()
-                recs_base = servicios.cargar_recetas_base()
-                for rec in recs_base:
-                    with recetas_base_grid:
-                        with ui.card().classes(
-                            'w-64 h-56 overflow-hidden cursor-pointer '
-                            '!bg-white dark:!bg-gray-800 '
-                            '!border !border-gray-200 dark:!border-gray-700 '
-                            'hover:shadow-2xl transition-shadow '
-                        ).on('click', lambda r=rec: mostrar_detalle_receta(r)):
+            def pintar_grid_recetas(grid, paginador, origen, descripcion_vacia):
+                """
+                Pinta solo las tarjetas de la página actual del paginador; el
+                número de tarjetas creadas no depende del tamaño del catálogo.
+                """
+                todos = CATALOGO.resumenes(origen)
+                total = len(todos)
+                paginas = max(1, -(-total // RECETAS_POR_PAGINA))
+                paginador.max = paginas
+                paginador.set_visibility(paginas > 1)
+                if paginador.value > paginas:
+                    # Al reducir el máximo (p. ej. tras borrar) se vuelve a llamar con la página válida
+                    paginador.value = paginas
+                    return
 
-                            with ui.column().classes('p-4 gap-2'):
-                                ui.icon('restaurant', size='xl').classes('text-indigo-600 dark:text-indigo-400')
-                                ui.label(rec.nombre).classes(
-                                    'font-bold text-lg line-clamp-2 break-words'
-                                )
-                                ui.label(rec.descripcion or '').classes(
-                                    'text-sm text-gray-500 line-clamp-2 break-words'
-                                )
-                                ui.badge(f'{len(rec.pasos)} pasos', color='indigo')
+                inicio = (paginador.value - 1) * RECETAS_POR_PAGINA
+                resumenes = todos[inicio:inicio + RECETAS_POR_PAGINA]
 
-                recetas_user_grid.clear()
-                recs_usr = servicios.cargar_recetas_usuario()
-                for rec in recs_usr:
-                    with recetas_user_grid:
+                grid.clear()
+                for rec in resumenes:
+                    with grid:
                         with ui.card().classes(
                             'w-64 h-56 overflow-hidden cursor-pointer '
                             '!bg-white dark:!bg-gray-800 '
@@ -2670,10 +2707,223 @@ def registrar_vistas(robot: RobotCocina) -> None:
                                 ui.label(rec.nombre).classes(
                                     'font-bold text-lg line-clamp-2 break-words'
                                 )
-                                ui.label(rec.descripcion or 'Sin descripción').classes(
+                                ui.label(rec.descripcion or descripcion_vacia).classes(
                                     'text-sm text-gray-500 line-clamp-2 break-words'
                                 )
-                                ui.badge(f'{len(rec.pasos)} pasos', color='indigo')
+                                ui.badge(f'{rec.num_pasos} pasos', color='indigo')
+
+            def pintar_grid_base():
+                pintar_grid_recetas(recetas_base_grid, paginador_base, 'base', '')
+
+            def pintar_grid_usuario():
+                pintar_grid_recetas(recetas_user_grid, paginador_usuario, 'usuario', 'Sin descripción')
 
             refrescar_recetas()
+            ui.timer(interval=0.5, callback=monitor_global_recetas)
+
+            def al_cambiar_catalogo(cambios):
+                if any(c.afecta_a('procesos') for c in cambios):
+                    refrescar_opciones_procesos()
+                if any(c.afecta_a('recetas', 'base') for c in cambios):
+                    pintar_grid_base()
+                if any(c.afecta_a('recetas', 'usuario') for c in cambios):
+                    pintar_grid_usuario()
+
+            _suscribir_catalogo(al_cambiar_catalogo)
+
+    # ==================================================================================
+    # PÁGINA OPERADOR
+    # ==================================================================================
+
+    @ui.page('/operador')
+    def pagina_operador() -> None:
+        aplicar_tema_global()
+        ui.page_title('Operador - Robot de Cocina')
+
+        async def refrescar_operador_completo():
+            pintar_cola()
+
+        drawer = _crear_navegacion(robot, refrescar_operador_completo)
+
+        with ui.header().classes('!bg-white dark:!bg-gray-900 shadow-sm'):
+            with ui.row().classes('w-full items-center justify-between px-6 py-3'):
+                with ui.row().classes('items-center gap-3'):
+                    ui.button(icon='menu', on_click=lambda: drawer.toggle()).props('flat dense round')
+                    ui.label('Cola del Operador').classes('text-2xl font-bold text-gray-800 dark:text-white')
+
+                with ui.row().classes('items-center gap-2'):
+                    ui.icon('circle', size='xs').classes('text-green-500 dark:text-green-400 animate-pulse')
+                    ui.label('Sistema activo').classes('text-sm text-gray-600 dark:text-gray-400')
+
+        with ui.column().classes('p-6 max-w-7xl mx-auto gap-6 w-full'):
+
+            # ===== MÉTRICAS DE ESPERA =====
+            with ui.card().classes('w-full shadow-xl'):
+                with ui.column().classes('w-full p-6 gap-4'):
+                    with ui.row().classes('items-center gap-3'):
+                        ui.icon('timer', size='lg').classes('text-indigo-600 dark:text-indigo-400')
+                        ui.label('Robots esperando al operador').classes('text-2xl font-bold text-gray-800 dark:text-white')
+
+                    with ui.row().classes('w-full gap-8'):
+                        def metrica(titulo: str):
+                            with ui.column().classes('gap-0'):
+                                ui.label(titulo).classes('text-xs text-gray-500 dark:text-gray-400')
+                                return ui.label('-').classes('text-xl font-bold text-gray-800 dark:text-white')
+
+                        total_label = metrica('Tiempo parado total')
+                        media_label = metrica('Espera media')
+                        maxima_label = metrica('Espera máxima')
+                        confirmaciones_label = metrica('Confirmaciones')
+
+                    tabla_metricas = ui.table(
+                        columns=[
+                            {'name': 'robot', 'label': 'Robot', 'field': 'robot', 'align': 'left'},
+                            {'name': 'confirmaciones', 'label': 'Confirmaciones', 'field': 'confirmaciones'},
+                            {'name': 'total', 'label': 'Tiempo parado', 'field': 'total'},
+                            {'name': 'media', 'label': 'Espera media', 'field': 'media'},
+                            {'name': 'maxima', 'label': 'Espera máxima', 'field': 'maxima'},
+                        ],
+                        rows=[],
+                        row_key='robot',
+                    ).classes('w-full')
+
+            # ===== CONFIRMACIONES PENDIENTES =====
+            with ui.card().classes('w-full shadow-xl'):
+                with ui.column().classes('w-full p-6 gap-4'):
+                    with ui.row().classes('items-center gap-3'):
+                        ui.icon('pan_tool', size='lg').classes('text-purple-600 dark:text-purple-400')
+                        ui.label('Pasos manuales pendientes').classes('text-2xl font-bold text-gray-800 dark:text-white')
+                    ui.label(
+                        'Ordenados por prioridad: tiempo que lleva parado cada robot y tiempo '
+                        'que cocinará solo tras confirmar.'
+                    ).classes('text-sm text-gray-600 dark:text-gray-400')
+
+                    cola_container = ui.column().classes('w-full gap-3')
+
+            # ===== PRÓXIMOS PASOS MANUALES =====
+            with ui.card().classes('w-full shadow-xl'):
+                with ui.column().classes('w-full p-6 gap-4'):
+                    with ui.row().classes('items-center gap-3'):
+                        ui.icon('notifications_active', size='lg').classes('text-amber-500 dark:text-amber-400')
+                        ui.label('Próximos pasos manuales').classes('text-2xl font-bold text-gray-800 dark:text-white')
+
+                    avisos_container = ui.column().classes('w-full gap-2')
+
+            # Esperas y cuentas atrás: se actualizan cada segundo sin repintar la cola
+            etiquetas_espera = []
+            etiquetas_aviso = []
+            pintado = {'version': -1}
+
+            def confirmar(pendiente):
+                if COLA_ATENCION.confirmar(pendiente):
+                    ui.notify(f'Paso confirmado en {pendiente.nombre_robot}', type='positive')
+                else:
+                    ui.notify('Ese paso ya no está pendiente', type='warning')
+                pintar_cola()
+
+            def adelantar(aviso):
+                if COLA_ATENCION.adelantar(aviso):
+                    ui.notify(f'Paso adelantado en {aviso.nombre_robot}', type='positive')
+                else:
+                    ui.notify('Ese paso ya no puede adelantarse', type='warning')
+                pintar_cola()
+
+            def pintar_cola():
+                pintado['version'] = COLA_ATENCION.version
+                etiquetas_espera.clear()
+                cola_container.clear()
+                pendientes = COLA_ATENCION.pendientes()
+                with cola_container:
+                    if not pendientes:
+                        ui.label('Ningún robot espera confirmación.').classes(
+                            'text-gray-500 dark:text-gray-400 italic'
+                        )
+                    for posicion, pendiente in enumerate(pendientes, start=1):
+                        paso = pendiente.paso
+                        instrucciones = (
+                            (paso.instrucciones or paso.proceso.instrucciones) if paso else None
+                        ) or 'Sin instrucciones'
+                        with ui.card().classes(f'{CARD_BASE} w-full'):
+                            with ui.row().classes('w-full items-center justify-between p-4 gap-4'):
+                                with ui.row().classes('items-center gap-4'):
+                                    ui.badge(str(posicion), color='purple').classes('text-lg')
+                                    with ui.column().classes('gap-1'):
+                                        ui.label(
+                                            f'{pendiente.nombre_robot} · {pendiente.receta.nombre}'
+                                        ).classes('text-lg font-bold text-gray-800 dark:text-white')
+                                        ui.label(
+                                            f'Paso {pendiente.indice_paso + 1}: '
+                                            f'{paso.proceso.nombre if paso else "-"}'
+                                        ).classes('font-semibold text-purple-700 dark:text-purple-300')
+                                        ui.label(instrucciones).classes('text-sm text-gray-600 dark:text-gray-400')
+                                with ui.row().classes('items-center gap-6'):
+                                    with ui.column().classes('gap-0 items-end'):
+                                        espera_label = ui.label().classes('text-xl font-bold text-red-500')
+                                        ui.label(
+                                            f'Después cocina solo {segundos_a_mmss(pendiente.desbloquea_s)}'
+                                        ).classes('text-xs text-gray-500 dark:text-gray-400')
+                                    ui.button(
+                                        'Confirmar',
+                                        on_click=lambda p=pendiente: confirmar(p),
+                                    ).props('unelevated color=purple icon=check')
+                        etiquetas_espera.append((pendiente, espera_label))
+
+                etiquetas_aviso.clear()
+                avisos_container.clear()
+                avisos = COLA_ATENCION.avisos()
+                with avisos_container:
+                    if not avisos:
+                        ui.label('No hay pasos manuales anunciados.').classes(
+                            'text-gray-500 dark:text-gray-400 italic'
+                        )
+                    for aviso in avisos:
+                        paso = aviso.paso
+                        with ui.row().classes('w-full items-center justify-between p-3 rounded-lg !bg-amber-50 dark:!bg-gray-700'):
+                            ui.label(
+                                f'{aviso.nombre_robot} · {aviso.receta.nombre} · '
+                                f'Paso {aviso.indice_paso + 1}: {paso.proceso.nombre if paso else "-"}'
+                            ).classes('font-semibold text-gray-800 dark:text-white')
+                            with ui.row().classes('items-center gap-4'):
+                                faltan_label = ui.label().classes('font-bold text-amber-600 dark:text-amber-400')
+                                if aviso.robot.adelantable_indice == aviso.indice_paso:
+                                    ui.button(
+                                        'Hecho',
+                                        on_click=lambda a=aviso: adelantar(a),
+                                    ).props('unelevated dense color=indigo icon=fast_forward')
+                        etiquetas_aviso.append((aviso, faltan_label))
+                actualizar_tiempos()
+
+            def actualizar_tiempos():
+                for pendiente, etiqueta in etiquetas_espera:
+                    etiqueta.text = f'Parado {segundos_a_mmss(int(pendiente.esperando_s()))}'
+                for aviso, etiqueta in etiquetas_aviso:
+                    etiqueta.text = f'Llega en {segundos_a_mmss(int(aviso.faltan_s()))}'
+
+                metricas = COLA_ATENCION.metricas()
+                total = COLA_ATENCION.metricas_totales()
+                total_label.text = segundos_a_mmss(int(total.espera_total_s))
+                media_label.text = segundos_a_mmss(int(total.espera_media_s))
+                maxima_label.text = segundos_a_mmss(int(total.espera_maxima_s))
+                confirmaciones_label.text = str(total.confirmaciones)
+                tabla_metricas.rows = [
+                    {
+                        'robot': nombre,
+                        'confirmaciones': m.confirmaciones,
+                        'total': segundos_a_mmss(int(m.espera_total_s)),
+                        'media': segundos_a_mmss(int(m.espera_media_s)),
+                        'maxima': segundos_a_mmss(int(m.espera_maxima_s)),
+                    }
+                    for nombre, m in sorted(metricas.items())
+                ]
+                tabla_metricas.update()
+
+            def refrescar_operador():
+                # La cola solo se repinta si ha entrado o salido algún pendiente o aviso
+                if COLA_ATENCION.version != pintado['version']:
+                    pintar_cola()
+                else:
+                    actualizar_tiempos()
+
+            pintar_cola()
+            ui.timer(interval=1.0, callback=refrescar_operador)
             ui.timer(interval=0.5, callback=monitor_global_recetas)
\ No newline at end of file